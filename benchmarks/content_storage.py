@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the article body storage modes (MONGO_CONTENT_CODEC).
+
+Full-text articles are encoded the way DBHandler writes them and decoded the
+way get_article_by_url reads them, through BSON, for plain text, zlib and zstd,
+each with and without a dictionary trained on a separate part of the corpus:
+BSON bytes per document and write/read rate.
+
+    python -m benchmarks.content_storage --articles 2000 --output storage.json
+    python -m benchmarks.content_storage --corpus pages/   # real HTML pages
+
+Generated pages draw on a small vocabulary and compress far better than real
+prose, so use --corpus with crawled pages for ratios worth quoting.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List
+
+import bson
+
+from benchmarks.corpus_server import generate_page
+from core import content_storage
+from core.content_storage import ContentStorage, get_codec, train_dictionary
+from core.extractors import BeautifulSoupExtractor
+from models.article import Article, ArticleTask, ScrapedContent
+
+SOURCES = ("techcrunch", "bbc", "reuters", "nytimes", "theverge")
+
+
+def load_pages(args: argparse.Namespace) -> List[bytes]:
+    """HTML of the corpus directory, or generated pages of `page_size` bytes"""
+    if args.corpus:
+        paths = sorted(Path(args.corpus).glob("*.htm*"))
+        return [path.read_bytes() for path in paths[:args.articles]]
+    return [generate_page(page_id, args.page_size) for page_id in range(args.articles)]
+
+
+def sample_articles(pages: List[bytes]) -> List[Article]:
+    """Completed articles with the full extracted text of each page"""
+    extractor = BeautifulSoupExtractor(max_length=0)
+    scraped_at = datetime(2024, 5, 1, 12, 0)
+    articles = []
+    for i, html in enumerate(pages):
+        url = f"https://www.{SOURCES[i % 5]}.com/2024/05/story-number-{i}"
+        title, content = extractor.extract(html, url)
+        task = ArticleTask(f"article_{i:08d}", url, SOURCES[i % 5], "news")
+        scraped = ScrapedContent(title, content, scraped_at)
+        articles.append(Article.from_task_and_content(task, scraped))
+    return articles
+
+
+def rate(function: Callable[[], object], items: int, repeat: int) -> float:
+    """Best-of-`repeat` items per second for one pass over the sample"""
+    best = min(timeit.repeat(function, number=1, repeat=repeat))
+    return round(items / best, 1)
+
+
+def measure(storage: ContentStorage, articles: List[Article], repeat: int) -> dict:
+    documents = [bson.encode(storage.encode(article.to_dict())) for article in articles]
+    decoded = [Article.from_dict(storage.decode(bson.decode(doc))) for doc in documents]
+    assert [article.content for article in decoded] == [article.content for article in articles]
+
+    count = len(articles)
+    return {
+        "bson_bytes_per_article": round(sum(len(doc) for doc in documents) / count, 1),
+        "write_per_sec": rate(
+            lambda: [bson.encode(storage.encode(a.to_dict())) for a in articles], count, repeat
+        ),
+        "read_per_sec": rate(
+            lambda: [Article.from_dict(storage.decode(bson.decode(d))) for d in documents],
+            count,
+            repeat,
+        ),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    articles = sample_articles(load_pages(args))
+    # Train on the first part of the corpus, measure on the rest
+    split = max(1, int(len(articles) * args.train_fraction))
+    training, articles = articles[:split], articles[split:]
+    dictionary = train_dictionary([a.content for a in training], args.dictionary_size)
+
+    codecs = ["plain", "zlib"]
+    if content_storage.zstandard is not None:
+        codecs.append("zstd")
+    modes = {}
+    for codec in codecs:
+        modes[codec] = ContentStorage(get_codec(codec, args.level))
+        if codec != "plain":
+            modes[f"{codec}+dictionary"] = ContentStorage(get_codec(codec, args.level, dictionary))
+
+    results = {name: measure(storage, articles, args.repeat) for name, storage in modes.items()}
+    baseline = results["plain"]
+    for name, result in results.items():
+        if name == "plain":
+            continue
+        result["vs_plain"] = {
+            "bytes": round(result["bson_bytes_per_article"] / baseline["bson_bytes_per_article"], 3),
+            "write_speedup": round(result["write_per_sec"] / baseline["write_per_sec"], 2),
+            "read_speedup": round(result["read_per_sec"] / baseline["read_per_sec"], 2),
+        }
+
+    return {
+        "benchmark": "content_storage",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "zstandard": getattr(content_storage.zstandard, "__version__", None),
+        },
+        "config": {
+            "articles": len(articles),
+            "training_articles": len(training),
+            "corpus": args.corpus or f"generated pages of {args.page_size} bytes",
+            "level": args.level,
+            "dictionary_bytes": len(dictionary),
+            "repeat": args.repeat,
+        },
+        "average_content_chars": round(sum(len(a.content) for a in articles) / len(articles), 1),
+        "modes": results,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Article body storage microbenchmark")
+    parser.add_argument("--articles", type=int, default=2000, help="Pages to extract")
+    parser.add_argument("--corpus", help="Directory of .html pages instead of generated ones")
+    parser.add_argument("--page-size", type=int, default=20_000, help="Generated page bytes")
+    parser.add_argument("--level", type=int, default=3, help="Compression level")
+    parser.add_argument(
+        "--dictionary-size", type=int, default=content_storage.DEFAULT_DICTIONARY_SIZE
+    )
+    parser.add_argument(
+        "--train-fraction", type=float, default=0.2, help="Share of articles used for training"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes; the best is kept")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Local HTTP server that serves a generated corpus of article pages, so the
+scraper can be benchmarked without network access.
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+WORDS = (
+    "pipeline queue redis mongo scraper article content latency throughput worker "
+    "batch index cache parse fetch write market city council weather report team "
+    "season election transit budget energy climate school health science music"
+).split()
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta property="og:title" content="{title}">
+<style>body {{ font-family: sans-serif; }} .nav a {{ margin: 0 4px; }}</style>
+<script>window.pageId = {page_id};</script>
+</head>
+<body>
+<div class="nav">{nav}</div>
+<article>
+<h1>{title}</h1>
+{paragraphs}
+</article>
+<footer><p>Generated page {page_id}</p></footer>
+</body>
+</html>
+"""
+
+
+def generate_page(page_id: int, size: int) -> bytes:
+    """Deterministic article page of roughly `size` bytes"""
+    rng = random.Random(page_id)
+    title = " ".join(rng.choice(WORDS) for _ in range(6)).capitalize()
+    nav = "".join(f'<a href="/section/{i}">Section {i}</a>' for i in range(20))
+
+    paragraphs: List[str] = []
+    length = len(PAGE_TEMPLATE) + len(nav) + 2 * len(title)
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 80)))
+        paragraph = f"<p>{sentence.capitalize()}.</p>\n"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+
+    return PAGE_TEMPLATE.format(
+        title=title, page_id=page_id, nav=nav, paragraphs="".join(paragraphs)
+    ).encode("utf-8")
+
+
+class CorpusServer:
+    """Serves /articles/<n> pages of `page_size` bytes after `latency` seconds"""
+
+    def __init__(self, page_size: int = 20_000, latency: float = 0.0, pages: int = 1000):
+        self.page_size = page_size
+        self.latency = latency
+        self.pages = pages
+        self._cache = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, page_id: int) -> str:
+        return f"http://127.0.0.1:{self.port}/articles/{page_id}"
+
+    def page(self, page_id: int) -> bytes:
+        if page_id not in self._cache:
+            self._cache[page_id] = generate_page(page_id, self.page_size)
+        return self._cache[page_id]
+
+    def start(self) -> "CorpusServer":
+        # Generate up front so page building never counts as fetch time
+        for page_id in range(self.pages):
+            self.page(page_id)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; avoid delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 2 or parts[0] != "articles" or not parts[1].isdigit():
+                    self.send_error(404)
+                    return
+                body = server.page(int(parts[1]))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the article export (DBHandler.iter_articles, --mode export).
+
+Meant for a real MongoDB, where index use and the cost of deep pages are real.
+--seed first tops the collection up with synthetic articles, so it can be grown
+to millions of documents once and measured repeatedly:
+
+    python -m benchmarks.export --uri mongodb://localhost:27017 --seed 5000000
+    python -m benchmarks.export --fake --seed 20000   # in-memory smoke run
+
+Each mode reports articles/sec and the peak RSS of the process after it ran,
+which stays flat for the keyset modes however large the collection is. The
+`offset` mode pages with skip/limit over the first --offset-limit articles, the
+approach keyset paging replaces: every page rescans all those before it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator
+from unittest import mock
+
+from benchmarks.fakes import FakeMongoClient
+from config.settings import MongoConfig
+from core.db_handler import CREATED_INDEX, CREATED_INDEX_NAME, DBHandler
+from core.export import open_output, write_jsonl
+from models.article import Article, ArticleTask, ScrapedContent
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SOURCES = ("techcrunch", "bbc", "reuters", "nytimes", "theverge")
+CATEGORIES = ("news", "technology", "business", "science")
+WORDS = (
+    "council budget vote market shares launch report study climate election court "
+    "energy transport housing health school players season trial device network"
+).split()
+START = datetime(2024, 1, 1)
+PROJECTION = ["id", "url", "title", "created_at"]
+
+
+def synthetic_document(i: int, content_chars: int) -> Dict[str, Any]:
+    """Stored form of article i; about three share each created_at second"""
+    rng = random.Random(i)
+    source = SOURCES[i % len(SOURCES)]
+    task = ArticleTask(
+        f"article_{i:09d}", f"https://www.{source}.com/{i:09d}", source,
+        CATEGORIES[i % len(CATEGORIES)]
+    )
+    words = " ".join(rng.choice(WORDS) for _ in range(content_chars // 6))
+    scraped = ScrapedContent(f"Story {i}", words[:content_chars], START)
+    article = Article.from_task_and_content(task, scraped)
+    article.created_at = START + timedelta(seconds=i // 3)
+    return article.to_dict()
+
+
+def seed(handler: DBHandler, count: int, content_chars: int, batch: int = 10_000) -> int:
+    """Insert synthetic articles until the collection holds `count`, returns how many"""
+    existing = handler.collection.count_documents({})
+    for start in range(existing, count, batch):
+        documents = [
+            handler.content_storage.encode(synthetic_document(i, content_chars))
+            for i in range(start, min(count, start + batch))
+        ]
+        handler.collection.insert_many(documents, ordered=False)
+        print(f"Seeded {start + len(documents)}/{count}", file=sys.stderr)
+    return max(0, count - existing)
+
+
+def offset_pages(handler: DBHandler, limit: int, page_size: int) -> Iterator[Dict[str, Any]]:
+    """The same order paged with skip/limit"""
+    for skip in range(0, limit, page_size):
+        docs = list(handler.collection.find(
+            {}, sort=CREATED_INDEX, skip=skip, limit=min(page_size, limit - skip),
+            hint=CREATED_INDEX_NAME
+        ))
+        if not docs:
+            return
+        for doc in docs:
+            yield handler._export_doc(doc, None)
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # Kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def measure(export: Callable[[], Iterable[Dict[str, Any]]], path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with open_output(path) as output:
+        count = write_jsonl(export(), output)
+    seconds = time.perf_counter() - started
+    result = {
+        "articles": count,
+        "seconds": round(seconds, 2),
+        "articles_per_sec": round(count / seconds, 1) if seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if path != os.devnull:
+        result["output_bytes"] = os.path.getsize(path)
+    return result
+
+
+def run(args: argparse.Namespace) -> dict:
+    config = MongoConfig(
+        uri=args.uri,
+        database=args.database,
+        collection=args.collection,
+        bulk_size=1000,
+        bulk_flush_interval=2.0,
+        flush_retries=3,
+        stats_cache_ttl=0.0,
+        unchanged_writes="off",
+        prefetch_fingerprints=False,
+        content_codec=args.codec,
+        content_level=3,
+        content_dictionary="",
+        article_cache_size=0,
+        article_cache_ttl=60.0,
+        article_cache_redis=False,
+    )
+    with ExitStack() as stack:
+        if args.fake:
+            client = FakeMongoClient()
+            stack.enter_context(
+                mock.patch("core.db_handler.MongoClient", lambda *a, **kw: client)
+            )
+        started = time.perf_counter()
+        handler = DBHandler(config)
+        connect_seconds = time.perf_counter() - started
+        seeded = seed(handler, args.seed, args.content_chars) if args.seed else 0
+        # Index builds happen at connect; rebuild it if the seed just created the data
+        started = time.perf_counter()
+        handler.collection.create_index(CREATED_INDEX, name=CREATED_INDEX_NAME)
+        index_seconds = time.perf_counter() - started
+        total = handler.collection.count_documents({})
+
+        gzip_path = os.path.join(tempfile.mkdtemp(), "articles.jsonl.gz")
+        page_size = args.page_size
+        modes = {
+            "keyset_full": measure(
+                lambda: handler.iter_articles(page_size=page_size), os.devnull
+            ),
+            "keyset_projection": measure(
+                lambda: handler.iter_articles(fields=PROJECTION, page_size=page_size), os.devnull
+            ),
+            "keyset_gzip": measure(
+                lambda: handler.iter_articles(page_size=page_size), gzip_path
+            ),
+            "offset": measure(
+                lambda: offset_pages(handler, args.offset_limit, page_size), os.devnull
+            ),
+        }
+        os.remove(gzip_path)
+
+    return {
+        "benchmark": "export",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongodb": "in-memory fake" if args.fake else args.uri,
+        },
+        "config": {
+            "articles": total,
+            "seeded": seeded,
+            "page_size": page_size,
+            "content_codec": args.codec,
+            "content_chars": args.content_chars,
+            "offset_limit": args.offset_limit,
+        },
+        "connect_seconds": round(connect_seconds, 2),
+        "index_seconds": round(index_seconds, 2),
+        "modes": modes,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Article export throughput benchmark")
+    parser.add_argument(
+        "--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"),
+        help="MongoDB to benchmark against"
+    )
+    parser.add_argument("--fake", action="store_true", help="Use the in-memory fake instead")
+    parser.add_argument("--database", default="export_benchmark")
+    parser.add_argument("--collection", default="articles")
+    parser.add_argument("--seed", type=int, default=0, help="Fill the collection up to this size")
+    parser.add_argument("--content-chars", type=int, default=2000, help="Body length of seeds")
+    parser.add_argument("--codec", default="plain", choices=["plain", "zlib", "zstd"])
+    parser.add_argument("--page-size", type=int, default=1000, help="Articles per query")
+    parser.add_argument(
+        "--offset-limit", type=int, default=100_000, help="Articles the offset mode reads"
+    )
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
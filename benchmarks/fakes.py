@@ -0,0 +1,400 @@
+"""
+In-process stand-ins for Redis and MongoDB, covering just the commands the
+pipeline uses. Each round trip can be given an artificial latency.
+"""
+
+import fnmatch
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+
+from pymongo import UpdateOne
+
+
+class FakeRedis:
+    """Dict-backed Redis with lists, strings and lazy key expiry"""
+
+    def __init__(self, latency: float = 0.0, **kwargs):
+        self.latency = latency
+        self.round_trips = 0
+        self._data: Dict[str, Any] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _alive(self, key: str) -> bool:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return key in self._data
+
+    def _list(self, key: str) -> deque:
+        if not self._alive(key):
+            self._data[key] = deque()
+        return self._data[key]
+
+    def _drop_if_empty(self, key: str) -> None:
+        if not self._data.get(key):
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def register_script(self, script: str) -> "FakeScript":
+        return FakeScript()
+
+    def ping(self) -> bool:
+        self._round_trip()
+        return True
+
+    def lpush(self, key: str, *values) -> int:
+        self._round_trip()
+        return self._lpush(key, *values)
+
+    def _lpush(self, key: str, *values) -> int:
+        with self._lock:
+            items = self._list(key)
+            items.extendleft(values)
+            return len(items)
+
+    def rpush(self, key: str, *values) -> int:
+        self._round_trip()
+        return self._rpush(key, *values)
+
+    def _rpush(self, key: str, *values) -> int:
+        with self._lock:
+            items = self._list(key)
+            items.extend(values)
+            return len(items)
+
+    def brpop(self, keys: List[str], timeout: int = 0) -> Optional[tuple]:
+        """Never blocks: an empty fake queue stays empty while we wait"""
+        self._round_trip()
+        with self._lock:
+            for key in keys:
+                if self._alive(key) and self._data[key]:
+                    value = self._data[key].pop()
+                    self._drop_if_empty(key)
+                    return key, value
+        return None
+
+    def lmpop(self, numkeys: int, *keys, direction: str = "LEFT", count: int = 1):
+        self._round_trip()
+        return self._lmpop(numkeys, *keys, direction=direction, count=count)
+
+    def _lmpop(self, numkeys: int, *keys, direction: str = "LEFT", count: int = 1):
+        with self._lock:
+            for key in keys[:numkeys]:
+                if self._alive(key) and self._data[key]:
+                    items = self._data[key]
+                    pop = items.pop if direction == "RIGHT" else items.popleft
+                    values = [pop() for _ in range(min(count, len(items)))]
+                    self._drop_if_empty(key)
+                    return [key, values]
+        return None
+
+    def llen(self, key: str) -> int:
+        self._round_trip()
+        return self._llen(key)
+
+    def _llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._data[key]) if self._alive(key) else 0
+
+    def lrem(self, key: str, count: int, value) -> int:
+        self._round_trip()
+        return self._lrem(key, count, value)
+
+    def _lrem(self, key: str, count: int, value) -> int:
+        with self._lock:
+            if not self._alive(key):
+                return 0
+            items = self._data[key]
+            kept = deque()
+            removed = 0
+            for item in items:
+                if item == value and (count == 0 or removed < abs(count)):
+                    removed += 1
+                else:
+                    kept.append(item)
+            self._data[key] = kept
+            self._drop_if_empty(key)
+            return removed
+
+    def set(self, key: str, value, ex: Optional[int] = None, nx: bool = False):
+        self._round_trip()
+        return self._set(key, value, ex=ex, nx=nx)
+
+    def _set(self, key: str, value, ex: Optional[int] = None, nx: bool = False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = str(value)
+            self._expires_at.pop(key, None)
+            if ex:
+                self._expires_at[key] = time.monotonic() + ex
+            return True
+
+    def get(self, key: str) -> Optional[str]:
+        self._round_trip()
+        return self._get(key)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def exists(self, *keys) -> int:
+        self._round_trip()
+        return self._exists(*keys)
+
+    def _exists(self, *keys) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def delete(self, *keys) -> int:
+        self._round_trip()
+        return self._delete(*keys)
+
+    def _delete(self, *keys) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._alive(key):
+                    deleted += 1
+                self._data.pop(key, None)
+                self._expires_at.pop(key, None)
+            return deleted
+
+    def expire(self, key: str, seconds: int) -> bool:
+        self._round_trip()
+        return self._expire(key, seconds)
+
+    def _expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires_at[key] = time.monotonic() + seconds
+            return True
+
+    def scan_iter(self, match: str = "*"):
+        self._round_trip()
+        with self._lock:
+            keys = [key for key in list(self._data) if self._alive(key)]
+        return iter(fnmatch.filter(keys, match))
+
+
+class FakePipeline:
+    """Buffers commands and runs them in one simulated round trip"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.client, f"_{name}")
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list:
+        self.client._round_trip()
+        commands, self.commands = self.commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakeScript:
+    """Lua scripts are not emulated; the benchmark runs without REDIS_RELIABLE_QUEUE"""
+
+    def __call__(self, *args, **kwargs):
+        raise NotImplementedError("The fake Redis does not run Lua scripts")
+
+
+class FakeCursor(list):
+    """Query results with the cursor modifiers the pipeline chains"""
+
+    def sort(self, key: Union[str, list], direction: int = 1) -> "FakeCursor":
+        keys = [(key, direction)] if isinstance(key, str) else key
+        documents = list(self)
+        # Stable sorts from the last key to the first order by all of them
+        for name, order in reversed(keys):
+            documents.sort(key=lambda document: document.get(name), reverse=order < 0)
+        return FakeCursor(documents)
+
+    def skip(self, count: int) -> "FakeCursor":
+        return FakeCursor(self[count:])
+
+    def limit(self, count: int) -> "FakeCursor":
+        return FakeCursor(self[:count] if count else self)
+
+
+# Comparison operators understood in queries
+OPERATORS = {
+    "$in": lambda value, operand: value in operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+}
+
+
+class FakeMongoClient:
+    """MongoClient stand-in whose collections live in memory"""
+
+    def __init__(self, uri: str = "", latency: float = 0.0, **kwargs):
+        self.latency = latency
+        self.admin = SimpleNamespace(command=lambda *args, **kwargs: {"ok": 1})
+        self._databases: Dict[str, "FakeDatabase"] = {}
+
+    def __getitem__(self, name: str) -> "FakeDatabase":
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self.latency)
+        return self._databases[name]
+
+    def close(self) -> None:
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._collections: Dict[str, "FakeCollection"] = {}
+
+    def __getitem__(self, name: str) -> "FakeCollection":
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self.latency)
+        return self._collections[name]
+
+
+class FakeCollection:
+    """Documents keyed by URL, enough for upserts, touches, lookups and counts"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.round_trips = 0
+        self.documents: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _matches(self, document: dict, query: dict) -> bool:
+        for key, value in query.items():
+            if key == "$or":
+                if not any(self._matches(document, branch) for branch in value):
+                    return False
+            elif isinstance(value, dict) and value and all(op in OPERATORS for op in value):
+                field = document.get(key)
+                if not all(OPERATORS[op](field, operand) for op, operand in value.items()):
+                    return False
+            elif document.get(key) != value:
+                return False
+        return True
+
+    @staticmethod
+    def _project(document: dict, projection: Optional[dict]) -> dict:
+        if not projection:
+            return dict(document)
+        return {key: document[key] for key, keep in projection.items() if keep and key in document}
+
+    def _update(self, query: dict, update: dict) -> bool:
+        """Apply a $set and $unset to the first match, returns whether one matched"""
+        with self._lock:
+            for document in self.documents.values():
+                if self._matches(document, query):
+                    document.update(update["$set"])
+                    for key in update.get("$unset", {}):
+                        document.pop(key, None)
+                    return True
+        return False
+
+    def _replace(self, query: dict, document: dict, upsert: bool) -> bool:
+        """Returns True when the document was inserted"""
+        url = query["url"]
+        with self._lock:
+            inserted = url not in self.documents
+            if inserted and not upsert:
+                return False
+            self.documents[url] = dict(document, _id=url)
+            return inserted
+
+    def create_index(self, keys, **kwargs) -> str:
+        self._round_trip()
+        return str(keys)
+
+    def replace_one(self, query: dict, document: dict, upsert: bool = False):
+        self._round_trip()
+        inserted = self._replace(query, document, upsert)
+        return SimpleNamespace(
+            upserted_id=query["url"] if inserted else None,
+            modified_count=0 if inserted else 1,
+        )
+
+    def update_one(self, query: dict, update: dict):
+        self._round_trip()
+        matched = self._update(query, update)
+        return SimpleNamespace(matched_count=int(matched), modified_count=int(matched))
+
+    def bulk_write(self, operations: list, ordered: bool = True):
+        self._round_trip()
+        inserted = 0
+        for operation in operations:
+            if isinstance(operation, UpdateOne):
+                self._update(operation._filter, operation._doc)
+            else:
+                inserted += self._replace(operation._filter, operation._doc, operation._upsert)
+        return SimpleNamespace(
+            upserted_count=inserted, modified_count=len(operations) - inserted
+        )
+
+    def find_one(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        self._round_trip()
+        with self._lock:
+            for document in self.documents.values():
+                if self._matches(document, query):
+                    return self._project(document, projection)
+        return None
+
+    def insert_many(self, documents: List[dict], ordered: bool = True):
+        self._round_trip()
+        with self._lock:
+            for document in documents:
+                self.documents[document["url"]] = dict(document, _id=document["url"])
+        return SimpleNamespace(inserted_ids=[document["url"] for document in documents])
+
+    def find(
+        self,
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        sort: Optional[list] = None,
+        skip: int = 0,
+        limit: int = 0,
+        **kwargs
+    ) -> FakeCursor:
+        self._round_trip()
+        with self._lock:
+            cursor = FakeCursor(
+                document for document in self.documents.values()
+                if self._matches(document, query or {})
+            )
+        if sort:
+            cursor = cursor.sort(sort)
+        cursor = cursor.skip(skip).limit(limit)
+        return FakeCursor(self._project(document, projection) for document in cursor)
+
+    def count_documents(self, query: dict) -> int:
+        self._round_trip()
+        with self._lock:
+            return sum(1 for document in self.documents.values() if self._matches(document, query))
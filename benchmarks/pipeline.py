@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end throughput benchmark.
+
+Publishes a generated seed file with Publisher.publish_from_file and drains it
+through Consumer._process_task, against a local corpus server and in-process
+Redis/MongoDB fakes. Prints a JSON report (tasks/sec, per-task latency
+percentiles, time per stage) so runs can be diffed.
+
+    python -m benchmarks.pipeline --tasks 500 --latency-ms 20 --output run.json
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from unittest import mock
+
+from benchmarks.corpus_server import CorpusServer
+from benchmarks.fakes import FakeMongoClient, FakeRedis
+from config.settings import Settings
+from utils.logger import logger
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a sample list"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> dict:
+    """Count, total and latency percentiles in milliseconds"""
+    return {
+        "count": len(samples),
+        "total_s": round(sum(samples), 6),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+class StageTimer:
+    """Times calls to selected methods by wrapping them on their instances"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, obj, attribute: str, stage: str) -> None:
+        original: Callable = getattr(obj, attribute)
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(obj, attribute, timed)
+
+    def report(self) -> dict:
+        return {stage: summarize(samples) for stage, samples in self.samples.items()}
+
+
+def write_seed_file(path: str, server: CorpusServer, tasks: int) -> None:
+    """JSONL seed file pointing at the corpus server"""
+    priorities = ("high", "medium", "medium", "low")
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(tasks):
+            record = {
+                "id": f"bench_{i}",
+                "url": server.url(i % server.pages),
+                "source": "benchmark",
+                "category": "bench",
+                "priority": priorities[i % len(priorities)],
+            }
+            file.write(json.dumps(record) + "\n")
+
+
+def build_settings(args: argparse.Namespace) -> Settings:
+    settings = Settings.load_from_env()
+    # A single local host would otherwise be throttled to SCRAPER_HOST_RATE
+    settings.scraping.host_rate = args.host_rate
+    settings.scraping.respect_robots = False
+    settings.scraping.parser = args.parser
+    settings.mongo.bulk_size = args.bulk_size
+    settings.consumer.prefetch_batch = args.prefetch_batch
+    settings.redis.reliable = False
+    settings.dedup.backend = args.dedup
+    # The circuit breaker runs Lua scripts, which the fake Redis does not emulate
+    settings.circuit_breaker.failure_threshold = 0
+    return settings
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run one benchmark and return its report"""
+    server = CorpusServer(
+        page_size=args.page_size, latency=args.latency_ms / 1000, pages=args.pages
+    ).start()
+    fake_redis = FakeRedis(latency=args.redis_latency_ms / 1000)
+    fake_mongo = FakeMongoClient(latency=args.mongo_latency_ms / 1000)
+    settings = build_settings(args)
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir, \
+                mock.patch("redis.Redis", lambda **kwargs: fake_redis), \
+                mock.patch("core.db_handler.MongoClient", lambda *a, **kw: fake_mongo):
+            # Imported late so the fakes are in place before any client is built
+            from core.publisher import Publisher
+            from core.consumer import Consumer
+
+            seed_path = os.path.join(workdir, "seed.jsonl")
+            write_seed_file(seed_path, server, args.tasks)
+
+            publisher = Publisher(settings)
+            publish_start = time.perf_counter()
+            published = publisher.publish_from_file(seed_path)
+            publish_elapsed = time.perf_counter() - publish_start
+
+            consumer = Consumer(settings)
+            timer = StageTimer()
+            timer.wrap(consumer.redis_handler, "pop_tasks", "dequeue")
+            timer.wrap(consumer.scraper, "_fetch_with_timeout", "fetch")
+            timer.wrap(consumer.scraper, "_parse", "parse")
+            timer.wrap(consumer.db_handler, "save_article", "write")
+            timer.wrap(consumer.db_handler, "flush", "write")
+
+            task_latencies: List[float] = []
+            consume_start = time.perf_counter()
+            while True:
+                tasks = consumer.redis_handler.pop_tasks(consumer.prefetch_batch, timeout=0)
+                if not tasks:
+                    break
+                for task in tasks:
+                    start = time.perf_counter()
+                    success = consumer._process_task(task)
+                    task_latencies.append(time.perf_counter() - start)
+                    consumer._record_result(task, success, task_latencies[-1])
+                    if consumer.db_handler.buffer_is_due():
+                        consumer.flush_articles()
+            consumer.flush_articles()
+            consume_elapsed = time.perf_counter() - consume_start
+
+            collection = fake_mongo[settings.mongo.database][settings.mongo.collection]
+            processed = len(task_latencies)
+            return {
+                "benchmark": "pipeline",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "environment": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                },
+                "config": {key: value for key, value in vars(args).items() if key != "output"},
+                "publish": {
+                    "published": published,
+                    "elapsed_s": round(publish_elapsed, 6),
+                    "tasks_per_sec": round(published / publish_elapsed, 1)
+                    if publish_elapsed else 0.0,
+                },
+                "consume": {
+                    "processed": processed,
+                    # Buffered tasks are counted once their bulk write is acknowledged
+                    "succeeded": consumer.processed_count,
+                    "stored_documents": len(collection.documents),
+                    "elapsed_s": round(consume_elapsed, 6),
+                    "tasks_per_sec": round(processed / consume_elapsed, 1)
+                    if consume_elapsed else 0.0,
+                    "task_latency": summarize(task_latencies),
+                },
+                "stages": timer.report(),
+                "round_trips": {
+                    "redis": fake_redis.round_trips,
+                    "mongo": collection.round_trips,
+                },
+            }
+    finally:
+        server.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline pipeline throughput benchmark")
+    parser.add_argument("--tasks", type=int, default=200, help="Tasks to publish and consume")
+    parser.add_argument("--pages", type=int, default=1000, help="Distinct pages in the corpus")
+    parser.add_argument("--page-size", type=int, default=20_000, help="Approximate page size in bytes")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="HTTP server latency per page")
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0, help="Latency per Redis round trip")
+    parser.add_argument("--mongo-latency-ms", type=float, default=0.0, help="Latency per MongoDB round trip")
+    parser.add_argument("--bulk-size", type=int, default=100, help="MONGO_BULK_SIZE for the run")
+    parser.add_argument("--prefetch-batch", type=int, default=20, help="CONSUMER_PREFETCH_BATCH for the run")
+    parser.add_argument("--parser", default="lxml", choices=["lxml", "bs4"], help="Extraction engine")
+    parser.add_argument("--dedup", default="exact", choices=["exact", "off"], help="DEDUP_BACKEND for the run")
+    parser.add_argument("--host-rate", type=float, default=0.0, help="SCRAPER_HOST_RATE (0 disables)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep pipeline INFO logging")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.verbose:
+        # Per-task INFO logging would dominate the measurements
+        logger.setLevel(logging.WARNING)
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
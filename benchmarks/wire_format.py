@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the queue message formats.
+
+Compares the original encoding (a @dataclass run through asdict and dumped
+with full field names) with the slotted ArticleTask in both REDIS_WIRE_FORMAT
+modes: message bytes per task, encode/decode rate and in-memory object size.
+
+    python -m benchmarks.wire_format --tasks 20000 --output wire.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+from models.article import ArticleTask
+
+
+@dataclass
+class LegacyArticleTask:
+    """ArticleTask as it was before the slotted models, kept as the baseline"""
+    id: str
+    url: str
+    source: str
+    category: str
+    priority: str = "medium"
+    enqueued_at: Optional[float] = None
+    receipt: Optional[Tuple[str, str]] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("receipt")
+        return data
+
+
+def sample_records(count: int) -> List[dict]:
+    """Task fields shaped like a real seed file"""
+    sources = ("techcrunch", "bbc", "reuters", "nytimes", "theverge")
+    categories = ("technology", "world", "business", "science")
+    priorities = ("high", "medium", "medium", "low")
+    now = time.time()
+    return [
+        {
+            "id": f"article_{i:08d}",
+            "url": f"https://www.{sources[i % 5]}.com/{categories[i % 4]}/2024/05/story-number-{i}",
+            "source": sources[i % 5],
+            "category": categories[i % 4],
+            "priority": priorities[i % 4],
+            "enqueued_at": now + i / 1000,
+        }
+        for i in range(count)
+    ]
+
+
+def rate(function: Callable[[], object], items: int, repeat: int) -> float:
+    """Best-of-`repeat` items per second for one pass over the sample"""
+    best = min(timeit.repeat(function, number=1, repeat=repeat))
+    return round(items / best, 1)
+
+
+def object_size(obj) -> int:
+    """Instance size, counting the attribute dict of non-slotted objects"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def run(args: argparse.Namespace) -> dict:
+    records = sample_records(args.tasks)
+    legacy_tasks = [LegacyArticleTask(**record) for record in records]
+    tasks = [ArticleTask.from_dict(record) for record in records]
+
+    legacy_messages = [json.dumps(task.to_dict()) for task in legacy_tasks]
+    json_messages = [json.dumps(task.to_dict()) for task in tasks]
+    compact_messages = [task.to_compact() for task in tasks]
+    assert [ArticleTask.from_compact(m) for m in compact_messages] == tasks
+
+    count, repeat = len(records), args.repeat
+    formats = {
+        "legacy_json": {
+            "encode": lambda: [json.dumps(task.to_dict()) for task in legacy_tasks],
+            "decode": lambda: [LegacyArticleTask(**json.loads(m)) for m in legacy_messages],
+            "messages": legacy_messages,
+            "object_bytes": object_size(legacy_tasks[0]),
+        },
+        "json": {
+            "encode": lambda: [json.dumps(task.to_dict()) for task in tasks],
+            "decode": lambda: [ArticleTask.from_dict(json.loads(m)) for m in json_messages],
+            "messages": json_messages,
+            "object_bytes": object_size(tasks[0]),
+        },
+        "compact": {
+            "encode": lambda: [task.to_compact() for task in tasks],
+            "decode": lambda: [ArticleTask.from_compact(m) for m in compact_messages],
+            "messages": compact_messages,
+            "object_bytes": object_size(tasks[0]),
+        },
+    }
+
+    results = {}
+    for name, spec in formats.items():
+        results[name] = {
+            "bytes_per_task": round(sum(len(m.encode("utf-8")) for m in spec["messages"]) / count, 1),
+            "encode_per_sec": rate(spec["encode"], count, repeat),
+            "decode_per_sec": rate(spec["decode"], count, repeat),
+            "object_bytes": spec["object_bytes"],
+        }
+
+    baseline = results["legacy_json"]
+    for name in ("json", "compact"):
+        result = results[name]
+        result["vs_legacy"] = {
+            "bytes": round(result["bytes_per_task"] / baseline["bytes_per_task"], 3),
+            "encode_speedup": round(result["encode_per_sec"] / baseline["encode_per_sec"], 2),
+            "decode_speedup": round(result["decode_per_sec"] / baseline["decode_per_sec"], 2),
+        }
+
+    return {
+        "benchmark": "wire_format",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {"tasks": args.tasks, "repeat": args.repeat},
+        "formats": results,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Queue message format microbenchmark")
+    parser.add_argument("--tasks", type=int, default=20_000, help="Tasks per timed pass")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes; the best is kept")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
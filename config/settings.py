@@ -1,17 +1,60 @@
 import os
 from dataclasses import dataclass
+from typing import Dict, List
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as "true"/"1"/"yes" from the environment"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    """Read a comma-separated list such as "text/html,application/xhtml+xml" """
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+def _env_int_list(name: str, default: str = "") -> List[int]:
+    """Read numbers and ranges such as "0,2,4-7" """
+    values = []
+    for item in os.getenv(name, default).split(","):
+        first, _, last = item.strip().partition("-")
+        if first:
+            values.extend(range(int(first), int(last or first) + 1))
+    return values
+
+
+def _env_int_map(name: str, default: str) -> Dict[str, int]:
+    """Read ordered "name:value" pairs such as "high:6,medium:3,low:1" """
+    values = {}
+    for pair in os.getenv(name, default).split(","):
+        key, _, value = pair.partition(":")
+        if key.strip():
+            values[key.strip()] = int(value or 1)
+    return values
+
+
 @dataclass
 class RedisConfig:
     host: str
     port: int
     db: int
     queue_name: str
+    reliable: bool
+    visibility_timeout: int
+    reaper_interval: int
+    priority_weights: Dict[str, int]
+    wire_format: str
+    shards: int  # queue shards, hashed by URL host; 1 keeps a single queue
+    shard_nodes: List[str]  # "host:port" nodes the shards are spread over, empty for host:port
+    owned_shards: List[int]  # shards this consumer pops first, empty for all of them
+    steal: bool  # pop from other shards when the owned ones are empty
 
 
 @dataclass
@@ -19,6 +62,18 @@ class MongoConfig:
     uri: str
     database: str
     collection: str
+    bulk_size: int
+    bulk_flush_interval: float
+    flush_retries: int  # failed bulk flushes an article is written again after
+    stats_cache_ttl: float
+    unchanged_writes: str  # "touch", "skip" or "off" for recrawls with the same fingerprint
+    prefetch_fingerprints: bool  # look up stored fingerprints once per bulk flush
+    content_codec: str  # "plain", "zlib" or "zstd" for stored article bodies
+    content_level: int
+    content_dictionary: str  # path of a trained compression dictionary, empty for none
+    article_cache_size: int  # articles get_article_by_url keeps in process, 0 disables
+    article_cache_ttl: float
+    article_cache_redis: bool  # share cached articles between processes through Redis
 
 
 @dataclass
@@ -26,6 +81,68 @@ class ScrapingConfig:
     timeout: int
     max_retries: int
     delay_between_requests: float
+    host_rate: float
+    host_burst: int
+    respect_robots: bool
+    conditional_fetch: bool
+    validator_ttl: int
+    parser: str  # "lxml" or "bs4"
+    max_content_length: int  # characters of extracted text kept, 0 keeps all of it
+    max_body_bytes: int  # 0 reads whole bodies
+    content_types: List[str]  # empty accepts any Content-Type
+    early_stop: bool
+    archive_dir: str  # directory of raw response segments for re-extraction, empty disables
+    archive_segment_bytes: int
+
+
+@dataclass
+class ConsumerConfig:
+    concurrency: int
+    http_pool_size: int
+    workers: int
+    drain_timeout: int
+    dispatch_window: int
+    prefetch_batch: int  # tasks popped per Redis round trip when topping up the window
+    metrics_port: int
+
+
+@dataclass
+class PublisherConfig:
+    batch_size: int
+
+
+@dataclass
+class DedupConfig:
+    backend: str  # "exact", "bloom" or "off"
+    queued_ttl: int
+    recrawl_ttls: Dict[str, int]
+    bloom_capacity: int
+    bloom_error_rate: float
+
+
+@dataclass
+class RetryConfig:
+    max_attempts: int  # deliveries of a task before it is dead-lettered
+    base_delay: float
+    max_delay: float
+    poll_interval: float
+
+
+@dataclass
+class CircuitBreakerConfig:
+    failure_threshold: int  # consecutive unreachable fetches that open a host; 0 disables
+    open_seconds: float
+    probe_timeout: int  # how long a half-open probe holds the host before another may try
+    failure_window: int  # idle seconds after which a host's failure count is forgotten
+
+
+@dataclass
+class AutoscaleConfig:
+    min_workers: int
+    max_workers: int
+    interval: float
+    target_drain_seconds: float  # how quickly a backlog should be worked off
+    scale_down_ticks: int  # consecutive intervals of low demand before shrinking
 
 
 @dataclass
@@ -33,6 +150,12 @@ class Settings:
     redis: RedisConfig
     mongo: MongoConfig
     scraping: ScrapingConfig
+    consumer: ConsumerConfig
+    publisher: PublisherConfig
+    dedup: DedupConfig
+    retry: RetryConfig
+    circuit_breaker: CircuitBreakerConfig
+    autoscale: AutoscaleConfig
 
     @classmethod
     def load_from_env(cls):
@@ -52,16 +175,98 @@ class Settings:
                 port=int(os.getenv("REDIS_PORT", 6379)),
                 db=int(os.getenv("REDIS_DB", 0)),
                 queue_name=os.getenv("REDIS_QUEUE_NAME", "articles_queue"),
+                reliable=_env_bool("REDIS_RELIABLE_QUEUE"),
+                visibility_timeout=int(os.getenv("REDIS_VISIBILITY_TIMEOUT", 300)),
+                reaper_interval=int(os.getenv("REDIS_REAPER_INTERVAL", 60)),
+                priority_weights=_env_int_map(
+                    "REDIS_PRIORITY_WEIGHTS", "high:6,medium:3,low:1"
+                ),
+                wire_format=os.getenv("REDIS_WIRE_FORMAT", "json").lower(),
+                shards=int(os.getenv("REDIS_QUEUE_SHARDS", 1)),
+                shard_nodes=_env_list("REDIS_SHARD_NODES", ""),
+                owned_shards=_env_int_list("REDIS_OWNED_SHARDS"),
+                steal=_env_bool("REDIS_SHARD_STEAL", True),
             ),
             mongo=MongoConfig(
                 uri=mongo_uri,
                 database=os.getenv("MONGO_DATABASE", "articles_db"),
                 collection=os.getenv("MONGO_COLLECTION", "articles"),
+                bulk_size=int(os.getenv("MONGO_BULK_SIZE", 100)),
+                bulk_flush_interval=float(os.getenv("MONGO_BULK_FLUSH_INTERVAL", 2.0)),
+                flush_retries=int(os.getenv("MONGO_FLUSH_RETRIES", 3)),
+                stats_cache_ttl=float(os.getenv("MONGO_STATS_CACHE_TTL", 30.0)),
+                unchanged_writes=os.getenv("MONGO_UNCHANGED_WRITES", "touch").lower(),
+                prefetch_fingerprints=_env_bool("MONGO_PREFETCH_FINGERPRINTS", True),
+                content_codec=os.getenv("MONGO_CONTENT_CODEC", "plain").lower(),
+                content_level=int(os.getenv("MONGO_CONTENT_LEVEL", 3)),
+                content_dictionary=os.getenv("MONGO_CONTENT_DICTIONARY", ""),
+                article_cache_size=int(os.getenv("MONGO_ARTICLE_CACHE_SIZE", 0)),
+                article_cache_ttl=float(os.getenv("MONGO_ARTICLE_CACHE_TTL", 60.0)),
+                article_cache_redis=_env_bool("MONGO_ARTICLE_CACHE_REDIS"),
             ),
             scraping=ScrapingConfig(
                 timeout=int(os.getenv("SCRAPER_TIMEOUT", 30)),
                 max_retries=int(os.getenv("SCRAPER_MAX_RETRIES", 3)),
                 delay_between_requests=float(os.getenv("SCRAPER_DELAY", 1.0)),
+                host_rate=float(os.getenv("SCRAPER_HOST_RATE", 1.0)),
+                host_burst=int(os.getenv("SCRAPER_HOST_BURST", 2)),
+                respect_robots=_env_bool("SCRAPER_RESPECT_ROBOTS"),
+                conditional_fetch=_env_bool("SCRAPER_CONDITIONAL_FETCH", True),
+                validator_ttl=int(os.getenv("SCRAPER_VALIDATOR_TTL", 30 * 86400)),
+                parser=os.getenv("SCRAPER_PARSER", "lxml").lower(),
+                max_content_length=int(os.getenv("SCRAPER_MAX_CONTENT_LENGTH", 2000)),
+                max_body_bytes=int(os.getenv("SCRAPER_MAX_BODY_BYTES", 2 * 1024 * 1024)),
+                content_types=_env_list(
+                    "SCRAPER_CONTENT_TYPES", "text/html,application/xhtml+xml"
+                ),
+                early_stop=_env_bool("SCRAPER_EARLY_STOP", True),
+                archive_dir=os.getenv("SCRAPER_ARCHIVE_DIR", ""),
+                archive_segment_bytes=int(
+                    os.getenv("SCRAPER_ARCHIVE_SEGMENT_BYTES", 256 * 1024 * 1024)
+                ),
+            ),
+            consumer=ConsumerConfig(
+                concurrency=int(os.getenv("CONSUMER_CONCURRENCY", 50)),
+                http_pool_size=int(os.getenv("HTTP_POOL_SIZE", 100)),
+                workers=int(os.getenv("CONSUMER_WORKERS", os.cpu_count() or 1)),
+                drain_timeout=int(os.getenv("CONSUMER_DRAIN_TIMEOUT", 60)),
+                dispatch_window=int(os.getenv("CONSUMER_DISPATCH_WINDOW", 50)),
+                prefetch_batch=int(os.getenv("CONSUMER_PREFETCH_BATCH", 20)),
+                metrics_port=int(os.getenv("CONSUMER_METRICS_PORT", 9464)),
+            ),
+            publisher=PublisherConfig(
+                batch_size=int(os.getenv("PUBLISH_BATCH_SIZE", 1000)),
+            ),
+            dedup=DedupConfig(
+                backend=os.getenv("DEDUP_BACKEND", "exact").lower(),
+                queued_ttl=int(os.getenv("DEDUP_QUEUED_TTL", 86400)),
+                recrawl_ttls=_env_int_map(
+                    "DEDUP_RECRAWL_TTLS", "high:900,medium:3600,low:86400"
+                ),
+                bloom_capacity=int(os.getenv("DEDUP_BLOOM_CAPACITY", 10_000_000)),
+                bloom_error_rate=float(os.getenv("DEDUP_BLOOM_ERROR_RATE", 0.001)),
+            ),
+            retry=RetryConfig(
+                # SCRAPER_MAX_RETRIES counted inline attempts before the retry queue
+                max_attempts=int(
+                    os.getenv("RETRY_MAX_ATTEMPTS", os.getenv("SCRAPER_MAX_RETRIES", 3))
+                ),
+                base_delay=float(os.getenv("RETRY_BASE_DELAY", 30.0)),
+                max_delay=float(os.getenv("RETRY_MAX_DELAY", 3600.0)),
+                poll_interval=float(os.getenv("RETRY_POLL_INTERVAL", 1.0)),
+            ),
+            circuit_breaker=CircuitBreakerConfig(
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)),
+                open_seconds=float(os.getenv("CIRCUIT_OPEN_SECONDS", 60.0)),
+                probe_timeout=int(os.getenv("CIRCUIT_PROBE_TIMEOUT", 60)),
+                failure_window=int(os.getenv("CIRCUIT_FAILURE_WINDOW", 600)),
+            ),
+            autoscale=AutoscaleConfig(
+                min_workers=int(os.getenv("AUTOSCALE_MIN_WORKERS", 1)),
+                max_workers=int(os.getenv("AUTOSCALE_MAX_WORKERS", 2 * (os.cpu_count() or 1))),
+                interval=float(os.getenv("AUTOSCALE_INTERVAL", 10.0)),
+                target_drain_seconds=float(os.getenv("AUTOSCALE_TARGET_DRAIN", 60.0)),
+                scale_down_ticks=int(os.getenv("AUTOSCALE_SCALE_DOWN_TICKS", 3)),
             ),
         )
 
@@ -0,0 +1,223 @@
+import gzip
+import json
+import os
+import socket
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from glob import glob
+from http.client import responses
+from itertools import groupby
+from operator import attrgetter
+from typing import (
+    BinaryIO, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, TextIO, Tuple
+)
+from config.settings import ScrapingConfig
+from utils.logger import logger
+
+SEGMENT_SUFFIX = ".warc.gz"
+INDEX_SUFFIX = ".idx"
+WARC_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# Bodies are stored decoded and possibly cut at max_body_bytes, so these would lie
+DROPPED_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+class IndexEntry(NamedTuple):
+    """Where the record of one fetch of a URL starts in a segment"""
+    url: str
+    segment: str
+    offset: int
+    length: int
+    status: int
+    digest: Optional[str]  # body hash, as stored in Article.content_hash
+    fetched_at: str  # WARC-Date, sorts chronologically as text
+
+
+class ArchiveRecord(NamedTuple):
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    fetched_at: datetime
+
+
+def _header_lines(headers: Iterable[Tuple[str, str]]) -> bytes:
+    lines = []
+    for name, value in headers:
+        value = str(value).replace("\r", " ").replace("\n", " ")
+        lines.append(f"{name}: {value}\r\n".encode("utf-8", "replace"))
+    return b"".join(lines)
+
+
+def _parse_header_lines(lines: List[bytes]) -> Dict[str, str]:
+    headers = {}
+    for line in lines:
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        if name:
+            headers[name.strip()] = value.strip()
+    return headers
+
+
+def build_record(
+    url: str, status: int, headers: Mapping[str, str], body: bytes, fetched_at: datetime
+) -> bytes:
+    """A WARC/1.1 response record holding the HTTP status line, headers and body"""
+    http_headers = [
+        (name, value) for name, value in headers.items() if name.lower() not in DROPPED_HEADERS
+    ]
+    block = (
+        f"HTTP/1.1 {status} {responses.get(status, '')}\r\n".encode("latin-1")
+        + _header_lines(http_headers)
+        + b"\r\n"
+        + body
+    )
+    warc_headers = [
+        ("WARC-Type", "response"),
+        ("WARC-Record-ID", f"<urn:uuid:{uuid.uuid4()}>"),
+        ("WARC-Date", fetched_at.strftime(WARC_DATE_FORMAT)),
+        ("WARC-Target-URI", url),
+        ("Content-Type", "application/http; msgtype=response"),
+        ("Content-Length", str(len(block))),
+    ]
+    return b"WARC/1.1\r\n" + _header_lines(warc_headers) + b"\r\n" + block + b"\r\n\r\n"
+
+
+def parse_record(data: bytes) -> ArchiveRecord:
+    """Inverse of build_record"""
+    warc_head, _, rest = data.partition(b"\r\n\r\n")
+    warc = _parse_header_lines(warc_head.split(b"\r\n")[1:])
+    block = rest[:int(warc["Content-Length"])]
+    http_head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *lines = http_head.split(b"\r\n")
+    return ArchiveRecord(
+        url=warc["WARC-Target-URI"],
+        status=int(status_line.split()[1]),
+        headers=_parse_header_lines(lines),
+        body=body,
+        fetched_at=datetime.strptime(warc["WARC-Date"], WARC_DATE_FORMAT)
+    )
+
+
+class ArchiveWriter:
+    """Appends raw responses to gzipped WARC segment files in a directory.
+
+    Every record is its own gzip member, so a segment is a valid .warc.gz and any
+    record can be decompressed alone from its offset. Next to each segment an
+    index holds one JSON line per record; it is written after the record, so a
+    crash can at worst leave a record nobody points to. Segment names carry host
+    and pid, which lets every consumer process write to the same directory.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int, level: int = 6):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._prefix = f"pages-{{}}-{socket.gethostname()}-{os.getpid()}"
+        self._sequence = 0
+        self._segment_name = ""
+        self._segment: Optional[BinaryIO] = None
+        self._index: Optional[TextIO] = None
+        # The async scraper archives from executor threads
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+        digest: Optional[str] = None
+    ) -> bool:
+        """Append one response, returns False if it could not be archived"""
+        fetched_at = datetime.utcnow()
+        try:
+            record = gzip.compress(
+                build_record(url, status, headers, body, fetched_at), self.level, mtime=0
+            )
+            with self._lock:
+                segment = self._current_segment()
+                entry = IndexEntry(
+                    url, self._segment_name, segment.tell(), len(record), status, digest,
+                    fetched_at.strftime(WARC_DATE_FORMAT)
+                )
+                segment.write(record)
+                segment.flush()
+                self._index.write(json.dumps(entry._asdict()) + "\n")
+                self._index.flush()
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to archive {url}: {e}")
+            return False
+
+    def _current_segment(self) -> BinaryIO:
+        """The open segment, rolling over to a new one once it is full"""
+        if self._segment is not None and self._segment.tell() < self.segment_bytes:
+            return self._segment
+        self._close_files()
+        started = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        self._segment_name = f"{self._prefix.format(started)}-{self._sequence:05d}{SEGMENT_SUFFIX}"
+        self._sequence += 1
+        path = os.path.join(self.directory, self._segment_name)
+        self._segment = open(path, "xb")
+        self._index = open(path + INDEX_SUFFIX, "x", encoding="utf-8")
+        logger.info(f"Archiving responses to {path}")
+        return self._segment
+
+    def _close_files(self) -> None:
+        for file in (self._segment, self._index):
+            if file is not None:
+                file.close()
+        self._segment = self._index = None
+
+    def close(self) -> None:
+        """Close the current segment and its index"""
+        with self._lock:
+            self._close_files()
+
+
+def get_archive(config: ScrapingConfig) -> Optional[ArchiveWriter]:
+    """Writer for the configured archive directory, None when archiving is off"""
+    if not config.archive_dir:
+        return None
+    return ArchiveWriter(config.archive_dir, config.archive_segment_bytes)
+
+
+def load_index(directory: str) -> Dict[str, IndexEntry]:
+    """The latest archived record of every URL, from all index files in a directory"""
+    latest: Dict[str, IndexEntry] = {}
+    for path in sorted(glob(os.path.join(directory, f"*{SEGMENT_SUFFIX}{INDEX_SUFFIX}"))):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = IndexEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    # A line cut short by a crash
+                    logger.warning(f"Skipping malformed index line in {path}")
+                    continue
+                known = latest.get(entry.url)
+                if known is None or entry.fetched_at >= known.fetched_at:
+                    latest[entry.url] = entry
+    return latest
+
+
+def read_records(
+    directory: str, entries: Iterable[IndexEntry]
+) -> Iterator[Tuple[IndexEntry, ArchiveRecord]]:
+    """Records of index entries, read segment by segment in file order.
+    Records that cannot be read are logged and left out."""
+    ordered = sorted(entries, key=attrgetter("segment", "offset"))
+    for segment, group in groupby(ordered, key=attrgetter("segment")):
+        try:
+            file = open(os.path.join(directory, segment), "rb")
+        except OSError as e:
+            logger.warning(f"Cannot open archive segment {segment}: {e}")
+            continue
+        with file:
+            for entry in group:
+                try:
+                    file.seek(entry.offset)
+                    yield entry, parse_record(gzip.decompress(file.read(entry.length)))
+                except (OSError, EOFError, zlib.error, ValueError, KeyError, IndexError) as e:
+                    logger.warning(f"Skipping unreadable archive record of {entry.url}: {e}")
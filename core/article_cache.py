@@ -0,0 +1,210 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config.settings import MongoConfig
+from models.article import Article
+from utils.logger import logger
+from utils.metrics import ARTICLE_CACHE_LOOKUPS_TOTAL
+from utils.urls import url_digest
+
+
+class ArticleCache:
+    """Read-through cache of stored articles by URL, in front of MongoDB lookups.
+
+    An in-process LRU keeps up to MONGO_ARTICLE_CACHE_SIZE articles, each for
+    MONGO_ARTICLE_CACHE_TTL seconds. With MONGO_ARTICLE_CACHE_REDIS, lookups it
+    misses try Redis next, which every process shares. Writes through a DBHandler
+    invalidate both tiers; the LRUs of other processes only drop the old copy when
+    it expires, so the TTL bounds how stale a lookup can be.
+
+    Cached articles are shared between callers and must not be modified.
+    """
+
+    def __init__(self, config: MongoConfig, client=None):
+        self.size = max(0, config.article_cache_size)
+        self.ttl = config.article_cache_ttl
+        self.client = client if config.article_cache_redis else None
+        self.prefix = f"{config.database}:{config.collection}:article"
+        self._entries: "OrderedDict[str, Tuple[float, Article]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and (self.size > 0 or self.client is not None)
+
+    def get_many(self, urls: List[str]) -> Tuple[Dict[str, Article], List[str]]:
+        """Cached articles by URL, and the URLs that have to be read from MongoDB"""
+        if not self.enabled:
+            return {}, urls
+        found, missing = self._get_local(urls)
+        local_hits = len(found)
+        if missing and self.client is not None:
+            try:
+                raw = self.client.mget([self._key(url) for url in missing])
+                missing = self._add_shared(found, missing, raw)
+            except Exception as e:
+                logger.warning(f"Failed to read cached articles from Redis: {e}")
+        self._count(local_hits, len(found) - local_hits, len(missing))
+        return found, missing
+
+    def put_many(self, articles: Iterable[Article]) -> None:
+        """Cache articles just read from MongoDB"""
+        if not self.enabled:
+            return
+        articles = self._put_local(articles)
+        if articles and self.client is not None:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for article in articles:
+                    pipe.set(self._key(article.url), self._encode(article), ex=self._redis_ttl)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache {len(articles)} articles in Redis: {e}")
+
+    def invalidate(self, urls: List[str]) -> None:
+        """Forget articles that were just written"""
+        if not self.enabled or not urls:
+            return
+        self._drop_local(urls)
+        if self.client is not None:
+            try:
+                self.client.delete(*[self._key(url) for url in urls])
+            except Exception as e:
+                logger.warning(f"Failed to invalidate {len(urls)} cached articles in Redis: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookups answered by each tier since start, and the overall hit rate"""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    @property
+    def _redis_ttl(self) -> int:
+        return max(1, math.ceil(self.ttl))
+
+    def _key(self, url: str) -> str:
+        return f"{self.prefix}:{url_digest(url).hex()}"
+
+    def _encode(self, article: Article) -> str:
+        return json.dumps(article.to_dict())
+
+    def _get_local(self, urls: List[str]) -> Tuple[Dict[str, Article], List[str]]:
+        found: Dict[str, Article] = {}
+        missing: List[str] = []
+        if self.size == 0:
+            return found, list(urls)
+        now = time.monotonic()
+        with self._lock:
+            for url in urls:
+                entry = self._entries.get(url)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(url)
+                    found[url] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[url]
+                missing.append(url)
+        return found, missing
+
+    def _add_shared(
+        self, found: Dict[str, Article], urls: List[str], raw: List[Optional[str]]
+    ) -> List[str]:
+        """Add articles read from Redis to `found` and the LRU, returns the URLs still missing"""
+        missing, shared = [], []
+        for url, value in zip(urls, raw):
+            article = self._decode(url, value)
+            if article is None:
+                missing.append(url)
+            else:
+                found[url] = article
+                shared.append(article)
+        self._put_local(shared)
+        return missing
+
+    def _decode(self, url: str, raw: Optional[str]) -> Optional[Article]:
+        if not raw:
+            return None
+        try:
+            return Article.from_dict(json.loads(raw))
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring malformed cached article {url}: {e}")
+            return None
+
+    def _put_local(self, articles: Iterable[Article]) -> List[Article]:
+        articles = list(articles)
+        if self.size == 0:
+            return articles
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for article in articles:
+                self._entries[article.url] = (expires_at, article)
+                self._entries.move_to_end(article.url)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return articles
+
+    def _drop_local(self, urls: List[str]) -> None:
+        with self._lock:
+            for url in urls:
+                self._entries.pop(url, None)
+
+    def _count(self, hits: int, redis_hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.redis_hits += redis_hits
+            self.misses += misses
+        for result, count in (("hit", hits), ("redis_hit", redis_hits), ("miss", misses)):
+            if count:
+                ARTICLE_CACHE_LOOKUPS_TOTAL.labels(result).inc(count)
+
+
+class AsyncArticleCache(ArticleCache):
+    """asyncio counterpart of ArticleCache for AsyncDBHandler"""
+
+    async def get_many(self, urls: List[str]) -> Tuple[Dict[str, Article], List[str]]:
+        if not self.enabled:
+            return {}, urls
+        found, missing = self._get_local(urls)
+        local_hits = len(found)
+        if missing and self.client is not None:
+            try:
+                raw = await self.client.mget([self._key(url) for url in missing])
+                missing = self._add_shared(found, missing, raw)
+            except Exception as e:
+                logger.warning(f"Failed to read cached articles from Redis: {e}")
+        self._count(local_hits, len(found) - local_hits, len(missing))
+        return found, missing
+
+    async def put_many(self, articles: Iterable[Article]) -> None:
+        if not self.enabled:
+            return
+        articles = self._put_local(articles)
+        if articles and self.client is not None:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for article in articles:
+                    pipe.set(self._key(article.url), self._encode(article), ex=self._redis_ttl)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache {len(articles)} articles in Redis: {e}")
+
+    async def invalidate(self, urls: List[str]) -> None:
+        if not self.enabled or not urls:
+            return
+        self._drop_local(urls)
+        if self.client is not None:
+            try:
+                await self.client.delete(*[self._key(url) for url in urls])
+            except Exception as e:
+                logger.warning(f"Failed to invalidate {len(urls)} cached articles in Redis: {e}")
@@ -0,0 +1,339 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from config.settings import Settings
+from core.consumer import Consumer
+from core.sharded_queue import get_async_redis_handler
+from core.db_handler import AsyncDBHandler
+from core.async_scraper import AsyncScraper
+from core.dispatcher import HostDispatcher
+from core.dedup import AsyncDedupIndex
+from core.validator_cache import AsyncValidatorCache
+from core.retry import PERMANENT, TRANSIENT, RetryPolicy
+from core.circuit_breaker import AsyncHostCircuitBreaker
+from models.article import ArticleTask, Article, FetchFailure, FetchValidators
+from utils.logger import logger
+from utils.metrics import (
+    FETCH_RETRIES_TOTAL,
+    TASK_RETRIES_TOTAL,
+    TASK_SECONDS,
+    TASKS_DEAD_LETTERED_TOTAL,
+    TASKS_DEFERRED_TOTAL,
+    TASKS_UNCHANGED_TOTAL,
+    start_metrics_server,
+)
+from utils.urls import get_host
+
+
+class AsyncConsumer(Consumer):
+    """Consumer that keeps up to `concurrency` tasks in flight in one process"""
+
+    def __init__(
+        self, settings: Settings, on_result: Optional[Callable[[bool, float], None]] = None
+    ):
+        self.redis_handler = get_async_redis_handler(settings.redis)
+        self.db_handler = AsyncDBHandler(settings.mongo, self.redis_handler.client)
+        self.scraper = AsyncScraper(
+            settings.scraping, pool_size=settings.consumer.http_pool_size
+        )
+        self.dispatcher = HostDispatcher(
+            self.scraper.rate_limiter,
+            max(settings.consumer.dispatch_window, settings.consumer.concurrency),
+        )
+        self.dedup_config = settings.dedup
+        self.dedup: Optional[AsyncDedupIndex] = None
+        self.validator_cache: Optional[AsyncValidatorCache] = None
+        self.circuit_breaker_config = settings.circuit_breaker
+        self.circuit_breaker: Optional[AsyncHostCircuitBreaker] = None
+        self.concurrency = settings.consumer.concurrency
+        self.prefetch_batch = max(1, settings.consumer.prefetch_batch)
+        self.running = False
+        self.processed_count = 0
+        self.failed_count = 0
+        self.not_modified_count = 0
+        self.on_result = on_result
+        self.metrics_port = settings.consumer.metrics_port
+        self.retry_policy = RetryPolicy(settings.retry)
+        self._pending_acks: Dict[str, List[Tuple[ArticleTask, Article]]] = {}
+        self._unsettled_seconds: Dict[int, float] = {}
+
+        self._setup_signal_handlers()
+
+    def start_consuming(self) -> None:
+        """Start the consumer loop"""
+        asyncio.run(self._consume())
+
+    async def _consume(self) -> None:
+        """Pop tasks while a slot is free and process them concurrently"""
+        await self.redis_handler.connect()
+        await self.db_handler.connect()
+        await self.scraper.open()
+        self.dedup = AsyncDedupIndex(
+            self.redis_handler.client,
+            self.dedup_config,
+            self.redis_handler.config.queue_name,
+        )
+        self.validator_cache = AsyncValidatorCache(
+            self.redis_handler.client,
+            self.scraper.config,
+            self.redis_handler.config.queue_name,
+        )
+        self.circuit_breaker = AsyncHostCircuitBreaker(
+            self.redis_handler.client,
+            self.circuit_breaker_config,
+            self.redis_handler.config.queue_name,
+        )
+
+        self.running = True
+        logger.info(
+            f"Async consumer started with {self.concurrency} slots. Waiting for tasks..."
+        )
+        metrics_server = start_metrics_server(self.metrics_port) if self.metrics_port else None
+
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight: Set[asyncio.Task] = set()
+
+        background = [
+            asyncio.create_task(self._flush_periodically()),
+            asyncio.create_task(self._promote_retries_periodically()),
+        ]
+        if self.redis_handler.config.reliable:
+            background.append(asyncio.create_task(self._reap_periodically()))
+
+        try:
+            while self.running:
+                await slots.acquire()
+                try:
+                    task = await self._next_task()
+                except Exception as e:
+                    logger.error(f"Unexpected error in consumer loop: {e}")
+                    task = None
+
+                if not task:
+                    slots.release()
+                    logger.debug("No tasks in queue, waiting...")
+                    continue
+
+                worker = asyncio.create_task(self._run_slot(task, slots))
+                in_flight.add(worker)
+                worker.add_done_callback(in_flight.discard)
+                # Let the task reserve its host's rate limit token before dispatching more
+                await asyncio.sleep(0)
+
+            if in_flight:
+                logger.info(f"Waiting for {len(in_flight)} in-flight tasks to finish...")
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        finally:
+            for job in background:
+                job.cancel()
+            # Never leave buffered articles or prefetched tasks behind on shutdown,
+            # and hand the tasks back even when the last flush fails
+            try:
+                await self.flush_articles(final=True)
+            except Exception as e:
+                logger.error(f"Failed to flush articles on shutdown: {e}")
+            await self.redis_handler.return_tasks(self.dispatcher.drain())
+            await self.redis_handler.release_in_flight()
+            await self.scraper.close()
+            await self.db_handler.close()
+            await self.redis_handler.close()
+            if metrics_server:
+                metrics_server.shutdown()
+
+        logger.info(
+            f"Consumer stopped. Total processed: {self.processed_count} "
+            f"({self.not_modified_count} not modified)"
+        )
+
+    async def _next_task(self) -> Optional[ArticleTask]:
+        """Top up the dispatch window and pick a task whose host may be fetched now"""
+        while not self.dispatcher.is_full():
+            count = min(self.prefetch_batch, self.dispatcher.free_slots())
+            # Short timeout so a shutdown signal is noticed quickly
+            tasks = await self.redis_handler.pop_tasks(
+                count, timeout=0 if len(self.dispatcher) else 1
+            )
+            if not tasks:
+                break
+            for task in tasks:
+                self.dispatcher.add(task)
+
+        task = self.dispatcher.next_ready()
+        if task is None and len(self.dispatcher):
+            await asyncio.sleep(min(self.dispatcher.wait_time(), 1.0))
+        return task
+
+    async def _run_slot(self, task: ArticleTask, slots: asyncio.Semaphore) -> None:
+        """Process one task and free its slot"""
+        try:
+            with TASK_SECONDS.time() as timer:
+                success = await self._process_task(task)
+            self._record_result(task, success, timer.elapsed)
+            if self.db_handler.buffer_is_due():
+                await self.flush_articles()
+        finally:
+            slots.release()
+
+    async def _process_task(self, task: ArticleTask) -> Optional[bool]:
+        """Process a single task, returns None while its article waits in the write buffer"""
+        logger.info(f"Processing task: {task.id} - {task.url}")
+
+        try:
+            if await self.dedup.is_fresh(task):
+                logger.info(f"Skipping {task.url}, scraped within its recrawl window")
+                TASKS_UNCHANGED_TOTAL.labels(task.source, "fresh").inc()
+                await self._complete_task(task, False)
+                return True
+
+            host = get_host(task.url)
+            wait = await self.circuit_breaker.check(host)
+            if wait and await self._defer_task(task, wait):
+                return False
+
+            if task.attempts:
+                FETCH_RETRIES_TOTAL.labels(task.source).inc()
+            validators = await self.validator_cache.get(task.url)
+            scraped_content = await self.scraper.scrape(task.url, validators)
+            await self.circuit_breaker.record(host, scraped_content.failure)
+
+            if scraped_content.failure:
+                return await self._fail_task(task, scraped_content.failure)
+
+            if scraped_content.not_modified:
+                # Nothing to parse or write, just restart the recrawl window
+                self.not_modified_count += 1
+                TASKS_UNCHANGED_TOTAL.labels(task.source, "not_modified").inc()
+                await self._complete_task(task, True, scraped_content.validators)
+                return True
+
+            article = Article.from_task_and_content(task, scraped_content)
+            saved = await self._save_article(article, task)
+            if saved is None:
+                return None
+            if saved:
+                logger.info(f"Successfully processed task {task.id}")
+                return True
+
+            logger.error(f"Failed to save article {task.id} to database")
+            return await self._fail_task(task, FetchFailure(TRANSIENT, "Failed to save article"))
+
+        except Exception as e:
+            logger.error(f"Error processing task {task.id}: {e}")
+            return await self._fail_task(task, FetchFailure(TRANSIENT, str(e)))
+
+    async def _fail_task(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        """Put a failed task on the retry queue, or record the failure for good
+        once it is permanent or out of attempts. Always returns False."""
+        delay = self.retry_policy.delay(task, failure)
+        if delay is not None and await self.redis_handler.schedule_retry(task, delay):
+            TASK_RETRIES_TOTAL.labels(task.source, failure.kind).inc()
+            return False
+
+        if failure.kind != PERMANENT:
+            TASKS_DEAD_LETTERED_TOTAL.labels(task.source, failure.kind).inc()
+            await self.redis_handler.dead_letter(task, failure)
+        await self._save_article(self._failure_article(task, failure), task)
+        return False
+
+    async def _defer_task(self, task: ArticleTask, wait: float) -> bool:
+        """Park a task of an open-circuit host until it may be tried, without using
+        up an attempt"""
+        if not await self.redis_handler.schedule_retry(task, wait, count_attempt=False):
+            return False
+        TASKS_DEFERRED_TOTAL.labels(task.source).inc()
+        return True
+
+    async def _save_article(self, article: Article, task: ArticleTask) -> Optional[bool]:
+        """Save directly, or buffer for the next bulk write when batching is enabled
+        and return None. The task is acknowledged once its article is actually stored."""
+        if not self.db_handler.bulk_enabled:
+            success = await self.db_handler.save_article(article)
+            if success:
+                await self._complete_task(
+                    task, article.status == "completed", article.fetch_validators()
+                )
+            return success
+
+        self.db_handler.buffer_article(article)
+        self._pending_acks.setdefault(article.url, []).append((task, article))
+        return None
+
+    async def flush_articles(self, final: bool = False) -> None:
+        """Flush buffered articles, record failures for rejected documents, ack the
+        stored ones and retry the tasks of those given up on. Articles kept for another
+        flush keep their tasks pending, unless this is the `final` flush."""
+        # Snapshot acks together with the buffer, before the first await
+        pending_acks, self._pending_acks = self._pending_acks, {}
+        failed = await self.db_handler.flush()
+
+        unsaved = [item for item in failed if item[0].status == "failed"]
+        for article in self._failure_articles(failed):
+            if not await self.db_handler.save_article(article):
+                unsaved.append((article, article.error_message))
+        unsaved += self.db_handler.drain_unwritten(include_buffered=final)
+
+        await self._settle_pending(pending_acks, unsaved)
+
+    async def _settle_pending(
+        self,
+        pending_acks: Dict[str, List[Tuple[ArticleTask, Article]]],
+        unsaved: List[Tuple[Article, str]],
+    ) -> None:
+        """Ack tasks whose articles were stored and retry those whose articles were not"""
+        errors = {article.url: error for article, error in unsaved}
+        # Decided before failing tasks below buffer failure documents of their own
+        buffered = {url for url in pending_acks if self.db_handler.is_buffered(url)}
+        for url in buffered:
+            self._pending_acks[url] = pending_acks.pop(url) + self._pending_acks.get(url, [])
+        for url, entries in pending_acks.items():
+            for task, article in entries:
+                if url in errors:
+                    failure = FetchFailure(TRANSIENT, f"Failed to save article: {errors[url]}")
+                    await self._fail_task(task, failure)
+                else:
+                    await self._complete_task(
+                        task, article.status == "completed", article.fetch_validators()
+                    )
+                self._settle_result(task, url not in errors)
+
+    async def _complete_task(
+        self,
+        task: ArticleTask,
+        scraped: bool,
+        validators: Optional[FetchValidators] = None,
+    ) -> None:
+        """Ack a finished task and remember when and how its URL was last fetched"""
+        await self.redis_handler.ack_task(task)
+        await self.dedup.task_done(task, scraped)
+        if validators:
+            await self.validator_cache.put(task.url, validators)
+
+    async def _reap_periodically(self) -> None:
+        """Re-queue tasks abandoned by crashed consumers"""
+        while True:
+            await self.redis_handler.requeue_expired()
+            await asyncio.sleep(self.redis_handler.config.reaper_interval)
+
+    async def _promote_retries_periodically(self) -> None:
+        """Move retries whose delay has passed back onto the queues"""
+        while True:
+            await self.redis_handler.promote_due_retries()
+            await asyncio.sleep(self.retry_policy.config.poll_interval)
+
+    async def _flush_periodically(self) -> None:
+        """Flush on the age threshold even when no new articles arrive"""
+        while True:
+            await asyncio.sleep(self.db_handler.config.bulk_flush_interval)
+            if self.db_handler.buffer_is_due():
+                await self.flush_articles()
+
+    async def get_stats(self) -> dict:
+        """Get consumer statistics"""
+        db_stats = await self.db_handler.get_stats()
+        queue_lengths = await self.redis_handler.get_queue_lengths()
+
+        return {
+            "queue_length": sum(queue_lengths.values()),
+            "queue_lengths": queue_lengths,
+            "retry_queue": await self.redis_handler.get_retry_lengths(),
+            "database_stats": db_stats,
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import aiohttp
+from typing import Optional
+from config.settings import ScrapingConfig
+from core.archive import get_archive
+from core.extractors import BeautifulSoupExtractor, get_extractor
+from core.rate_limiter import HostRateLimiter
+from core.retry import PARSE, PERMANENT, TRANSIENT, UNREACHABLE
+from core.scraper import (
+    DEFAULT_HEADERS, STREAM_BLOCK_SIZE, FetchedPage, Scraper, UnsupportedContentError
+)
+from models.article import FetchFailure, FetchValidators, ScrapedContent
+from utils.logger import logger
+from utils.metrics import FETCH_SECONDS
+from utils.urls import get_host
+
+class AsyncScraper(Scraper):
+    """Asyncio counterpart of Scraper backed by one pooled aiohttp session"""
+
+    def __init__(self, config: ScrapingConfig, pool_size: int = 100):
+        self.config = config
+        self.pool_size = pool_size
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = HostRateLimiter(config.host_rate, config.host_burst)
+        self.extractor = get_extractor(config.parser, config.max_content_length)
+        self.fallback_extractor = BeautifulSoupExtractor(config.max_content_length)
+        self.archive = get_archive(config)
+
+    async def open(self) -> None:
+        """Create the shared HTTP session and connection pool"""
+        connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+        )
+
+    async def close(self) -> None:
+        """Close the HTTP session and release pooled connections"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.archive is not None:
+            self.archive.close()
+
+    async def scrape(
+        self, url: str, validators: Optional[FetchValidators] = None
+    ) -> ScrapedContent:
+        """Scrape title and content from a URL without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            logger.info(f"Scraping {url}")
+            await self._wait_for_host(url)
+            with FETCH_SECONDS.time():
+                page = await self._fetch_with_timeout(url, validators)
+        except Exception as e:
+            return self._failed(url, self._classify_failure(e))
+
+        fresh = self._response_validators(page.headers, page.body, validators)
+        if self._is_unchanged(url, page.body, fresh, validators):
+            return ScrapedContent.unchanged(fresh)
+        if self.archive is not None:
+            # Compressing and writing the page would block the event loop
+            await loop.run_in_executor(None, self._archive_page, url, page, fresh)
+
+        try:
+            # Parsing is CPU bound, keep it off the event loop
+            scraped_content = await loop.run_in_executor(
+                None, self._parse, page.body, url, page.parse
+            )
+        except Exception as e:
+            return self._failed(url, FetchFailure(PARSE, f"Extraction failed: {e}"))
+        if not scraped_content:
+            return self._failed(url, FetchFailure(PARSE, "Could not extract title or content"))
+
+        scraped_content.validators = fresh
+        logger.info(f"Successfully scraped {url}")
+        return scraped_content
+
+    def _classify_failure(self, error: Exception) -> FetchFailure:
+        """Failure kind of an exception raised while fetching"""
+        if isinstance(error, UnsupportedContentError):
+            return FetchFailure(PERMANENT, str(error))
+        # Includes TooManyRedirects, whose 3xx status classifies as permanent
+        if isinstance(error, aiohttp.ClientResponseError):
+            return self._status_failure(error.status, error.headers or {}, str(error))
+        if isinstance(error, aiohttp.InvalidURL):
+            return FetchFailure(PERMANENT, str(error))
+        if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+            return FetchFailure(UNREACHABLE, str(error) or type(error).__name__)
+        # Truncated payloads, decoding errors, ...
+        return FetchFailure(TRANSIENT, str(error) or type(error).__name__)
+
+    async def _fetch_with_timeout(
+        self, url: str, validators: Optional[FetchValidators] = None
+    ) -> FetchedPage:
+        """Fetch URL with timeout, streaming at most max_body_bytes; errors are raised"""
+        loop = asyncio.get_running_loop()
+        async with self.session.get(
+            url, headers=self._conditional_headers(validators), allow_redirects=True
+        ) as response:
+            if response.status == 429:
+                self._back_off_host(url, response.headers.get('Retry-After'))
+            response.raise_for_status()
+            if response.status == 304:
+                return FetchedPage(response.status, response.headers, None)
+
+            self._check_content_type(response.headers)
+            reader = self._body_reader(url)
+            async for chunk in response.content.iter_chunked(STREAM_BLOCK_SIZE):
+                # Feeding the incremental parse is CPU work as well
+                if reader.feeding:
+                    done = await loop.run_in_executor(None, reader.add, chunk)
+                else:
+                    done = reader.add(chunk)
+                if done:
+                    break
+            return FetchedPage(response.status, response.headers, reader.finish(), reader.parse)
+
+    async def _wait_for_host(self, url: str) -> None:
+        """Sleep until the per-host rate limit allows another request"""
+        host = get_host(url)
+        if self.config.respect_robots and not self.rate_limiter.knows_crawl_delay(host):
+            self.rate_limiter.set_crawl_delay(host, await self._fetch_crawl_delay(url))
+
+        delay = self.rate_limiter.reserve(host)
+        if delay > 0:
+            logger.debug(f"Rate limiting {host}: waiting {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _fetch_crawl_delay(self, url: str) -> Optional[float]:
+        """Read Crawl-delay for our user agent from the host's robots.txt"""
+        robots_url = self._robots_url(url)
+        try:
+            async with self.session.get(robots_url) as response:
+                if response.status != 200:
+                    return None
+                return self._parse_crawl_delay(await response.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Could not fetch {robots_url}: {e}")
+            return None
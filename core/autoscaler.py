@@ -0,0 +1,80 @@
+import math
+from typing import NamedTuple, Optional
+from config.settings import AutoscaleConfig
+
+# Weight of the newest interval in the smoothed per-task latency
+LATENCY_SMOOTHING = 0.5
+
+
+class ScalingSample(NamedTuple):
+    """What the pool did during one controller interval"""
+    queue_length: int  # ready tasks at the end of the interval
+    completed: int  # tasks the workers finished during the interval
+    busy_seconds: float  # summed processing time of those tasks
+    interval: float
+
+
+class AutoscalePolicy:
+    """Decides how many consumer workers the queue needs.
+
+    Demand is the arrival rate (tasks finished plus queue growth) plus the rate
+    needed to work off the current backlog within `target_drain_seconds`. A
+    worker's capacity is its task slots divided by the smoothed per-task latency.
+    Growing happens at once; shrinking only after `scale_down_ticks` intervals
+    in a row asked for fewer workers, and then only to the largest of those asks.
+    """
+
+    def __init__(self, config: AutoscaleConfig, slots_per_worker: int = 1):
+        self.config = config
+        self.slots_per_worker = max(1, slots_per_worker)
+        self.latency: Optional[float] = None
+        self._last_queue_length: Optional[int] = None
+        self._low_ticks = 0
+        self._low_need = 0
+
+    def desired(self, workers: int, sample: ScalingSample) -> int:
+        """Worker count for the next interval, given the current count"""
+        needed = self.clamp(self._needed(workers, sample))
+        if needed >= workers:
+            self._low_ticks = 0
+            return needed
+
+        self._low_need = needed if self._low_ticks == 0 else max(self._low_need, needed)
+        self._low_ticks += 1
+        if self._low_ticks < self.config.scale_down_ticks:
+            return workers
+        self._low_ticks = 0
+        return self._low_need
+
+    def _needed(self, workers: int, sample: ScalingSample) -> int:
+        self._observe_latency(sample)
+        arrival = self._arrival_rate(sample)
+        if sample.queue_length == 0 and arrival == 0:
+            return 0
+        if self.latency is None:
+            # Nothing finished yet to size workers by; grow one at a time while there is work
+            return workers + 1 if sample.queue_length else workers
+
+        capacity = self.slots_per_worker / self.latency
+        demand = arrival + sample.queue_length / max(self.config.target_drain_seconds, 1e-3)
+        return math.ceil(demand / capacity)
+
+    def _observe_latency(self, sample: ScalingSample) -> None:
+        if not sample.completed:
+            return
+        latency = max(sample.busy_seconds / sample.completed, 1e-3)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+    def _arrival_rate(self, sample: ScalingSample) -> float:
+        """Tasks per second entering the queue during the interval"""
+        previous = self._last_queue_length
+        self._last_queue_length = sample.queue_length
+        growth = sample.queue_length - previous if previous is not None else 0
+        return max(0.0, (sample.completed + growth) / max(sample.interval, 1e-3))
+
+    def clamp(self, workers: int) -> int:
+        """Keep a worker count within the configured bounds"""
+        return max(self.config.min_workers, min(self.config.max_workers, workers))
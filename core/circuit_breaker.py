@@ -0,0 +1,190 @@
+import time
+from typing import Dict, List, Optional
+from config.settings import CircuitBreakerConfig
+from core.retry import UNREACHABLE
+from models.article import FetchFailure
+from utils.logger import logger
+from utils.metrics import CIRCUITS_OPENED_TOTAL
+
+# Drop expired local open-circuit entries once the table grows past this size
+PRUNE_THRESHOLD = 10000
+
+# Whether a request to a host may go ahead. KEYS: host state hash, probe lock.
+# ARGV: now, probe lock ttl (ms). Returns {allowed, wait (ms), state}, where state
+# is 0 for a healthy host, 1 for a host with failures and 2 for the half-open probe:
+# once the open period is over, exactly one caller wins the probe lock.
+CHECK_SCRIPT = """
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until'))
+if not opened_until then
+    return {1, 0, redis.call('EXISTS', KEYS[1])}
+end
+local now = tonumber(ARGV[1])
+if now < opened_until then
+    return {0, math.ceil((opened_until - now) * 1000), 1}
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[2]) then
+    return {1, 0, 2}
+end
+return {0, math.max(redis.call('PTTL', KEYS[2]), 1), 1}
+"""
+
+# Count an unreachable fetch; open the circuit on reaching the threshold, or open
+# it again when the failure was the half-open probe. KEYS: state hash, probe lock.
+# ARGV: now, threshold, open seconds, state ttl. Returns 1 if the circuit opened.
+FAILURE_SCRIPT = """
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local opened_until = tonumber(redis.call('HGET', KEYS[1], 'opened_until'))
+local now = tonumber(ARGV[1])
+local opened = 0
+if (opened_until and now >= opened_until)
+        or (not opened_until and failures >= tonumber(ARGV[2])) then
+    redis.call('HSET', KEYS[1], 'opened_until', now + tonumber(ARGV[3]))
+    redis.call('DEL', KEYS[2])
+    opened = 1
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return opened
+"""
+
+
+class HostCircuitBreaker:
+    """Per-host circuit breaker shared by all consumers through Redis.
+
+    A host that failed to answer `failure_threshold` times in a row is "open":
+    its tasks are deferred without a request for `open_seconds`. After that a
+    single request is let through as a probe; success closes the circuit, failure
+    opens it again. Open hosts are also remembered locally so deferring their
+    tasks costs no extra round trip.
+    """
+
+    def __init__(self, client, config: CircuitBreakerConfig, prefix: str):
+        self.client = client
+        self.config = config
+        self.prefix = f"{prefix}:circuit"
+        self._state_ttl = int(config.open_seconds + config.failure_window)
+        # Hosts with Redis state, which a success has to clear -> whether we hold the probe
+        self._tracked: Dict[str, bool] = {}
+        # Host -> wall-clock time until which it is known to be open
+        self._open_until: Dict[str, float] = {}
+        self._check = client.register_script(CHECK_SCRIPT)
+        self._failure = client.register_script(FAILURE_SCRIPT)
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.failure_threshold > 0
+
+    def check(self, host: str) -> float:
+        """Seconds until the host may be tried again, 0 if a request may go ahead
+        now (possibly as the half-open probe)"""
+        if not self.enabled:
+            return 0.0
+        wait = self._known_wait(host)
+        if wait:
+            return wait
+        try:
+            result = self._check(keys=self._keys(host), args=self._check_args())
+        except Exception as e:
+            logger.warning(f"Failed to check circuit of {host}: {e}")
+            return 0.0
+        return self._checked(host, result)
+
+    def record(self, host: str, failure: Optional[FetchFailure]) -> None:
+        """Count a fetch outcome; anything but an unreachable host counts as success"""
+        if not self.enabled:
+            return
+        try:
+            if failure is not None and failure.kind == UNREACHABLE:
+                opened = self._failure(keys=self._keys(host), args=self._failure_args())
+                self._opened(host, opened)
+            elif host in self._tracked:
+                self.client.delete(*self._keys(host))
+                self._closed(host)
+        except Exception as e:
+            logger.warning(f"Failed to record circuit outcome of {host}: {e}")
+
+    def _known_wait(self, host: str) -> float:
+        open_until = self._open_until.get(host)
+        if open_until is None:
+            return 0.0
+        wait = open_until - time.time()
+        if wait <= 0:
+            del self._open_until[host]
+            return 0.0
+        return wait
+
+    def _checked(self, host: str, result: list) -> float:
+        allowed, wait_ms, state = (int(value) for value in result)
+        if state:
+            self._tracked[host] = state == 2
+        else:
+            self._tracked.pop(host, None)
+        if allowed:
+            return 0.0
+        wait = wait_ms / 1000
+        self._remember_open(host, wait)
+        return wait
+
+    def _opened(self, host: str, opened: int) -> None:
+        self._tracked[host] = False
+        if opened:
+            CIRCUITS_OPENED_TOTAL.inc()
+            self._remember_open(host, self.config.open_seconds)
+            logger.warning(
+                f"Circuit for {host} opened, "
+                f"deferring its tasks for {self.config.open_seconds:.0f}s"
+            )
+
+    def _closed(self, host: str) -> None:
+        if self._tracked.pop(host, False):
+            logger.info(f"Circuit for {host} closed after a successful probe")
+        self._open_until.pop(host, None)
+
+    def _remember_open(self, host: str, wait: float) -> None:
+        now = time.time()
+        if len(self._open_until) > PRUNE_THRESHOLD:
+            self._open_until = {h: t for h, t in self._open_until.items() if t > now}
+        self._open_until[host] = now + wait
+
+    def _keys(self, host: str) -> List[str]:
+        return [f"{self.prefix}:{host}", f"{self.prefix}:{host}:probe"]
+
+    def _check_args(self) -> list:
+        return [time.time(), self.config.probe_timeout * 1000]
+
+    def _failure_args(self) -> list:
+        return [
+            time.time(),
+            self.config.failure_threshold,
+            self.config.open_seconds,
+            self._state_ttl,
+        ]
+
+
+class AsyncHostCircuitBreaker(HostCircuitBreaker):
+    """asyncio counterpart of HostCircuitBreaker for the async consumer"""
+
+    async def check(self, host: str) -> float:
+        if not self.enabled:
+            return 0.0
+        wait = self._known_wait(host)
+        if wait:
+            return wait
+        try:
+            result = await self._check(keys=self._keys(host), args=self._check_args())
+        except Exception as e:
+            logger.warning(f"Failed to check circuit of {host}: {e}")
+            return 0.0
+        return self._checked(host, result)
+
+    async def record(self, host: str, failure: Optional[FetchFailure]) -> None:
+        if not self.enabled:
+            return
+        try:
+            if failure is not None and failure.kind == UNREACHABLE:
+                opened = await self._failure(keys=self._keys(host), args=self._failure_args())
+                self._opened(host, opened)
+            elif host in self._tracked:
+                await self.client.delete(*self._keys(host))
+                self._closed(host)
+        except Exception as e:
+            logger.warning(f"Failed to record circuit outcome of {host}: {e}")
@@ -1,22 +1,70 @@
 import signal
-import sys
-from typing import Optional
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 from config.settings import Settings
-from core.redis_handler import RedisHandler
+from core.sharded_queue import get_redis_handler
 from core.db_handler import DBHandler
 from core.scraper import Scraper
-from models.article import ArticleTask, Article
+from core.dispatcher import HostDispatcher
+from core.dedup import DedupIndex
+from core.validator_cache import ValidatorCache
+from core.retry import PERMANENT, TRANSIENT, RetryPolicy
+from core.circuit_breaker import HostCircuitBreaker
+from models.article import ArticleTask, Article, FetchFailure, FetchValidators
 from utils.logger import logger
+from utils.metrics import (
+    FETCH_RETRIES_TOTAL,
+    TASK_RETRIES_TOTAL,
+    TASK_SECONDS,
+    TASKS_DEAD_LETTERED_TOTAL,
+    TASKS_DEFERRED_TOTAL,
+    TASKS_TOTAL,
+    TASKS_UNCHANGED_TOTAL,
+    start_metrics_server,
+)
+from utils.urls import get_host
 
 
 class Consumer:
-    def __init__(self, settings: Settings):
-        self.redis_handler = RedisHandler(settings.redis)
-        self.db_handler = DBHandler(settings.mongo)
+    def __init__(
+        self, settings: Settings, on_result: Optional[Callable[[bool, float], None]] = None
+    ):
+        self.redis_handler = get_redis_handler(settings.redis)
+        self.db_handler = DBHandler(settings.mongo, self.redis_handler.client)
         self.scraper = Scraper(settings.scraping)
+        self.dispatcher = HostDispatcher(
+            self.scraper.rate_limiter, settings.consumer.dispatch_window
+        )
+        self.dedup = DedupIndex(
+            self.redis_handler.client, settings.dedup, settings.redis.queue_name
+        )
+        self.validator_cache = ValidatorCache(
+            self.redis_handler.client, settings.scraping, settings.redis.queue_name
+        )
+        self.circuit_breaker = HostCircuitBreaker(
+            self.redis_handler.client, settings.circuit_breaker, settings.redis.queue_name
+        )
+        self.prefetch_batch = max(1, settings.consumer.prefetch_batch)
         self.running = False
+        self.processed_count = 0
+        self.failed_count = 0
+        self.not_modified_count = 0
+        self.on_result = on_result
+        self.metrics_port = settings.consumer.metrics_port
+        # Tasks waiting for their buffered article to be flushed before ack
+        self._pending_acks: Dict[str, List[Tuple[ArticleTask, Article]]] = {}
+        # Processing time of those tasks, by id() since tasks are not hashable
+        self._unsettled_seconds: Dict[int, float] = {}
+        self.retry_policy = RetryPolicy(settings.retry)
+        self._last_reap = 0.0
+        self._last_promotion = 0.0
+        # Block on an empty queue no longer than the retry poll, so due retries move on time
+        self._idle_pop_timeout = max(1, min(5, int(settings.retry.poll_interval)))
 
-        # Setup graceful shutdown
+        self._setup_signal_handlers()
+
+    def _setup_signal_handlers(self) -> None:
+        """Setup graceful shutdown"""
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
@@ -24,65 +72,259 @@ class Consumer:
         """Start the consumer loop"""
         self.running = True
         logger.info("Consumer started. Waiting for tasks...")
+        metrics_server = start_metrics_server(self.metrics_port) if self.metrics_port else None
+
+        try:
+            while self.running:
+                try:
+                    task = self._next_task()
+                    if task:
+                        with TASK_SECONDS.time() as timer:
+                            success = self._process_task(task)
+                        self._record_result(task, success, timer.elapsed)
+                    else:
+                        # No task available, just continue
+                        logger.debug("No tasks in queue, waiting...")
 
-        processed_count = 0
+                    if self.db_handler.buffer_is_due():
+                        self.flush_articles()
+                    self._reap_if_due()
+                    self._promote_retries_if_due()
 
-        while self.running:
+                except KeyboardInterrupt:
+                    logger.info("Received interrupt signal")
+                    break
+                except Exception as e:
+                    logger.error(f"Unexpected error in consumer loop: {e}")
+        finally:
+            # Never leave buffered articles or prefetched tasks behind on shutdown,
+            # and hand the tasks back even when the last flush fails
             try:
-                task = self.redis_handler.pop_task(timeout=5)
-                if task:
-                    success = self._process_task(task)
-                    if success:
-                        processed_count += 1
-                        logger.info(f"Total processed: {processed_count}")
-                else:
-                    # No task available, just continue
-                    logger.debug("No tasks in queue, waiting...")
+                self.flush_articles(final=True)
+            except Exception as e:
+                logger.error(f"Failed to flush articles on shutdown: {e}")
+            self.redis_handler.return_tasks(self.dispatcher.drain())
+            self.redis_handler.release_in_flight()
+            self.scraper.close()
+            if metrics_server:
+                metrics_server.shutdown()
 
-            except KeyboardInterrupt:
-                logger.info("Received interrupt signal")
+        logger.info(
+            f"Consumer stopped. Total processed: {self.processed_count} "
+            f"({self.not_modified_count} not modified)"
+        )
+
+    def _next_task(self) -> Optional[ArticleTask]:
+        """Top up the dispatch window and pick a task whose host may be fetched now"""
+        while not self.dispatcher.is_full():
+            # Only block on Redis when there is nothing local to work on
+            timeout = 0 if len(self.dispatcher) else self._idle_pop_timeout
+            count = min(self.prefetch_batch, self.dispatcher.free_slots())
+            tasks = self.redis_handler.pop_tasks(count, timeout=timeout)
+            if not tasks:
                 break
-            except Exception as e:
-                logger.error(f"Unexpected error in consumer loop: {e}")
+            for task in tasks:
+                self.dispatcher.add(task)
+
+        task = self.dispatcher.next_ready()
+        if task is None and len(self.dispatcher):
+            # Every buffered host is throttled; wait briefly for the first to free up
+            time.sleep(min(self.dispatcher.wait_time(), 1.0))
+        return task
+
+    def _record_result(self, task: ArticleTask, success: Optional[bool], seconds: float) -> None:
+        """Update processed/failed counters for a finished task. A task whose article
+        waits in the write buffer (`success` is None) is counted once it is written."""
+        if success is None:
+            self._unsettled_seconds[id(task)] = seconds
+            return
 
-        logger.info(f"Consumer stopped. Total processed: {processed_count}")
+        TASKS_TOTAL.labels(task.source, "success" if success else "failure").inc()
+        if success:
+            self.processed_count += 1
+            logger.info(f"Total processed: {self.processed_count}")
+        else:
+            self.failed_count += 1
 
-    def _process_task(self, task: ArticleTask) -> bool:
-        """Process a single task"""
+        if self.on_result:
+            self.on_result(success, seconds)
+
+    def _process_task(self, task: ArticleTask) -> Optional[bool]:
+        """Process a single task, returns None while its article waits in the write buffer"""
         logger.info(f"Processing task: {task.id} - {task.url}")
 
         try:
-            # Always scrape and save, bypassing the "already scraped" check
-            scraped_content = self.scraper.scrape(task.url)
+            if self.dedup.is_fresh(task):
+                logger.info(f"Skipping {task.url}, scraped within its recrawl window")
+                TASKS_UNCHANGED_TOTAL.labels(task.source, "fresh").inc()
+                self._complete_task(task, False)
+                return True
 
-            if scraped_content:
-                # Create article with scraped content
-                article = Article.from_task_and_content(task, scraped_content)
+            host = get_host(task.url)
+            wait = self.circuit_breaker.check(host)
+            if wait and self._defer_task(task, wait):
+                return False
 
-                # Save article (DBHandler will handle upsert automatically)
-                success = self.db_handler.save_article(article)
+            if task.attempts:
+                FETCH_RETRIES_TOTAL.labels(task.source).inc()
+            validators = self.validator_cache.get(task.url)
+            scraped_content = self.scraper.scrape(task.url, validators)
+            self.circuit_breaker.record(host, scraped_content.failure)
 
-                if success:
-                    logger.info(f"Successfully processed task {task.id}")
-                    return True
-                else:
-                    logger.error(f"Failed to save article {task.id} to database")
-            else:
-                logger.error(f"Failed to scrape content for {task.id}")
+            if scraped_content.failure:
+                return self._fail_task(task, scraped_content.failure)
 
-            # If we reach here, something failed
-            failed_article = Article.from_task_with_error(
-                task, "Failed to scrape or save content"
-            )
-            self.db_handler.save_article(failed_article)
-            return False
+            if scraped_content.not_modified:
+                # Nothing to parse or write, just restart the recrawl window
+                self.not_modified_count += 1
+                TASKS_UNCHANGED_TOTAL.labels(task.source, "not_modified").inc()
+                self._complete_task(task, True, scraped_content.validators)
+                return True
+
+            # Save article (DBHandler will handle upsert automatically)
+            article = Article.from_task_and_content(task, scraped_content)
+            saved = self._save_article(article, task)
+            if saved is None:
+                return None
+            if saved:
+                logger.info(f"Successfully processed task {task.id}")
+                return True
+
+            logger.error(f"Failed to save article {task.id} to database")
+            return self._fail_task(task, FetchFailure(TRANSIENT, "Failed to save article"))
 
         except Exception as e:
             logger.error(f"Error processing task {task.id}: {e}")
-            failed_article = Article.from_task_with_error(task, str(e))
-            self.db_handler.save_article(failed_article)
+            return self._fail_task(task, FetchFailure(TRANSIENT, str(e)))
+
+    def _fail_task(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        """Put a failed task on the retry queue, or record the failure for good
+        once it is permanent or out of attempts. Always returns False."""
+        delay = self.retry_policy.delay(task, failure)
+        if delay is not None and self.redis_handler.schedule_retry(task, delay):
+            TASK_RETRIES_TOTAL.labels(task.source, failure.kind).inc()
             return False
 
+        if failure.kind != PERMANENT:
+            TASKS_DEAD_LETTERED_TOTAL.labels(task.source, failure.kind).inc()
+            self.redis_handler.dead_letter(task, failure)
+        self._save_article(self._failure_article(task, failure), task)
+        return False
+
+    def _defer_task(self, task: ArticleTask, wait: float) -> bool:
+        """Park a task of an open-circuit host until it may be tried, without using
+        up an attempt"""
+        if not self.redis_handler.schedule_retry(task, wait, count_attempt=False):
+            return False
+        TASKS_DEFERRED_TOTAL.labels(task.source).inc()
+        return True
+
+    def _save_article(self, article: Article, task: ArticleTask) -> Optional[bool]:
+        """Save directly, or buffer for the next bulk write when batching is enabled
+        and return None. The task is acknowledged once its article is actually stored."""
+        if not self.db_handler.bulk_enabled:
+            success = self.db_handler.save_article(article)
+            if success:
+                self._complete_task(
+                    task, article.status == "completed", article.fetch_validators()
+                )
+            return success
+
+        self.db_handler.buffer_article(article)
+        self._pending_acks.setdefault(article.url, []).append((task, article))
+        return None
+
+    def flush_articles(self, final: bool = False) -> None:
+        """Flush buffered articles, record failures for rejected documents, ack the
+        stored ones and retry the tasks of those given up on. Articles kept for another
+        flush keep their tasks pending, unless this is the `final` flush."""
+        pending_acks, self._pending_acks = self._pending_acks, {}
+        failed = self.db_handler.flush()
+
+        unsaved = [item for item in failed if item[0].status == "failed"]
+        for article in self._failure_articles(failed):
+            if not self.db_handler.save_article(article):
+                unsaved.append((article, article.error_message))
+        unsaved += self.db_handler.drain_unwritten(include_buffered=final)
+
+        self._settle_pending(pending_acks, unsaved)
+
+    def _settle_pending(
+        self,
+        pending_acks: Dict[str, List[Tuple[ArticleTask, Article]]],
+        unsaved: List[Tuple[Article, str]],
+    ) -> None:
+        """Ack tasks whose articles were stored and retry those whose articles were not"""
+        errors = {article.url: error for article, error in unsaved}
+        # Decided before failing tasks below buffer failure documents of their own
+        buffered = {url for url in pending_acks if self.db_handler.is_buffered(url)}
+        for url in buffered:
+            self._pending_acks[url] = pending_acks.pop(url) + self._pending_acks.get(url, [])
+        for url, entries in pending_acks.items():
+            for task, article in entries:
+                if url in errors:
+                    failure = FetchFailure(TRANSIENT, f"Failed to save article: {errors[url]}")
+                    self._fail_task(task, failure)
+                else:
+                    self._complete_task(
+                        task, article.status == "completed", article.fetch_validators()
+                    )
+                self._settle_result(task, url not in errors)
+
+    def _settle_result(self, task: ArticleTask, success: bool) -> None:
+        """Count a task whose outcome waited for its article to be written"""
+        seconds = self._unsettled_seconds.pop(id(task), None)
+        if seconds is not None:
+            self._record_result(task, success, seconds)
+
+    def _complete_task(
+        self,
+        task: ArticleTask,
+        scraped: bool,
+        validators: Optional[FetchValidators] = None,
+    ) -> None:
+        """Ack a finished task and remember when and how its URL was last fetched"""
+        self.redis_handler.ack_task(task)
+        self.dedup.task_done(task, scraped)
+        if validators:
+            self.validator_cache.put(task.url, validators)
+
+    def _reap_if_due(self) -> None:
+        """Periodically re-queue tasks abandoned by crashed consumers"""
+        if not self.redis_handler.config.reliable:
+            return
+        now = time.monotonic()
+        if now - self._last_reap >= self.redis_handler.config.reaper_interval:
+            self._last_reap = now
+            self.redis_handler.requeue_expired()
+
+    @staticmethod
+    def _failure_article(task: ArticleTask, failure: FetchFailure) -> Article:
+        return Article.from_task_with_error(task, f"{failure.kind}: {failure.error}")
+
+    def _promote_retries_if_due(self) -> None:
+        """Periodically move retries whose delay has passed back onto the queues"""
+        now = time.monotonic()
+        if now - self._last_promotion >= self.retry_policy.config.poll_interval:
+            self._last_promotion = now
+            self.redis_handler.promote_due_retries()
+
+    def _failure_articles(self, failed: List[Tuple[Article, str]]) -> List[Article]:
+        """Build failure documents for completed articles a bulk write rejected"""
+        fallbacks = []
+        for article, error_message in failed:
+            if article.status == "failed":
+                continue
+            task = ArticleTask(
+                id=article.id,
+                url=article.url,
+                source=article.source,
+                category=article.category,
+                priority=article.priority,
+            )
+            fallbacks.append(Article.from_task_with_error(task, error_message))
+        return fallbacks
+
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
         logger.info(f"Received signal {signum}, shutting down...")
@@ -91,6 +333,11 @@ class Consumer:
     def get_stats(self) -> dict:
         """Get consumer statistics"""
         db_stats = self.db_handler.get_stats()
-        queue_length = self.redis_handler.get_queue_length()
+        queue_lengths = self.redis_handler.get_queue_lengths()
 
-        return {"queue_length": queue_length, "database_stats": db_stats}
+        return {
+            "queue_length": sum(queue_lengths.values()),
+            "queue_lengths": queue_lengths,
+            "retry_queue": self.redis_handler.get_retry_lengths(),
+            "database_stats": db_stats,
+        }
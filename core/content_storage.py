@@ -0,0 +1,181 @@
+import hashlib
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Type
+from config.settings import MongoConfig
+from utils.logger import logger
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is used instead
+    zstandard = None
+
+# Bodies shorter than this are stored as text; compression would not pay for its header
+MIN_COMPRESSED_LENGTH = 64
+DEFAULT_DICTIONARY_SIZE = 64 * 1024
+
+
+class ContentCodec:
+    """Compresses article bodies; the plain codec stores them as text"""
+
+    name = "plain"
+
+    def __init__(self, level: int, dictionary: bytes = b""):
+        self.level = level
+        self.dictionary = dictionary
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(ContentCodec):
+    """zlib from the standard library, with the dictionary as preset window"""
+
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        if not self.dictionary:
+            return zlib.compress(data, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if not self.dictionary:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=self.dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+class ZstdCodec(ContentCodec):
+    """Zstandard; faster than zlib at a better ratio, and dictionaries help more"""
+
+    name = "zstd"
+
+    def __init__(self, level: int, dictionary: bytes = b""):
+        super().__init__(level, dictionary)
+        self._dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        # Compressors and decompressors are reused across calls but must not be shared
+        # by threads, e.g. API threads reading through the article cache: one per thread
+        self._local = threading.local()
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._dict_data)
+            self._local.compressor = compressor
+        return compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dict_data)
+            self._local.decompressor = decompressor
+        return decompressor.decompress(data)
+
+
+CODECS: Dict[str, Type[ContentCodec]] = {
+    ContentCodec.name: ContentCodec,
+    ZlibCodec.name: ZlibCodec,
+    ZstdCodec.name: ZstdCodec,
+}
+
+
+def get_codec(name: str, level: int = 3, dictionary: bytes = b"") -> ContentCodec:
+    """Codec by name, falling back to zlib when zstandard is unavailable"""
+    if name == ZstdCodec.name and zstandard is None:
+        logger.warning("zstandard is not installed, compressing article bodies with zlib")
+        name = ZlibCodec.name
+    if name not in CODECS:
+        logger.warning(f"Unknown content codec {name!r}, storing article bodies as text")
+        name = ContentCodec.name
+    if name == ZlibCodec.name:
+        level = max(0, min(level, 9))
+    return CODECS[name](level, dictionary)
+
+
+def dictionary_id(dictionary: bytes) -> str:
+    """Short stable id stored with each body compressed with a dictionary"""
+    return hashlib.blake2b(dictionary, digest_size=8).hexdigest()
+
+
+def train_dictionary(samples: List[str], size: int = DEFAULT_DICTIONARY_SIZE) -> bytes:
+    """Compression dictionary for article bodies like the samples.
+    Trained by zstandard when installed, otherwise the samples' text itself,
+    which zlib and zstd both accept as a raw dictionary."""
+    data = [sample.encode("utf-8") for sample in samples if sample]
+    if zstandard is not None:
+        try:
+            return zstandard.train_dictionary(size, data).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.warning(f"Dictionary training failed, using raw samples: {e}")
+    # zlib only looks at the last 32KB, so the samples nearest the end matter most
+    return b"".join(data)[-size:]
+
+
+class ContentStorage:
+    """Encodes article documents for MongoDB with one codec, and decodes any.
+
+    A compressed body replaces `content` with bytes and records the codec and
+    dictionary next to it, so documents written in different modes can share a
+    collection and are read back transparently.
+    """
+
+    def __init__(self, codec: ContentCodec):
+        self.codec = codec
+        self.dictionary_id = dictionary_id(codec.dictionary) if codec.dictionary else None
+        # (codec name, with dictionary) -> codec that reads such bodies
+        self._decoders: Dict[Tuple[str, bool], ContentCodec] = {
+            (codec.name, bool(codec.dictionary)): codec
+        }
+
+    @classmethod
+    def from_config(cls, config: MongoConfig) -> "ContentStorage":
+        dictionary = b""
+        if config.content_dictionary:
+            with open(config.content_dictionary, "rb") as file:
+                dictionary = file.read()
+        return cls(get_codec(config.content_codec, config.content_level, dictionary))
+
+    @property
+    def compressed(self) -> bool:
+        return self.codec.name != ContentCodec.name
+
+    def encode(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Document as stored, with its body compressed"""
+        content = doc.get("content")
+        if not self.compressed or not content or len(content) < MIN_COMPRESSED_LENGTH:
+            return doc
+        doc["content"] = self.codec.compress(content.encode("utf-8"))
+        doc["content_codec"] = self.codec.name
+        if self.dictionary_id:
+            doc["content_dictionary"] = self.dictionary_id
+        return doc
+
+    def decode(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Document with its body as text again, whatever codec stored it"""
+        name = doc.pop("content_codec", None)
+        used = doc.pop("content_dictionary", None)
+        if name is None:
+            return doc
+        if used is not None and used != self.dictionary_id:
+            raise ValueError(
+                f"Article body was compressed with dictionary {used}, "
+                f"but {self.dictionary_id} is loaded"
+            )
+        doc["content"] = self._decoder(name, used).decompress(doc["content"]).decode("utf-8")
+        return doc
+
+    def _decoder(self, name: str, used: Optional[str]) -> ContentCodec:
+        """Codec for bodies stored by `name`, with the loaded dictionary if one was used"""
+        key = (name, used is not None)
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            if name not in CODECS or (name == ZstdCodec.name and zstandard is None):
+                raise ValueError(f"Cannot decompress article body stored with {name!r}")
+            dictionary = self.codec.dictionary if used is not None else b""
+            decoder = CODECS[name](self.codec.level, dictionary)
+            self._decoders[key] = decoder
+        return decoder
@@ -1,15 +1,59 @@
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo import MongoClient, AsyncMongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from config.settings import MongoConfig
-from models.article import Article
+from core.article_cache import ArticleCache, AsyncArticleCache
+from core.content_storage import ContentStorage
+from models.article import Article, ScrapedContent
 from utils.logger import logger
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from utils.metrics import ARTICLES_UNCHANGED_TOTAL, DB_WRITE_SECONDS
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from datetime import datetime, timezone
+import asyncio
 import time
 
+# Compound index that lets the stats aggregation run as a covered index scan
+STATS_INDEX = [("status", 1), ("source", 1), ("category", 1)]
+STATS_INDEX_NAME = "status_1_source_1_category_1"
+STATS_PIPELINE = [
+    {"$group": {
+        "_id": {"status": "$status", "source": "$source", "category": "$category"},
+        "count": {"$sum": 1}
+    }}
+]
+STATUSES = ("completed", "failed", "pending")
+# Keyset order of exports; also serves get_recent_articles, scanned backwards
+CREATED_INDEX = [("created_at", 1), ("_id", 1)]
+CREATED_INDEX_NAME = "created_at_1__id_1"
+FINGERPRINT_PROJECTION = {"_id": 0, "url": 1, "fingerprint": 1}
+# Stored fields that decide whether, and how, a re-extracted page is written
+REEXTRACT_PROJECTION = {
+    "_id": 0, "id": 1, "url": 1, "source": 1, "category": 1, "priority": 1,
+    "status": 1, "content_hash": 1, "fingerprint": 1
+}
+# Set by ContentStorage.encode on compressed bodies only
+CODEC_FIELDS = ("content_codec", "content_dictionary")
+
+
+def _stored_time(moment: datetime) -> str:
+    """`moment` as created_at stores it; naive datetimes are taken to be UTC already"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat()
+
+
 class DBHandler:
-    def __init__(self, config: MongoConfig):
+    def __init__(self, config: MongoConfig, cache_client=None):
+        """`cache_client` is the Redis client of the shared article cache tier"""
         self.config = config
+        self._buffer: Dict[str, Article] = {}
+        self._buffer_started_at = 0.0
+        # Failed flushes in a row of buffered URLs, and articles given up after too many
+        self._flush_failures: Dict[str, int] = {}
+        self._unwritten: List[Tuple[Article, str]] = []
+        self._retry_at = 0.0
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self.content_storage = ContentStorage.from_config(config)
+        self.cache = ArticleCache(config, cache_client)
         max_retries = 5
         retry_delay = 1
         
@@ -31,9 +75,11 @@ class DBHandler:
                 
                 # Create index on URL for faster lookups and prevent duplicates
                 self.collection.create_index("url", unique=True)
+                self.collection.create_index(STATS_INDEX, name=STATS_INDEX_NAME)
+                self.collection.create_index(CREATED_INDEX, name=CREATED_INDEX_NAME)
                 logger.info(f"✅ Connected to MongoDB: {config.database}.{config.collection}")
                 break
-                
+            
             except Exception as e:
                 logger.warning(f"MongoDB connection attempt {attempt + 1} failed: {e}")
                 if attempt == max_retries - 1:
@@ -45,13 +91,19 @@ class DBHandler:
                 retry_delay *= 2
     
     def save_article(self, article: Article) -> bool:
-        """Save or update an article"""
+        """Save or update an article. A recrawl whose fingerprint matches the stored
+        copy only touches `last_seen_at`, or is not written at all"""
         try:
-            result = self.collection.replace_one(
-                {"url": article.url},  # Find by URL
-                article.to_dict(),     # Replace with new data
-                upsert=True           # Create if doesn't exist
-            )
+            unchanged = self._unchanged_filter(article)
+            if unchanged is not None and self._save_unchanged(article, unchanged):
+                return True
+            
+            with DB_WRITE_SECONDS.labels("save").time():
+                result = self.collection.replace_one(
+                    {"url": article.url},     # Find by URL
+                    self._document(article),  # Replace with new data
+                    upsert=True               # Create if doesn't exist
+                )
             
             if result.upserted_id:
                 logger.info(f"Inserted new article: {article.id}")
@@ -62,45 +114,314 @@ class DBHandler:
         except PyMongoError as e:
             logger.error(f"Failed to save article {article.id}: {e}")
             return False
+        finally:
+            self.cache.invalidate([article.url])
     
-    def get_article_by_url(self, url: str) -> Optional[Article]:
-        """Retrieve an article by URL"""
+    def _save_unchanged(self, article: Article, query: Dict[str, Any]) -> bool:
+        """Touch or skip the stored copy if it has the same fingerprint, True if it had"""
+        if self.config.unchanged_writes == "skip":
+            with DB_WRITE_SECONDS.labels("fingerprint").time():
+                found = self.collection.find_one(query, {"_id": 1}) is not None
+        else:
+            with DB_WRITE_SECONDS.labels("touch").time():
+                found = self.collection.update_one(query, self._touch(article)).matched_count > 0
+        if found:
+            self._count_unchanged(article)
+        return found
+    
+    @property
+    def detects_unchanged(self) -> bool:
+        """Whether recrawls with the stored fingerprint are written differently"""
+        return self.config.unchanged_writes in ("touch", "skip")
+    
+    def _unchanged_filter(self, article: Article) -> Optional[Dict[str, Any]]:
+        """Query for the stored copy of an article if it has the same content"""
+        if not self.detects_unchanged or article.status != "completed" or not article.fingerprint:
+            return None
+        return {"url": article.url, "status": "completed", "fingerprint": article.fingerprint}
+    
+    def _document(self, article: Article) -> Dict[str, Any]:
+        """Article as stored, with its body compressed in a compressed storage mode"""
+        return self.content_storage.encode(article.to_dict())
+    
+    def _article_from_doc(self, doc: Dict[str, Any]) -> Article:
+        """Article from a stored document, whichever mode wrote its body"""
+        return Article.from_dict(self.content_storage.decode(doc))
+    
+    def _touch(self, article: Article) -> Dict[str, Any]:
+        seen_at = article.last_seen_at or datetime.utcnow()
+        return {"$set": {"last_seen_at": seen_at.isoformat()}}
+    
+    def _count_unchanged(self, article: Article) -> None:
+        action = "skip" if self.config.unchanged_writes == "skip" else "touch"
+        ARTICLES_UNCHANGED_TOTAL.labels(action).inc()
+        logger.info(f"Content of article {article.id} unchanged ({action})")
+    
+    def get_fingerprints(self, urls: List[str]) -> Dict[str, str]:
+        """Stored fingerprints of completed articles, by URL, in one query"""
+        if not urls:
+            return {}
         try:
-            doc = self.collection.find_one({"url": url})
-            if doc:
-                # Remove MongoDB's _id field
-                doc.pop('_id', None)
-                
-                # Convert datetime strings back to datetime objects
-                if 'created_at' in doc and isinstance(doc['created_at'], str):
-                    doc['created_at'] = datetime.fromisoformat(doc['created_at'])
-                if 'scraped_at' in doc and isinstance(doc['scraped_at'], str):
-                    doc['scraped_at'] = datetime.fromisoformat(doc['scraped_at'])
-                
-                return Article(**doc)
+            docs = self.collection.find(
+                {"url": {"$in": urls}, "status": "completed"}, FINGERPRINT_PROJECTION
+            )
+            return {doc["url"]: doc.get("fingerprint") for doc in docs}
+        except PyMongoError as e:
+            logger.warning(f"Failed to prefetch fingerprints, writing all articles: {e}")
+            return {}
+    
+    @property
+    def bulk_enabled(self) -> bool:
+        """Whether writes should go through the write-behind buffer"""
+        return self.config.bulk_size > 1
+    
+    def buffer_article(self, article: Article) -> None:
+        """Queue an article upsert for the next bulk flush"""
+        if not self._buffer:
+            self._buffer_started_at = time.monotonic()
+        # Later writes for the same URL supersede earlier ones, as replace_one would
+        self._buffer.pop(article.url, None)
+        self._buffer[article.url] = article
+    
+    def buffer_is_due(self) -> bool:
+        """Whether the buffer reached its size or age threshold. After a failed flush
+        the next one waits for `bulk_flush_interval`."""
+        if not self._buffer or time.monotonic() < self._retry_at:
+            return False
+        if len(self._buffer) >= self.config.bulk_size:
+            return True
+        return time.monotonic() - self._buffer_started_at >= self.config.bulk_flush_interval
+    
+    def is_buffered(self, url: str) -> bool:
+        """Whether an article of `url` waits for a flush"""
+        return url in self._buffer
+    
+    def flush(self) -> List[Tuple[Article, str]]:
+        """Write buffered upserts as one unordered bulk_write, returns the articles it
+        rejected. Articles of a write that was not acknowledged stay buffered."""
+        articles = self._take_buffer()
+        known = self.get_fingerprints(self._prefetch_urls(articles))
+        articles, operations = self._bulk_operations(articles, known)
+        if not operations:
+            return []
+        
+        try:
+            with DB_WRITE_SECONDS.labels("bulk").time():
+                result = self.collection.bulk_write(operations, ordered=False)
+            self._log_bulk_result(len(operations), result.upserted_count, result.modified_count)
+            self._forget_failures(articles)
+            return []
+        except PyMongoError as e:
+            return self._collect_write_errors(articles, e)
+        finally:
+            self.cache.invalidate([article.url for article in articles])
+    
+    def _take_buffer(self) -> List[Article]:
+        """Empty the buffer"""
+        articles = list(self._buffer.values())
+        self._buffer = {}
+        return articles
+    
+    def _retain(self, articles: List[Article], error: str) -> None:
+        """Buffer the articles of an unacknowledged flush again, giving up on those
+        that failed more than `flush_retries` flushes in a row"""
+        self._retry_at = time.monotonic() + self.config.bulk_flush_interval
+        for article in articles:
+            failures = self._flush_failures.pop(article.url, 0) + 1
+            if article.url in self._buffer:
+                # Superseded by a newer article buffered during the flush
+                continue
+            if failures > self.config.flush_retries:
+                logger.error(f"Giving up on article {article.id} after {failures} failed flushes")
+                self._unwritten.append((article, error))
+                continue
+            self._flush_failures[article.url] = failures
+            self.buffer_article(article)
+    
+    def _forget_failures(self, articles: List[Article]) -> None:
+        for article in articles:
+            self._flush_failures.pop(article.url, None)
+    
+    def drain_unwritten(self, include_buffered: bool = False) -> List[Tuple[Article, str]]:
+        """Take the articles given up on, and with `include_buffered` every buffered
+        article as well, e.g. on shutdown"""
+        unwritten, self._unwritten = self._unwritten, []
+        if include_buffered:
+            unwritten += [(article, "not flushed in time") for article in self._take_buffer()]
+            self._flush_failures = {}
+        return unwritten
+    
+    def _prefetch_urls(self, articles: List[Article]) -> List[str]:
+        """URLs whose stored fingerprints decide how a flush writes them"""
+        if not self.config.prefetch_fingerprints:
+            return []
+        return [article.url for article in articles if self._unchanged_filter(article)]
+    
+    def _bulk_operations(
+        self, articles: List[Article], known: Dict[str, str]
+    ) -> Tuple[List[Article], List[Any]]:
+        """Bulk operations and the articles they write, in the same order.
+        Unchanged articles become a small update, or are left out entirely."""
+        written, operations = [], []
+        for article in articles:
+            unchanged = self._unchanged_filter(article)
+            if unchanged is not None and known.get(article.url) == article.fingerprint:
+                self._count_unchanged(article)
+                if self.config.unchanged_writes == "skip":
+                    continue
+                operation = UpdateOne(unchanged, self._touch(article))
+            else:
+                operation = ReplaceOne({"url": article.url}, self._document(article), upsert=True)
+            written.append(article)
+            operations.append(operation)
+        return written, operations
+    
+    def _log_bulk_result(self, count: int, inserted: int, updated: int) -> None:
+        logger.info(f"Bulk saved {count} articles ({inserted} inserted, {updated} updated)")
+    
+    def _collect_write_errors(
+        self, articles: List[Article], error: PyMongoError
+    ) -> List[Tuple[Article, str]]:
+        """Map a bulk write failure back to the articles it affected"""
+        if not isinstance(error, BulkWriteError):
+            # Nothing was acknowledged, e.g. the connection dropped
+            logger.error(f"Bulk save of {len(articles)} articles failed: {error}")
+            self._retain(articles, str(error))
+            return []
+        
+        self._forget_failures(articles)
+        failed = []
+        for write_error in error.details.get("writeErrors", []):
+            article = articles[write_error["index"]]
+            message = write_error.get("errmsg", "unknown write error")
+            logger.error(f"Failed to save article {article.id}: {message}")
+            failed.append((article, message))
+        
+        details = error.details
+        self._log_bulk_result(
+            len(articles) - len(failed), details.get("nUpserted", 0), details.get("nModified", 0)
+        )
+        return failed
+    
+    def update_extracted(self, pages: Dict[str, ScrapedContent]) -> int:
+        """Rewrite title and content of stored articles from pages extracted again, by URL,
+        in one bulk write. Returns how many articles were rewritten.
+        
+        An article is left alone if its content did not change, or if it was last
+        scraped from a different body than the one extracted (content_hash)."""
+        if not pages:
+            return 0
+        try:
+            docs = self.collection.find({"url": {"$in": list(pages)}}, REEXTRACT_PROJECTION)
+            operations, urls = [], []
+            for doc in docs:
+                operation = self._extracted_update(doc, pages[doc["url"]])
+                if operation is not None:
+                    operations.append(operation)
+                    urls.append(doc["url"])
+            if not operations:
+                return 0
+            with DB_WRITE_SECONDS.labels("reextract").time():
+                result = self.collection.bulk_write(operations, ordered=False)
+            self.cache.invalidate(urls)
+            logger.info(f"Re-extracted {len(operations)} of {len(pages)} articles")
+            return result.modified_count
+        except PyMongoError as e:
+            logger.error(f"Failed to update {len(pages)} re-extracted articles: {e}")
+            return 0
+    
+    def _extracted_update(self, doc: Dict[str, Any], page: ScrapedContent) -> Optional[UpdateOne]:
+        """Update of a stored article to a page's new title and content, if it needs one"""
+        content_hash = page.validators.content_hash if page.validators else None
+        if doc.get("content_hash") not in (None, content_hash):
             return None
-        except Exception as e:
-            logger.error(f"Failed to get article by URL {url}: {e}")
+        
+        article = Article.from_dict(doc)
+        article.title = page.title
+        article.content = page.content
+        fingerprint = article.content_fingerprint()
+        if doc.get("status") == "completed" and doc.get("fingerprint") == fingerprint:
             return None
+        
+        fields = self.content_storage.encode({"content": page.content})
+        fields.update(
+            title=page.title,
+            status="completed",
+            error_message=None,
+            fingerprint=fingerprint,
+            content_hash=content_hash,
+            scraped_at=page.scraped_at.isoformat()
+        )
+        update: Dict[str, Any] = {"$set": fields}
+        stale = [name for name in CODEC_FIELDS if name not in fields]
+        if stale:
+            update["$unset"] = {name: "" for name in stale}
+        return UpdateOne({"url": doc["url"]}, update)
+    
+    def get_article_by_url(self, url: str) -> Optional[Article]:
+        """Retrieve an article by URL, from the article cache if it holds it"""
+        return self.get_articles_by_urls([url]).get(url)
+    
+    def get_articles_by_urls(self, urls: List[str]) -> Dict[str, Article]:
+        """Stored articles by URL, without the URLs that have none. Articles the cache
+        does not hold are read with a single `$in` query and cached."""
+        found, missing = self.cache.get_many(list(dict.fromkeys(urls)))
+        if not missing:
+            return found
+        try:
+            docs = self.collection.find({"url": {"$in": missing}})
+            loaded = {doc["url"]: self._article_from_doc(doc) for doc in docs}
+        except Exception as e:
+            logger.error(f"Failed to get {len(missing)} articles by URL: {e}")
+            return found
+        self.cache.put_many(loaded.values())
+        found.update(loaded)
+        return found
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get database statistics"""
+        """Get database statistics, broken down by source and category.
+        Computed by one aggregation and cached for `stats_cache_ttl` seconds."""
+        cached = self._cached_stats()
+        if cached is not None:
+            return cached
         try:
-            total_count = self.collection.count_documents({})
-            completed_count = self.collection.count_documents({"status": "completed"})
-            failed_count = self.collection.count_documents({"status": "failed"})
-            pending_count = self.collection.count_documents({"status": "pending"})
-            
-            return {
-                "total_articles": total_count,
-                "completed": completed_count,
-                "failed": failed_count,
-                "pending": pending_count
-            }
+            rows = self.collection.aggregate(STATS_PIPELINE, hint=STATS_INDEX_NAME)
+            return self._cache_stats(self._summarize_stats(rows))
         except Exception as e:
             logger.error(f"Failed to get database stats: {e}")
             return {}
     
+    def _cached_stats(self) -> Optional[Dict[str, Any]]:
+        if self._stats_cache and time.monotonic() < self._stats_cache[0]:
+            return self._stats_cache[1]
+        return None
+    
+    def _cache_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        if self.config.stats_cache_ttl > 0:
+            self._stats_cache = (time.monotonic() + self.config.stats_cache_ttl, stats)
+        return stats
+    
+    def _summarize_stats(self, rows) -> Dict[str, Any]:
+        """Fold (status, source, category) counts into totals and breakdowns"""
+        stats: Dict[str, Any] = {"total_articles": 0}
+        stats.update({status: 0 for status in STATUSES})
+        by_source: Dict[str, Dict[str, int]] = {}
+        by_category: Dict[str, Dict[str, int]] = {}
+        
+        for row in rows:
+            group, count = row["_id"], row["count"]
+            status = str(group.get("status"))
+            stats["total_articles"] += count
+            if status in STATUSES:
+                stats[status] += count
+            for breakdown, field in ((by_source, "source"), (by_category, "category")):
+                counts = breakdown.setdefault(str(group.get(field)), {})
+                counts[status] = counts.get(status, 0) + count
+        
+        stats["by_source"] = by_source
+        stats["by_category"] = by_category
+        return stats
+    
     def get_recent_articles(self, limit: int = 10) -> List[Article]:
         """Get recent articles"""
         try:
@@ -108,16 +429,246 @@ class DBHandler:
             articles = []
             
             for doc in docs:
-                doc.pop('_id', None)
-                # Convert datetime strings back to datetime objects
-                if 'created_at' in doc and isinstance(doc['created_at'], str):
-                    doc['created_at'] = datetime.fromisoformat(doc['created_at'])
-                if 'scraped_at' in doc and isinstance(doc['scraped_at'], str):
-                    doc['scraped_at'] = datetime.fromisoformat(doc['scraped_at'])
-                
-                articles.append(Article(**doc))
+                articles.append(self._article_from_doc(doc))
             
             return articles
         except Exception as e:
             logger.error(f"Failed to get recent articles: {e}")
             return []
+    
+    def iter_articles(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        sources: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+        page_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """Stored articles created in [since, until), oldest first, as plain documents with
+        only `fields` if given. Fetched one page at a time, so memory stays flat
+        however many match.
+        
+        Every page resumes after the (created_at, _id) key of the last document rather
+        than skipping over what was read, so each one is a range scan of CREATED_INDEX.
+        Errors are raised: an export must not end early without saying so."""
+        query = self._export_filter(since, until, sources, categories, statuses)
+        projection = self._export_projection(fields)
+        page_query = query
+        while True:
+            docs = list(self.collection.find(
+                page_query,
+                projection,
+                sort=CREATED_INDEX,
+                limit=page_size,
+                hint=CREATED_INDEX_NAME
+            ))
+            if not docs:
+                return
+            last = docs[-1]
+            page_query = self._after(query, last["created_at"], last["_id"])
+            for doc in docs:
+                yield self._export_doc(doc, fields)
+            if len(docs) < page_size:
+                return
+    
+    @staticmethod
+    def _export_filter(
+        since: Optional[datetime],
+        until: Optional[datetime],
+        sources: Optional[List[str]],
+        categories: Optional[List[str]],
+        statuses: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        created: Dict[str, Any] = {}
+        # created_at is stored as naive UTC ISO text, which sorts chronologically
+        if since is not None:
+            created["$gte"] = _stored_time(since)
+        if until is not None:
+            created["$lt"] = _stored_time(until)
+        if created:
+            query["created_at"] = created
+        for field, values in (("source", sources), ("category", categories), ("status", statuses)):
+            if values:
+                query[field] = {"$in": list(values)}
+        return query
+    
+    @staticmethod
+    def _after(query: Dict[str, Any], created_at: str, last_id: Any) -> Dict[str, Any]:
+        """`query` narrowed to keys after (created_at, last_id)"""
+        created = dict(query.get("created_at", {}), **{"$gte": created_at})
+        after = {"$or": [{"created_at": {"$gt": created_at}}, {"_id": {"$gt": last_id}}]}
+        return dict(query, created_at=created, **after)
+    
+    @staticmethod
+    def _export_projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        """Projection of `fields` plus what paging and decoding the body need"""
+        if not fields:
+            return None
+        projection = dict.fromkeys(fields, 1)
+        projection.update({"_id": 1, "created_at": 1})
+        if "content" in projection:
+            projection.update(dict.fromkeys(CODEC_FIELDS, 1))
+        return projection
+    
+    def _export_doc(self, doc: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        doc.pop("_id", None)
+        if fields and "created_at" not in fields:
+            doc.pop("created_at", None)
+        return self.content_storage.decode(doc)
+
+
+class AsyncDBHandler(DBHandler):
+    """asyncio counterpart of DBHandler used by the async consumer"""
+    
+    def __init__(self, config: MongoConfig, cache_client=None):
+        self.config = config
+        self._buffer: Dict[str, Article] = {}
+        self._buffer_started_at = 0.0
+        # Failed flushes in a row of buffered URLs, and articles given up after too many
+        self._flush_failures: Dict[str, int] = {}
+        self._unwritten: List[Tuple[Article, str]] = []
+        self._retry_at = 0.0
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self.content_storage = ContentStorage.from_config(config)
+        self.cache = AsyncArticleCache(config, cache_client)
+        self.client = AsyncMongoClient(
+            config.uri,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=5000,
+            socketTimeoutMS=5000
+        )
+        self.db = self.client[config.database]
+        self.collection = self.db[config.collection]
+    
+    async def connect(self) -> None:
+        """Test the connection and ensure indexes"""
+        max_retries = 5
+        retry_delay = 1
+        
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"Attempting MongoDB connection (attempt {attempt + 1}/{max_retries})")
+                await self.client.admin.command('ping')
+                await self.collection.create_index("url", unique=True)
+                await self.collection.create_index(STATS_INDEX, name=STATS_INDEX_NAME)
+                await self.collection.create_index(CREATED_INDEX, name=CREATED_INDEX_NAME)
+                logger.info(f"✅ Connected to MongoDB: {self.config.database}.{self.config.collection}")
+                return
+            except Exception as e:
+                logger.warning(f"MongoDB connection attempt {attempt + 1} failed: {e}")
+                if attempt == max_retries - 1:
+                    logger.error(f"❌ Failed to connect to MongoDB after {max_retries} attempts: {e}")
+                    raise
+                
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2
+    
+    async def close(self) -> None:
+        """Close pooled connections"""
+        await self.client.close()
+    
+    async def save_article(self, article: Article) -> bool:
+        """Save or update an article, touching or skipping unchanged recrawls"""
+        try:
+            unchanged = self._unchanged_filter(article)
+            if unchanged is not None and await self._save_unchanged(article, unchanged):
+                return True
+            
+            with DB_WRITE_SECONDS.labels("save").time():
+                result = await self.collection.replace_one(
+                    {"url": article.url},
+                    self._document(article),
+                    upsert=True
+                )
+            
+            if result.upserted_id:
+                logger.info(f"Inserted new article: {article.id}")
+            else:
+                logger.info(f"Updated existing article: {article.id}")
+            
+            return True
+        except PyMongoError as e:
+            logger.error(f"Failed to save article {article.id}: {e}")
+            return False
+        finally:
+            await self.cache.invalidate([article.url])
+    
+    async def _save_unchanged(self, article: Article, query: Dict[str, Any]) -> bool:
+        if self.config.unchanged_writes == "skip":
+            with DB_WRITE_SECONDS.labels("fingerprint").time():
+                found = await self.collection.find_one(query, {"_id": 1}) is not None
+        else:
+            with DB_WRITE_SECONDS.labels("touch").time():
+                result = await self.collection.update_one(query, self._touch(article))
+            found = result.matched_count > 0
+        if found:
+            self._count_unchanged(article)
+        return found
+    
+    async def get_article_by_url(self, url: str) -> Optional[Article]:
+        """Retrieve an article by URL, from the article cache if it holds it"""
+        return (await self.get_articles_by_urls([url])).get(url)
+    
+    async def get_articles_by_urls(self, urls: List[str]) -> Dict[str, Article]:
+        """Stored articles by URL, reading those not cached with a single `$in` query"""
+        found, missing = await self.cache.get_many(list(dict.fromkeys(urls)))
+        if not missing:
+            return found
+        try:
+            cursor = self.collection.find({"url": {"$in": missing}})
+            loaded = {doc["url"]: self._article_from_doc(doc) async for doc in cursor}
+        except Exception as e:
+            logger.error(f"Failed to get {len(missing)} articles by URL: {e}")
+            return found
+        await self.cache.put_many(loaded.values())
+        found.update(loaded)
+        return found
+    
+    async def get_fingerprints(self, urls: List[str]) -> Dict[str, str]:
+        """Stored fingerprints of completed articles, by URL, in one query"""
+        if not urls:
+            return {}
+        try:
+            cursor = self.collection.find(
+                {"url": {"$in": urls}, "status": "completed"}, FINGERPRINT_PROJECTION
+            )
+            return {doc["url"]: doc.get("fingerprint") async for doc in cursor}
+        except PyMongoError as e:
+            logger.warning(f"Failed to prefetch fingerprints, writing all articles: {e}")
+            return {}
+    
+    async def flush(self) -> List[Tuple[Article, str]]:
+        """Write buffered upserts as one unordered bulk_write, returns the articles it
+        rejected. Articles of a write that was not acknowledged stay buffered."""
+        # Take the buffer before the first await so concurrent saves start a new one
+        articles = self._take_buffer()
+        known = await self.get_fingerprints(self._prefetch_urls(articles))
+        articles, operations = self._bulk_operations(articles, known)
+        if not operations:
+            return []
+        
+        try:
+            with DB_WRITE_SECONDS.labels("bulk").time():
+                result = await self.collection.bulk_write(operations, ordered=False)
+            self._log_bulk_result(len(operations), result.upserted_count, result.modified_count)
+            self._forget_failures(articles)
+            return []
+        except PyMongoError as e:
+            return self._collect_write_errors(articles, e)
+        finally:
+            await self.cache.invalidate([article.url for article in articles])
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get database statistics, broken down by source and category"""
+        cached = self._cached_stats()
+        if cached is not None:
+            return cached
+        try:
+            cursor = await self.collection.aggregate(STATS_PIPELINE, hint=STATS_INDEX_NAME)
+            return self._cache_stats(self._summarize_stats(await cursor.to_list(None)))
+        except Exception as e:
+            logger.error(f"Failed to get database stats: {e}")
+            return {}
@@ -0,0 +1,198 @@
+import math
+import time
+from typing import List, Tuple
+from config.settings import DedupConfig
+from models.article import DEFAULT_PRIORITY, ArticleTask
+from utils.logger import logger
+from utils.urls import url_digest
+
+# Redis strings top out at 512MB, i.e. 2^32 addressable bits
+MAX_BLOOM_BITS = 2 ** 32 - 1
+
+
+class DedupIndex:
+    """Tracks which URLs are already queued or were scraped recently.
+
+    The "exact" backend keeps one expiring key per URL; the "bloom" backend keeps
+    time-bucketed Bloom filters that cost a few bits per URL for very large seed
+    sets, at the price of rare false positives. Entries live one to two TTLs there.
+    Bits cannot be taken out of a filter, so released claims are kept in a small
+    exact set instead, which claim checks before trusting the queued filter.
+    """
+
+    def __init__(self, client, config: DedupConfig, prefix: str):
+        self.client = client
+        self.config = config
+        self.prefix = f"{prefix}:dedup"
+
+        if self.config.backend == "bloom":
+            capacity = max(1, config.bloom_capacity)
+            bits = -capacity * math.log(config.bloom_error_rate) / math.log(2) ** 2
+            self.num_bits = min(MAX_BLOOM_BITS, int(math.ceil(bits)))
+            self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.backend in ("exact", "bloom")
+
+    def claim(self, tasks: List[ArticleTask]) -> List[ArticleTask]:
+        """Mark tasks as queued, returning only those that were not queued already"""
+        if not self.enabled or not tasks:
+            return tasks
+        pipe = self.client.pipeline(transaction=False)
+        self._claim_commands(pipe, tasks)
+        new_tasks, reclaimed = self._claimed(tasks, pipe.execute())
+        if reclaimed:
+            self.client.srem(self._released_key, *reclaimed)
+        return new_tasks
+
+    def release(self, tasks: List[ArticleTask]) -> None:
+        """Forget queued markers, e.g. when pushing the tasks failed"""
+        if not self.enabled or not tasks:
+            return
+        if self.config.backend == "exact":
+            self.client.delete(*{self._key("queued", task.url) for task in tasks})
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(self._released_key, *{url_digest(task.url).hex() for task in tasks})
+        # As long as the queued filter that holds them
+        pipe.expire(self._released_key, 2 * self.config.queued_ttl)
+        pipe.execute()
+
+    def is_fresh(self, task: ArticleTask) -> bool:
+        """Whether the task's URL was scraped within its recrawl window"""
+        if not self.enabled:
+            return False
+        pipe = self.client.pipeline(transaction=False)
+        self._fresh_commands(pipe, task)
+        return self._is_fresh(pipe.execute())
+
+    def task_done(self, task: ArticleTask, scraped: bool) -> None:
+        """Clear the queued marker and, for scraped pages, start the recrawl window"""
+        if not self.enabled:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        self._done_commands(pipe, task, scraped)
+        pipe.execute()
+
+    def _claim_commands(self, pipe, tasks: List[ArticleTask]) -> None:
+        for task in tasks:
+            if self.config.backend == "exact":
+                pipe.set(self._key("queued", task.url), 1, nx=True, ex=self.config.queued_ttl)
+            else:
+                self._bloom_commands(pipe, "queued", self.config.queued_ttl, task.url, add=True)
+        if self.config.backend == "bloom":
+            pipe.smismember(self._released_key, [url_digest(task.url).hex() for task in tasks])
+
+    def _claimed(
+        self, tasks: List[ArticleTask], results: list
+    ) -> Tuple[List[ArticleTask], List[str]]:
+        """Tasks that were not queued yet, and the released claims they take back"""
+        if self.config.backend == "exact":
+            new_tasks = [task for task, created in zip(tasks, results) if created]
+            return self._log_skipped(tasks, new_tasks), []
+
+        released = results.pop()
+        step = len(results) // len(tasks)
+        new_tasks, reclaimed = [], []
+        for i, task in enumerate(tasks):
+            if not released[i]:
+                if not self._bloom_contains(results[i * step:(i + 1) * step]):
+                    new_tasks.append(task)
+                continue
+            digest = url_digest(task.url).hex()
+            if digest not in reclaimed:
+                new_tasks.append(task)
+                reclaimed.append(digest)
+        return self._log_skipped(tasks, new_tasks), reclaimed
+
+    @staticmethod
+    def _log_skipped(tasks: List[ArticleTask], new_tasks: List[ArticleTask]) -> List[ArticleTask]:
+        skipped = len(tasks) - len(new_tasks)
+        if skipped:
+            logger.debug(f"Skipped {skipped} already queued URLs")
+        return new_tasks
+
+    def _fresh_commands(self, pipe, task: ArticleTask) -> None:
+        if self.config.backend == "exact":
+            pipe.exists(self._key("fresh", task.url))
+        else:
+            name, ttl = self._fresh_filter(task)
+            self._bloom_commands(pipe, name, ttl, task.url, add=False)
+
+    def _is_fresh(self, results: list) -> bool:
+        if self.config.backend == "exact":
+            return bool(results[0])
+        return self._bloom_contains(results)
+
+    def _done_commands(self, pipe, task: ArticleTask, scraped: bool) -> None:
+        if self.config.backend == "exact":
+            pipe.delete(self._key("queued", task.url))
+            if scraped:
+                pipe.set(self._key("fresh", task.url), 1, ex=self._recrawl_ttl(task))
+        elif scraped:
+            name, ttl = self._fresh_filter(task)
+            self._bloom_commands(pipe, name, ttl, task.url, add=True)
+
+    def _recrawl_ttl(self, task: ArticleTask) -> int:
+        ttls = self.config.recrawl_ttls
+        return ttls.get(task.priority, ttls.get(DEFAULT_PRIORITY, 3600))
+
+    def _fresh_filter(self, task: ArticleTask):
+        """Each recrawl TTL gets its own filter so its buckets rotate at that pace"""
+        ttl = self._recrawl_ttl(task)
+        return f"fresh:{ttl}", ttl
+
+    @property
+    def _released_key(self) -> str:
+        """Digests of URLs whose bloom claim was released"""
+        return f"{self.prefix}:bloom:released"
+
+    def _key(self, kind: str, url: str) -> str:
+        return f"{self.prefix}:{kind}:{url_digest(url).hex()}"
+
+    def _bloom_commands(self, pipe, name: str, ttl: int, url: str, add: bool) -> None:
+        """Queue BITFIELD calls on the current and previous bucket of a filter"""
+        digest = url_digest(url)
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        offsets = [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+        bucket = int(time.time() // ttl)
+        current = f"{self.prefix}:bloom:{name}:{bucket}"
+        previous = f"{self.prefix}:bloom:{name}:{bucket - 1}"
+        op = ["SET", "u1", None, 1] if add else ["GET", "u1", None]
+
+        for key in (current, previous):
+            args = []
+            for offset in offsets:
+                op[2] = offset
+                args.extend(op)
+            pipe.execute_command("BITFIELD", key, *args)
+            # SET returns previous bits, so the add doubles as the membership test
+            op = ["GET", "u1", None]
+        if add:
+            pipe.expire(current, 2 * ttl)
+
+    def _bloom_contains(self, results: list) -> bool:
+        """A URL is present if every bit is set in either bucket"""
+        current_bits, previous_bits = results[0], results[1]
+        return all(current_bits) or all(previous_bits)
+
+
+class AsyncDedupIndex(DedupIndex):
+    """asyncio counterpart of DedupIndex for the async consumer"""
+
+    async def is_fresh(self, task: ArticleTask) -> bool:
+        if not self.enabled:
+            return False
+        pipe = self.client.pipeline(transaction=False)
+        self._fresh_commands(pipe, task)
+        return self._is_fresh(await pipe.execute())
+
+    async def task_done(self, task: ArticleTask, scraped: bool) -> None:
+        if not self.enabled:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        self._done_commands(pipe, task, scraped)
+        await pipe.execute()
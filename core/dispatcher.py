@@ -0,0 +1,57 @@
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+from core.rate_limiter import HostRateLimiter
+from models.article import ArticleTask
+from utils.urls import get_host
+
+
+class HostDispatcher:
+    """Bounded window of popped tasks, handed out from hosts that may be fetched now"""
+
+    def __init__(self, rate_limiter: HostRateLimiter, window: int):
+        self.rate_limiter = rate_limiter
+        self.window = max(1, window)
+        self._by_host: "OrderedDict[str, Deque[ArticleTask]]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_full(self) -> bool:
+        return self._size >= self.window
+
+    def free_slots(self) -> int:
+        return max(0, self.window - self._size)
+
+    def add(self, task: ArticleTask) -> None:
+        """Add a popped task to the window"""
+        self._by_host.setdefault(get_host(task.url), deque()).append(task)
+        self._size += 1
+
+    def next_ready(self) -> Optional[ArticleTask]:
+        """Next task whose host is not rate limited, rotating fairly between hosts"""
+        for host in list(self._by_host):
+            if self.rate_limiter.ready_in(host) > 0:
+                continue
+
+            tasks = self._by_host.pop(host)
+            task = tasks.popleft()
+            if tasks:
+                # Move the host to the back so other hosts get a turn
+                self._by_host[host] = tasks
+            self._size -= 1
+            return task
+        return None
+
+    def wait_time(self) -> float:
+        """Seconds until some buffered host becomes ready"""
+        if not self._by_host:
+            return 0.0
+        return min(self.rate_limiter.ready_in(host) for host in self._by_host)
+
+    def drain(self) -> List[ArticleTask]:
+        """Remove and return every buffered task"""
+        tasks = [task for host_tasks in self._by_host.values() for task in host_tasks]
+        self._by_host.clear()
+        self._size = 0
+        return tasks
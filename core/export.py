@@ -0,0 +1,59 @@
+import gzip
+import json
+import sys
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+from core.db_handler import DBHandler
+from utils.logger import logger, logs_to_stderr
+
+# Lines written between progress reports
+PROGRESS_EVERY = 100_000
+# gzip's own default; gzip.open's 9 costs several times the CPU for a few percent
+GZIP_LEVEL = 6
+
+
+@contextmanager
+def open_output(path: str, compress: Optional[bool] = None) -> Iterator[TextIO]:
+    """Text stream for an export: "-" is stdout, and a path ending in .gz (or
+    `compress`) is gzipped"""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path == "-" and not compress:
+        yield sys.stdout
+        return
+    if compress:
+        target = sys.stdout.buffer if path == "-" else path
+        file = gzip.open(target, "wt", compresslevel=GZIP_LEVEL, encoding="utf-8")
+    else:
+        file = open(path, "w", encoding="utf-8")
+    with file:
+        yield file
+
+
+def write_jsonl(docs: Iterable[Dict[str, Any]], output: TextIO) -> int:
+    """Write documents as JSON lines, returns how many"""
+    count = 0
+    for doc in docs:
+        output.write(json.dumps(doc, ensure_ascii=False, default=str))
+        output.write("\n")
+        count += 1
+        if count % PROGRESS_EVERY == 0:
+            logger.info(f"Exported {count} articles")
+    return count
+
+
+def export_articles(
+    db_handler: DBHandler,
+    path: str,
+    compress: Optional[bool] = None,
+    page_size: int = 1000,
+    **filters: Any
+) -> int:
+    """Stream the articles matching `filters` (see DBHandler.iter_articles) to `path`
+    as JSON lines; returns how many were written"""
+    # Log records would otherwise end up between the exported lines
+    with logs_to_stderr() if path == "-" else nullcontext():
+        with open_output(path, compress) as output:
+            count = write_jsonl(db_handler.iter_articles(page_size=page_size, **filters), output)
+        logger.info(f"Exported {count} articles to {path}")
+    return count
@@ -0,0 +1,365 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector, UnicodeDammit
+from utils.logger import logger
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+NO_TITLE = "No Title Found"
+NO_CONTENT = "No content found"
+# Default cut for extracted content; shorter candidates are skipped
+MAX_CONTENT_LENGTH = 2000
+MIN_CONTENT_LENGTH = 100
+
+# Article containers, tried in order; the first element matching each one is used
+CONTENT_SELECTORS = [
+    'article',
+    '[class*="content"]',
+    '[class*="article"]',
+    '[class*="post"]',
+    'main',
+    '.entry-content',
+    '#content'
+]
+
+
+class Extractor:
+    """Pulls the title and main text out of an HTML page"""
+
+    name = ""
+
+    def __init__(self, max_length: int = MAX_CONTENT_LENGTH):
+        # Content is cut to this many characters; 0 keeps the full text
+        self.max_length = max_length
+
+    def extract(self, html: bytes, url: str) -> Tuple[str, str]:
+        """Return (title, content), with placeholders for whatever was not found"""
+        raise NotImplementedError
+
+    def _finish(
+        self, title: Optional[str], content: Optional[str], url: str
+    ) -> Tuple[str, str]:
+        if not title:
+            logger.warning(f"Could not extract title from {url}")
+            title = NO_TITLE
+        if content is None:
+            logger.warning("Could not extract meaningful content")
+            content = NO_CONTENT
+        return title, content
+
+    def _cut(self, content: str) -> str:
+        return content[:self.max_length] if self.max_length else content
+
+    def incremental(self, head: bytes) -> Optional["IncrementalParse"]:
+        """Parser fed block by block, given the first block; None if unsupported"""
+        return None
+
+
+class BeautifulSoupExtractor(Extractor):
+    """Reference extractor: CSS selectors over a BeautifulSoup html.parser tree"""
+
+    name = "bs4"
+
+    def extract(self, html: bytes, url: str) -> Tuple[str, str]:
+        soup = BeautifulSoup(html, 'html.parser')
+        title = self._extract_title(soup)
+        return self._finish(title, self._extract_content(soup), url)
+
+    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
+        """Extract title using multiple strategies"""
+        # Strategy 1: <title> tag
+        title_tag = soup.find('title')
+        if title_tag and title_tag.string:
+            title = title_tag.string.strip()
+            if title:
+                return title
+
+        # Strategy 2: h1 tag
+        h1_tag = soup.find('h1')
+        if h1_tag and h1_tag.get_text():
+            title = h1_tag.get_text().strip()
+            if title:
+                return title
+
+        # Strategy 3: og:title meta tag
+        og_title = soup.find('meta', property='og:title')
+        if og_title and og_title.get('content'):
+            title = og_title['content'].strip()
+            if title:
+                return title
+
+        return None
+
+    def _extract_content(self, soup: BeautifulSoup) -> Optional[str]:
+        """Extract main content using multiple strategies"""
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+
+        # Strategy 1: Look for common article containers
+        for selector in CONTENT_SELECTORS:
+            elements = soup.select(selector)
+            if elements:
+                content = elements[0].get_text(strip=True)
+                if len(content) > MIN_CONTENT_LENGTH:
+                    return self._cut(content)
+
+        # Strategy 2: Get all paragraph text
+        paragraphs = soup.find_all('p')
+        if paragraphs:
+            content = ' '.join([p.get_text(strip=True) for p in paragraphs])
+            if len(content) > MIN_CONTENT_LENGTH:
+                return self._cut(content)
+
+        # Strategy 3: Get body text as fallback
+        body = soup.find('body')
+        if body:
+            content = body.get_text(strip=True)
+            if len(content) > MIN_CONTENT_LENGTH:
+                return self._cut(content)
+
+        return None
+
+
+class LxmlExtractor(Extractor):
+    """Same strategies as BeautifulSoupExtractor on an lxml tree.
+
+    One XPath union collects every candidate element in document order, and text
+    is gathered only until `max_length` characters are available.
+    """
+
+    name = "lxml"
+
+    CANDIDATES_XPATH = (
+        '//title | //h1 | //meta[@property="og:title"] | //body | //p'
+        ' | //article | //main | //*[@id="content"]'
+        ' | //*[contains(@class, "content") or contains(@class, "article")'
+        ' or contains(@class, "post")]'
+    )
+    SKIPPED_TAGS = ("script", "style")
+
+    def extract(self, html: bytes, url: str) -> Tuple[str, str]:
+        return self._extract_root(self._parse(html), url)
+
+    def incremental(self, head: bytes) -> Optional["IncrementalParse"]:
+        # Only pages that declare their charset: the encoding must be known before
+        # the whole body is, and must match what _parse would pick
+        encoding = EncodingDetector.find_declared_encoding(head, is_html=True)
+        if encoding is None:
+            return None
+        try:
+            return IncrementalParse(self, encoding)
+        except LookupError:
+            return None
+
+    def _extract_root(self, root, url: str) -> Tuple[str, str]:
+        first: Dict[str, object] = {}
+        paragraphs = []
+
+        for element in root.xpath(self.CANDIDATES_XPATH):
+            tag = element.tag
+            if tag == 'p':
+                paragraphs.append(element)
+            for key in self._candidate_keys(element, tag):
+                first.setdefault(key, element)
+
+        title = self._extract_title(first)
+        return self._finish(title, self._extract_content(first, paragraphs), url)
+
+    def _parse(self, html: bytes):
+        """Parse with the encoding BeautifulSoup would pick for the same bytes"""
+        if isinstance(html, str):
+            return lxml.html.document_fromstring(html)
+        encoding = EncodingDetector.find_declared_encoding(html, is_html=True)
+        if encoding is None:
+            try:
+                html.decode('utf-8')
+                encoding = 'utf-8'
+            except UnicodeDecodeError:
+                encoding = UnicodeDammit(html, is_html=True).original_encoding
+        parser = lxml.html.HTMLParser(encoding=encoding)
+        return lxml.html.document_fromstring(html, parser=parser)
+
+    def _candidate_keys(self, element, tag: str) -> Iterator[str]:
+        """Which title and content strategies an element is a candidate for"""
+        if tag in ('title', 'h1', 'body', 'article', 'main'):
+            yield tag
+        elif tag == 'meta' and element.get('property') == 'og:title':
+            yield 'og:title'
+
+        # Script and style are removed before the content selectors run
+        if tag in self.SKIPPED_TAGS:
+            return
+        classes = element.get('class')
+        if classes:
+            for selector in ('content', 'article', 'post'):
+                if selector in classes:
+                    yield f'[class*="{selector}"]'
+            if 'entry-content' in classes.split():
+                yield '.entry-content'
+        if element.get('id') == 'content':
+            yield '#content'
+
+    def _extract_title(self, first: Dict[str, object]) -> Optional[str]:
+        title_tag = first.get('title')
+        if title_tag is not None:
+            title = self._single_string(title_tag)
+            if title and title.strip():
+                return title.strip()
+
+        h1_tag = first.get('h1')
+        if h1_tag is not None:
+            title = self._text(h1_tag, strip=False)
+            if title.strip():
+                return title.strip()
+
+        og_title = first.get('og:title')
+        if og_title is not None and og_title.get('content'):
+            title = og_title.get('content').strip()
+            if title:
+                return title
+
+        return None
+
+    def _extract_content(
+        self, first: Dict[str, object], paragraphs: List
+    ) -> Optional[str]:
+        for selector in CONTENT_SELECTORS:
+            element = first.get(selector)
+            if element is not None:
+                content = self._text(element, limit=self.max_length)
+                if len(content) > MIN_CONTENT_LENGTH:
+                    return self._cut(content)
+
+        if paragraphs:
+            parts = []
+            length = -1
+            for p in paragraphs:
+                part = self._text(p, limit=self.max_length)
+                parts.append(part)
+                length += len(part) + 1
+                if self.max_length and length >= self.max_length:
+                    break
+            content = ' '.join(parts)
+            if len(content) > MIN_CONTENT_LENGTH:
+                return self._cut(content)
+
+        body = first.get('body')
+        if body is not None:
+            content = self._text(body, limit=self.max_length)
+            if len(content) > MIN_CONTENT_LENGTH:
+                return self._cut(content)
+
+        return None
+
+    def _text(self, element, strip: bool = True, limit: int = 0) -> str:
+        """get_text() equivalent that stops once `limit` characters are collected.
+        Like BeautifulSoup, script and style contents never count as text."""
+        parts = []
+        length = 0
+        for string in self._iter_strings(element):
+            if strip:
+                string = string.strip()
+                if not string:
+                    continue
+            parts.append(string)
+            length += len(string)
+            if limit and length >= limit:
+                break
+        return ''.join(parts)
+
+    def _iter_strings(self, element) -> Iterator[str]:
+        """Text nodes under an element in document order, without recursion"""
+        if element.text:
+            yield element.text
+        stack = [(iter(element), None)]
+        while stack:
+            children, tail = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if tail:
+                    yield tail
+                continue
+            # Comments and processing instructions have non-string tags
+            if isinstance(child.tag, str) and child.tag not in self.SKIPPED_TAGS:
+                if child.text:
+                    yield child.text
+                stack.append((iter(child), child.tail))
+            elif child.tail:
+                yield child.tail
+
+    def _single_string(self, element) -> Optional[str]:
+        """Mirror of BeautifulSoup's Tag.string: the only string child, if any"""
+        children = len(element)
+        if children == 0:
+            return element.text
+        if children > 1 or element.text or element[0].tail:
+            return None
+        child = element[0]
+        if not isinstance(child.tag, str):
+            return child.text
+        return self._single_string(child)
+
+
+class IncrementalParse:
+    """lxml parse of a page fed block by block.
+
+    It is settled once the first <title> and the first <article> are closed and
+    have usable text: those win the title and content strategies, so the rest of
+    the page cannot change the result of LxmlExtractor.
+    """
+
+    def __init__(self, extractor: LxmlExtractor, encoding: str):
+        self.extractor = extractor
+        self.parser = etree.HTMLPullParser(
+            events=("start", "end"), tag=("title", "article"), encoding=encoding
+        )
+        self.settled = False
+        self._title = None
+        self._article = None
+        self._title_done = False
+        self._article_done = False
+
+    def feed(self, block: bytes) -> bool:
+        """Parse one more block, returns True once the rest of the page is not needed"""
+        self.parser.feed(block)
+        for event, element in self.parser.read_events():
+            if event == "start":
+                if element.tag == "title" and self._title is None:
+                    self._title = element
+                elif element.tag == "article" and self._article is None:
+                    self._article = element
+            elif element is self._title:
+                title = self.extractor._single_string(element)
+                self._title_done = bool(title and title.strip())
+            elif element is self._article:
+                content = self.extractor._text(element, limit=self.extractor.max_length)
+                self._article_done = len(content) > MIN_CONTENT_LENGTH
+        self.settled = self._title_done and self._article_done
+        return self.settled
+
+    def extract(self, url: str) -> Tuple[str, str]:
+        """Finish the parse and extract from what was fed"""
+        return self.extractor._extract_root(self.parser.close(), url)
+
+
+EXTRACTORS: Dict[str, Type[Extractor]] = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+
+def get_extractor(name: str, max_length: int = MAX_CONTENT_LENGTH) -> Extractor:
+    """Extractor by name, falling back to BeautifulSoup when lxml is unavailable"""
+    if name == LxmlExtractor.name and lxml is None:
+        logger.warning("lxml is not installed, using the BeautifulSoup extractor")
+        name = BeautifulSoupExtractor.name
+    if name not in EXTRACTORS:
+        logger.warning(f"Unknown extractor {name!r}, using the BeautifulSoup extractor")
+        name = BeautifulSoupExtractor.name
+    return EXTRACTORS[name](max_length)
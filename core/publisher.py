@@ -1,66 +1,153 @@
 import json
-from typing import List
+import time
+from typing import Iterable, Iterator, List, Tuple
 from config.settings import Settings
-from core.redis_handler import RedisHandler
+from core.sharded_queue import get_redis_handler
+from core.dedup import DedupIndex
 from models.article import ArticleTask
 from utils.logger import logger
 
+# Bytes read per chunk when streaming a JSON array
+READ_CHUNK_SIZE = 64 * 1024
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
 
 class Publisher:
     def __init__(self, settings: Settings):
-        self.redis_handler = RedisHandler(settings.redis)
+        self.redis_handler = get_redis_handler(settings.redis)
+        self.batch_size = settings.publisher.batch_size
+        self.dedup = DedupIndex(
+            self.redis_handler.client, settings.dedup, settings.redis.queue_name
+        )
 
     def publish_from_file(self, json_file_path: str) -> int:
-        """Read JSON file and publish all articles to Redis queue"""
-        try:
-            articles_data = self._load_json_file(json_file_path)
-            if not articles_data:
-                return 0
-
-            tasks = self._convert_to_tasks(articles_data)
-            published_count = 0
+        """Stream a JSON array or JSONL file and publish its articles in batches"""
+        published_count = 0
+        total_count = 0
+        skipped_count = 0
+        start_time = time.monotonic()
 
-            for task in tasks:
-                if self.redis_handler.push_task(task):
-                    published_count += 1
-
-            logger.info(f"Published {published_count}/{len(tasks)} tasks to Redis")
-            return published_count
+        try:
+            records = self._iter_records(json_file_path)
+            batch: List[ArticleTask] = []
+
+            for task in self._convert_to_tasks(records):
+                batch.append(task)
+                if len(batch) >= self.batch_size:
+                    pushed, skipped = self._publish_batch(batch)
+                    published_count += pushed
+                    skipped_count += skipped
+                    total_count += len(batch)
+                    batch = []
+
+            if batch:
+                pushed, skipped = self._publish_batch(batch)
+                published_count += pushed
+                skipped_count += skipped
+                total_count += len(batch)
 
         except Exception as e:
             logger.error(f"Failed to publish from file {json_file_path}: {e}")
-            return 0
 
-    def _load_json_file(self, file_path: str) -> List[dict]:
-        """Load and parse JSON file"""
+        elapsed = time.monotonic() - start_time
+        rate = published_count / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Published {published_count}/{total_count} tasks to Redis "
+            f"in {elapsed:.2f}s ({rate:.0f} tasks/sec), "
+            f"skipped {skipped_count} duplicate URLs"
+        )
+        return published_count
+
+    def _publish_batch(self, batch: List[ArticleTask]) -> Tuple[int, int]:
+        """Push the batch's not yet queued tasks, returns (pushed, skipped duplicates)"""
+        new_tasks = self.dedup.claim(batch)
+        pushed = self.redis_handler.push_tasks(new_tasks)
+        if pushed < len(new_tasks):
+            # Let a later publish retry these URLs
+            self.dedup.release(new_tasks)
+        return pushed, len(batch) - len(new_tasks)
+
+    def _iter_records(self, file_path: str) -> Iterator[dict]:
+        """Yield raw records from a JSON array or JSONL file without loading it whole"""
         try:
             with open(file_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
-
-            if isinstance(data, list):
-                logger.info(f"Loaded {len(data)} articles from {file_path}")
-                return data
-            else:
-                logger.error(f"Expected JSON array, got {type(data)}")
-                return []
+                if file_path.lower().endswith(JSONL_EXTENSIONS):
+                    yield from self._iter_json_lines(file)
+                    return
+
+                # Sniff the format from the first non-whitespace character
+                head = file.read(READ_CHUNK_SIZE)
+                first_char = head.lstrip()[:1]
+                if first_char == "[":
+                    yield from self._iter_json_array(file, head)
+                elif first_char == "{":
+                    file.seek(0)
+                    yield from self._iter_json_lines(file)
+                elif first_char:
+                    logger.error(f"Expected JSON array or JSONL in {file_path}")
 
         except FileNotFoundError:
             logger.error(f"File not found: {file_path}")
-            return []
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in {file_path}: {e}")
-            return []
         except Exception as e:
             logger.error(f"Error loading {file_path}: {e}")
-            return []
 
-    def _convert_to_tasks(self, articles_data: List[dict]) -> List[ArticleTask]:
-        """Convert raw JSON data to ArticleTask objects"""
-        tasks = []
+    def _iter_json_lines(self, file) -> Iterator[dict]:
+        """Yield one record per non-empty line"""
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Invalid JSON on line {line_number}, skipping: {e}")
+
+    def _iter_json_array(self, file, buffer: str) -> Iterator[dict]:
+        """Yield the elements of a top-level JSON array, reading chunk by chunk"""
+        decoder = json.JSONDecoder()
+        pos = buffer.index("[") + 1
+        eof = False
+
+        while True:
+            # Skip whitespace and separators between elements
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # A value touching the end of the buffer may be cut short
+                if end < len(buffer) or eof:
+                    yield record
+                    pos = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+
+            chunk = file.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+    def _convert_to_tasks(self, articles_data: Iterable[dict]) -> Iterator[ArticleTask]:
+        """Convert raw JSON records to ArticleTask objects as they arrive"""
+        required_fields = ["url", "source", "category"]
+
         for i, article_data in enumerate(articles_data):
             try:
+                if not isinstance(article_data, dict):
+                    logger.warning(f"Article {i} is not a JSON object, skipping")
+                    continue
+
                 # Ensure required fields exist
-                required_fields = ["url", "source", "category"]
                 missing_fields = [
                     field for field in required_fields if field not in article_data
                 ]
@@ -71,25 +158,25 @@ class Publisher:
                     )
                     continue
 
-                task = ArticleTask(
+                yield ArticleTask(
                     id=article_data.get("id", f"article_{i + 1}"),
                     url=article_data["url"],
                     source=article_data["source"],
                     category=article_data["category"],
                     priority=article_data.get("priority", "medium"),
                 )
-                tasks.append(task)
 
             except Exception as e:
                 logger.error(f"Failed to convert article {i} to task: {e}")
                 continue
 
-        return tasks
-
     def get_queue_status(self) -> dict:
         """Get current queue statistics"""
-        queue_length = self.redis_handler.get_queue_length()
+        queue_lengths = self.redis_handler.get_queue_lengths()
+        queue_length = sum(queue_lengths.values())
         return {
             "queue_length": queue_length,
+            "queue_lengths": queue_lengths,
+            "retry_queue": self.redis_handler.get_retry_lengths(),
             "status": "active" if queue_length > 0 else "empty",
         }
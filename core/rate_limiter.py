@@ -0,0 +1,92 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from utils.logger import logger
+
+# Drop idle host entries once the table grows past this size
+PRUNE_THRESHOLD = 10000
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given as delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostRateLimiter:
+    """Per-host token bucket, tracked as the next time a request is allowed (GCRA)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next_allowed: Dict[str, float] = {}
+        self._crawl_delays: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _interval(self, host: str) -> float:
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        return max(interval, self._crawl_delays.get(host, 0.0))
+
+    def _tolerance(self, host: str) -> float:
+        return (self.burst - 1) * self._interval(host)
+
+    def ready_in(self, host: str) -> float:
+        """Seconds until the host may be fetched again, 0 if it may be fetched now"""
+        with self._lock:
+            next_allowed = self._next_allowed.get(host)
+            if next_allowed is None:
+                return 0.0
+            return max(0.0, next_allowed - self._tolerance(host) - time.monotonic())
+
+    def reserve(self, host: str) -> float:
+        """Take a token for the host and return how long to wait before using it"""
+        with self._lock:
+            interval = self._interval(host)
+            if interval <= 0:
+                return 0.0
+
+            now = time.monotonic()
+            next_allowed = max(self._next_allowed.get(host, now), now)
+            delay = max(0.0, next_allowed - self._tolerance(host) - now)
+            self._next_allowed[host] = next_allowed + interval
+
+            if len(self._next_allowed) > PRUNE_THRESHOLD:
+                self._prune(now)
+            return delay
+
+    def penalize(self, host: str, seconds: float) -> None:
+        """Hold off a host, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            until = time.monotonic() + seconds + self._tolerance(host)
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0.0), until)
+        logger.warning(f"Backing off {host} for {seconds:.1f}s")
+
+    def knows_crawl_delay(self, host: str) -> bool:
+        return host in self._crawl_delays
+
+    def set_crawl_delay(self, host: str, seconds: Optional[float]) -> None:
+        """Record a robots.txt Crawl-delay (0 when the host sets none)"""
+        with self._lock:
+            self._crawl_delays[host] = float(seconds or 0.0)
+
+    def _prune(self, now: float) -> None:
+        """Forget hosts whose bucket is full again"""
+        idle = [host for host, next_allowed in self._next_allowed.items() if next_allowed <= now]
+        for host in idle:
+            del self._next_allowed[host]
@@ -1,19 +1,90 @@
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import json
-from typing import Optional
+import os
+import socket
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
 from config.settings import RedisConfig
-from models.article import ArticleTask
+from models.article import DEFAULT_PRIORITY, ArticleTask, FetchFailure
 from utils.logger import logger
+from utils.metrics import QUEUE_WAIT_SECONDS, REDIS_SECONDS
+
+# Move up to ARGV[3] messages, taken from the n queues in order, into their
+# processing lists and take the consumer lease, atomically. KEYS: n queues, their
+# n processing lists, lease. ARGV: consumer id, ttl, count.
+# Returns {processing, message, ...} pairs.
+RELIABLE_POP_SCRIPT = """
+local queues = (#KEYS - 1) / 2
+local lease = KEYS[#KEYS]
+local wanted = tonumber(ARGV[3]) * 2
+local popped = {}
+for i = 1, queues do
+    local processing = KEYS[queues + i]
+    while #popped < wanted do
+        local message = redis.call('LMOVE', KEYS[i], processing, 'RIGHT', 'LEFT')
+        if not message then
+            break
+        end
+        popped[#popped + 1] = processing
+        popped[#popped + 1] = message
+    end
+    if #popped == wanted then
+        break
+    end
+end
+if #popped == 0 then
+    return false
+end
+redis.call('SET', lease, ARGV[1], 'EX', ARGV[2])
+return popped
+"""
+
+# Return a processing list to its source queue unless the owner's lease is alive.
+# Newest first onto the consuming end, so the oldest is delivered again first.
+# KEYS: processing list, source queue, lease.
+MOVE_BACK_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return 0
+end
+local count = 0
+while redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT') do
+    count = count + 1
+end
+return count
+"""
+
+# Move due messages from each retry set KEYS[i] to its queue KEYS[i + 1].
+# ARGV: now, max messages per set.
+PROMOTE_RETRIES_SCRIPT = """
+local moved = 0
+for i = 1, #KEYS, 2 do
+    local due = redis.call('ZRANGEBYSCORE', KEYS[i], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    for _, message in ipairs(due) do
+        redis.call('ZREM', KEYS[i], message)
+        redis.call('LPUSH', KEYS[i + 1], message)
+    end
+    moved = moved + #due
+end
+return moved
+"""
+
+# Most retries moved back per priority in one promotion
+PROMOTE_BATCH_SIZE = 500
+
+# Polling bounds for reliable pops, which cannot block on several lists at once
+RELIABLE_POLL_MIN = 0.05
+RELIABLE_POLL_MAX = 1.0
 
 class RedisHandler:
-    def __init__(self, config: RedisConfig):
+    def __init__(self, config: RedisConfig, client: Optional[redis.Redis] = None):
         self.config = config
-        self.client = redis.Redis(
-            host=config.host,
-            port=config.port,
-            db=config.db,
-            decode_responses=True  # Important: auto-decode bytes to str
-        )
+        self._init_queue_state(client)
+        if client is not None:
+            # Shares a connection that was already tested, see ShardedRedisHandler
+            return
         
         # Test connection
         try:
@@ -22,47 +93,722 @@ class RedisHandler:
         except redis.ConnectionError as e:
             logger.error(f"Failed to connect to Redis: {e}")
             raise
-        
+    
+    def _init_queue_state(self, client=None) -> None:
+        """Set up the client, consumer identity, priority scheduling state and scripts"""
+        self.client = client if client is not None else self._create_client()
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Namespace of lease keys; ShardedRedisHandler gives all its shards one lease
+        self.lease_prefix = self.config.queue_name
+        self.priorities = list(self.config.priority_weights)
+        # Smooth weighted round-robin credit per priority
+        self._credits = {priority: 0 for priority in self.priorities}
+        self._reliable_pop = self.client.register_script(RELIABLE_POP_SCRIPT)
+        self._move_back = self.client.register_script(MOVE_BACK_SCRIPT)
+        self._promote_retries = self.client.register_script(PROMOTE_RETRIES_SCRIPT)
+    
+    def _create_client(self):
+        return redis.Redis(
+            host=self.config.host,
+            port=self.config.port,
+            db=self.config.db,
+            decode_responses=True  # Important: auto-decode bytes to str
+        )
+    
     def push_task(self, task: ArticleTask) -> bool:
         """Push a task to the Redis queue"""
         try:
-            serialized_task = json.dumps(task.to_dict())
-            self.client.lpush(self.config.queue_name, serialized_task)
+            serialized_task = self._serialize(task)
+            self.client.lpush(self._queue_key(task.priority), serialized_task)
             logger.info(f"Pushed task {task.id} to queue")
             return True
         except Exception as e:
             logger.error(f"Failed to push task {task.id}: {e}")
             return False
     
+    def push_tasks(self, tasks: List[ArticleTask]) -> int:
+        """Push a batch of tasks in one round trip, returns the number pushed"""
+        if not tasks:
+            return 0
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, serialized_tasks in self._group_by_queue(tasks).items():
+                pipe.lpush(key, *serialized_tasks)
+            with REDIS_SECONDS.labels("push").time():
+                pipe.execute()
+            logger.debug(f"Pushed batch of {len(tasks)} tasks to queue")
+            return len(tasks)
+        except Exception as e:
+            logger.error(f"Failed to push batch of {len(tasks)} tasks: {e}")
+            return 0
+    
     def pop_task(self, timeout: int = 5) -> Optional[ArticleTask]:
-        """Pop a task from Redis queue (blocking)"""
-        try:
-            result = self.client.brpop(self.config.queue_name, timeout=timeout)
-            if result:
-                _, serialized_task = result  # brpop returns (queue_name, value)
-                task_data = json.loads(serialized_task)
-                task = ArticleTask.from_dict(task_data)
-                logger.info(f"Popped task {task.id} from queue")
-                return task
-            return None
+        """Pop a task from Redis queue, weighted across priorities.
+        Blocks up to `timeout` seconds; timeout <= 0 returns at once if the queue is empty."""
+        try:
+            keys = self._pop_order()
+            if self.config.reliable:
+                result = self._pop_reliable(keys, timeout)
+            elif timeout <= 0:
+                with REDIS_SECONDS.labels("pop").time():
+                    popped = self.client.lmpop(len(keys), *keys, direction="RIGHT")
+                result = self._first_message(popped)
+            else:
+                result = self.client.brpop(keys, timeout=timeout)
+            if not result:
+                return None
+            
+            queue_key, serialized_task = result  # (queue or processing list, value)
+            task = self._decode_popped(queue_key, serialized_task)
+            if task is None:
+                if self.config.reliable:
+                    self.client.lrem(queue_key, 1, serialized_task)
+                return None
+            logger.info(f"Popped task {task.id} from {queue_key}")
+            return task
         except Exception as e:
             logger.error(f"Failed to pop task: {e}")
             return None
     
-    def get_queue_length(self) -> int:
-        """Get current queue length"""
+    def _pop_reliable(self, keys: List[str], timeout: int) -> Optional[List[str]]:
+        """Atomically park the next message in a processing list until acked"""
+        deadline = time.monotonic() + timeout
+        delay = RELIABLE_POLL_MIN
+        while True:
+            result = self._reliable_pop(
+                keys=self._reliable_pop_keys(keys), args=self._reliable_pop_args()
+            )
+            remaining = deadline - time.monotonic()
+            if result or remaining <= 0:
+                return result
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, RELIABLE_POLL_MAX)
+    
+    def pop_tasks(self, count: int, timeout: int = 5) -> List[ArticleTask]:
+        """Pop up to `count` tasks in one round trip, weighted across priorities like
+        pop_task. Only an empty queue blocks, up to `timeout` seconds, for one task."""
+        if count <= 1:
+            task = self.pop_task(timeout)
+            return [task] if task else []
         try:
-            return self.client.llen(self.config.queue_name)
+            pipe = self.client.pipeline(transaction=False)
+            for keys, batch in self._batch_pop_orders(count):
+                self._batch_pop_command(pipe, keys, batch)
+            with REDIS_SECONDS.labels("pop").time():
+                replies = pipe.execute()
+            tasks, undecodable = self._decode_batch(replies)
+            if undecodable:
+                self._drop_undecodable(undecodable)
         except Exception as e:
-            logger.error(f"Failed to get queue length: {e}")
+            logger.error(f"Failed to pop tasks: {e}")
+            return []
+        if tasks:
+            logger.info(f"Popped {len(tasks)} tasks")
+            return tasks
+        if timeout > 0:
+            task = self.pop_task(timeout)
+            return [task] if task else []
+        return []
+    
+    def _drop_undecodable(self, messages: List[List[str]]) -> None:
+        """Remove messages that could not be decoded from our processing lists"""
+        if not self.config.reliable:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for processing_key, serialized_task in messages:
+            pipe.lrem(processing_key, 1, serialized_task)
+        pipe.execute()
+    
+    def ack_task(self, task: ArticleTask) -> bool:
+        """Acknowledge a finished task so it is not redelivered"""
+        if not self.config.reliable or task.receipt is None:
+            return True
+        try:
+            processing_key, serialized_task = task.receipt
+            pipe = self.client.pipeline(transaction=False)
+            pipe.lrem(processing_key, 1, serialized_task)
+            pipe.set(self.lease_key, self.consumer_id, ex=self.config.visibility_timeout)
+            with REDIS_SECONDS.labels("ack").time():
+                pipe.execute()
+            task.receipt = None
+            logger.debug(f"Acknowledged task {task.id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to acknowledge task {task.id}: {e}")
+            return False
+    
+    def return_tasks(self, tasks: List[ArticleTask]) -> int:
+        """Put popped but unstarted tasks back at the consuming end of their queues.
+        On a reliable queue they are still in flight and go back via release_in_flight."""
+        if not tasks or self.config.reliable:
+            return 0
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, serialized_tasks in self._group_by_queue(tasks).items():
+                # Reversed so the first task is the next one popped
+                pipe.rpush(key, *reversed(serialized_tasks))
+            pipe.execute()
+            logger.info(f"Returned {len(tasks)} unstarted tasks to queue")
+            return len(tasks)
+        except Exception as e:
+            logger.error(f"Failed to return {len(tasks)} tasks to queue: {e}")
+            return 0
+    
+    def requeue_expired(self) -> int:
+        """Re-queue in-flight tasks of consumers whose visibility timeout expired"""
+        requeued = 0
+        try:
+            for processing_key in self.client.scan_iter(match=self._processing_pattern()):
+                requeued += self.requeue_if_expired(processing_key)
+        except Exception as e:
+            logger.error(f"Failed to re-queue expired tasks: {e}")
+        return requeued
+    
+    def requeue_if_expired(self, processing_key: str) -> int:
+        """Move one processing list back to its queue if its consumer's lease expired"""
+        source_key, consumer_id = processing_key.rsplit(":processing:", 1)
+        if consumer_id == self.consumer_id:
+            return 0
+        count = self._move_back(keys=[processing_key, source_key, self._lease_key(consumer_id)])
+        if count:
+            logger.warning(f"Re-queued {count} tasks from expired consumer {consumer_id}")
+        return count
+    
+    def release_in_flight(self) -> int:
+        """Hand back our unacknowledged tasks, e.g. on shutdown"""
+        if not self.config.reliable:
+            return 0
+        try:
+            self.client.delete(self.lease_key)
+            count = 0
+            for source_key in self._queue_keys():
+                count += self._move_back(
+                    keys=[self._processing_key(source_key), source_key, self.lease_key]
+                )
+            if count:
+                logger.info(f"Returned {count} unacknowledged tasks to queue")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to release in-flight tasks: {e}")
             return 0
     
+    def schedule_retry(
+        self, task: ArticleTask, delay: float, count_attempt: bool = True
+    ) -> bool:
+        """Park a task in its retry set for `delay` seconds, acking this delivery.
+        Tasks deferred without being fetched keep their attempt count."""
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            self._retry_commands(pipe, task, delay, count_attempt)
+            with REDIS_SECONDS.labels("retry").time():
+                pipe.execute()
+            task.receipt = None
+            action = "Retrying" if count_attempt else "Deferring"
+            logger.info(f"{action} task {task.id} in {delay:.0f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to schedule retry of task {task.id}: {e}")
+            return False
+    
+    def dead_letter(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        """Keep a task that ran out of attempts on the dead-letter list for inspection"""
+        try:
+            self.client.lpush(self.dead_letter_key, self._dead_letter_entry(task, failure))
+            logger.warning(f"Dead-lettered task {task.id} after {task.attempts + 1} attempts")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to dead-letter task {task.id}: {e}")
+            return False
+    
+    def promote_due_retries(self) -> int:
+        """Move retries whose delay has passed back onto their queues"""
+        try:
+            moved = self._promote_retries(
+                keys=self._retry_queue_pairs(), args=[time.time(), PROMOTE_BATCH_SIZE]
+            )
+            if moved:
+                logger.info(f"Moved {moved} due retries back to queue")
+            return moved
+        except Exception as e:
+            logger.error(f"Failed to promote due retries: {e}")
+            return 0
+    
+    def get_retry_lengths(self) -> Dict[str, int]:
+        """Tasks waiting for a retry and tasks on the dead-letter list"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            self._retry_length_commands(pipe)
+            return self._retry_lengths(pipe.execute())
+        except Exception as e:
+            logger.error(f"Failed to get retry queue length: {e}")
+            return {}
+    
+    def _retry_commands(
+        self, pipe, task: ArticleTask, delay: float, count_attempt: bool
+    ) -> None:
+        """Add the next delivery to the retry set and drop this one from processing"""
+        retry = ArticleTask.from_dict(task.to_dict())
+        if count_attempt:
+            retry.attempts += 1
+        pipe.zadd(self._retry_key(task.priority), {self._serialize(retry): time.time() + delay})
+        if self.config.reliable and task.receipt is not None:
+            processing_key, serialized_task = task.receipt
+            pipe.lrem(processing_key, 1, serialized_task)
+    
+    def _dead_letter_entry(self, task: ArticleTask, failure: FetchFailure) -> str:
+        return json.dumps({
+            "task": task.to_dict(),
+            "kind": failure.kind,
+            "error": failure.error,
+            "attempts": task.attempts + 1,
+            "failed_at": time.time(),
+        })
+    
+    def _retry_length_commands(self, pipe) -> None:
+        for priority in self.priorities:
+            pipe.zcard(self._retry_key(priority))
+        pipe.llen(self.dead_letter_key)
+    
+    @staticmethod
+    def _retry_lengths(lengths: List[int]) -> Dict[str, int]:
+        return {"retrying": sum(lengths[:-1]), "dead_letter": lengths[-1]}
+    
+    def _decode_popped(self, queue_key: str, serialized_task: str) -> Optional[ArticleTask]:
+        """Decode a popped message, attaching its receipt on reliable queues"""
+        try:
+            task = self._deserialize(serialized_task)
+        except Exception as e:
+            logger.error(f"Dropping undecodable message {serialized_task[:200]!r}: {e}")
+            return None
+        if self.config.reliable:
+            task.receipt = (queue_key, serialized_task)
+        if task.enqueued_at:
+            QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - task.enqueued_at))
+        return task
+    
+    @staticmethod
+    def _first_message(popped: Optional[list]) -> Optional[List[str]]:
+        """Turn an LMPOP reply into a (queue, message) pair"""
+        if not popped:
+            return None
+        queue_key, messages = popped
+        return [queue_key, messages[0]]
+    
+    def _reliable_pop_keys(self, keys: List[str]) -> List[str]:
+        """Queues in pop order, their processing lists, and the lease"""
+        return keys + [self._processing_key(key) for key in keys] + [self.lease_key]
+    
+    def _reliable_pop_args(self, count: int = 1) -> list:
+        return [self.consumer_id, self.config.visibility_timeout, count]
+    
+    def _batch_pop_orders(self, count: int) -> List[Tuple[List[str], int]]:
+        """Key orders for a batch of pops, with the number of pops preferring each.
+        Each pop of the batch advances the weighted round-robin as pop_task would."""
+        orders: Dict[str, Tuple[List[str], int]] = {}
+        for _ in range(count):
+            keys = self._pop_order()
+            previous = orders.get(keys[0])
+            orders[keys[0]] = (keys, previous[1] + 1 if previous else 1)
+        return list(orders.values())
+    
+    def _batch_pop_command(self, pipe, keys: List[str], count: int) -> None:
+        """Queue one multi-pop: LMPOP, or the reliable script that parks the messages"""
+        if self.config.reliable:
+            self._reliable_pop(
+                keys=self._reliable_pop_keys(keys), args=self._reliable_pop_args(count), client=pipe
+            )
+        else:
+            pipe.lmpop(len(keys), *keys, direction="RIGHT", count=count)
+    
+    def _decode_batch(
+        self, replies: list
+    ) -> Tuple[List[ArticleTask], List[List[str]]]:
+        """Tasks from multi-pop replies, and the (list, message) pairs that failed to decode"""
+        tasks, undecodable = [], []
+        for reply in replies:
+            if not reply:
+                continue
+            if self.config.reliable:
+                # Flat (processing list, message) pairs
+                popped = [(reply[i], reply[i + 1]) for i in range(0, len(reply), 2)]
+            else:
+                queue_key, messages = reply
+                popped = [(queue_key, message) for message in messages]
+            for queue_key, serialized_task in popped:
+                task = self._decode_popped(queue_key, serialized_task)
+                if task is None:
+                    undecodable.append([queue_key, serialized_task])
+                else:
+                    tasks.append(task)
+        return tasks, undecodable
+    
+    def _queue_key(self, priority: str) -> str:
+        """List holding tasks of a priority; unknown priorities are treated as default"""
+        if priority not in self.config.priority_weights:
+            priority = DEFAULT_PRIORITY
+        return f"{self.config.queue_name}:{priority}"
+    
+    def _retry_key(self, priority: str) -> str:
+        """Sorted set of tasks waiting to be retried, scored by due time"""
+        return f"{self._queue_key(priority)}:retry"
+    
+    def _retry_queue_pairs(self) -> List[str]:
+        keys = []
+        for priority in self.priorities:
+            keys += [self._retry_key(priority), self._queue_key(priority)]
+        return keys
+    
+    @property
+    def dead_letter_key(self) -> str:
+        return f"{self.config.queue_name}:dead"
+    
+    def _queue_keys(self) -> List[str]:
+        """All task lists, highest priority first, then the pre-priority list"""
+        return [self._queue_key(p) for p in self.priorities] + [self.config.queue_name]
+    
+    def _pop_order(self) -> List[str]:
+        """Pick the preferred priority by smooth weighted round-robin.
+        The other lists follow in priority order so no pop is wasted on an empty list,
+        while low priorities still get their share of pops when everything is busy."""
+        total = 0
+        for priority, weight in self.config.priority_weights.items():
+            self._credits[priority] += weight
+            total += weight
+        chosen = max(self.priorities, key=lambda p: self._credits[p])
+        self._credits[chosen] -= total
+        
+        keys = self._queue_keys()
+        preferred = self._queue_key(chosen)
+        keys.remove(preferred)
+        return [preferred] + keys
+    
+    def _group_by_queue(self, tasks: List[ArticleTask]) -> Dict[str, List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for task in tasks:
+            grouped.setdefault(self._queue_key(task.priority), []).append(self._serialize(task))
+        return grouped
+    
+    def _processing_key(self, source_key: str) -> str:
+        return f"{source_key}:processing:{self.consumer_id}"
+    
+    def _processing_pattern(self) -> str:
+        return f"{self.config.queue_name}*:processing:*"
+    
+    def _lease_key(self, consumer_id: str) -> str:
+        return f"{self.lease_prefix}:lease:{consumer_id}"
+    
+    @property
+    def lease_key(self) -> str:
+        return self._lease_key(self.consumer_id)
+    
+    def _serialize(self, task: ArticleTask) -> str:
+        """Encode a task as a queue message"""
+        # The first enqueue stamps the task; re-queued tasks keep their original time
+        if task.enqueued_at is None:
+            task.enqueued_at = time.time()
+        if self.config.wire_format == "compact":
+            return task.to_compact()
+        return json.dumps(task.to_dict())
+    
+    def _deserialize(self, serialized_task: str) -> ArticleTask:
+        """Decode a queue message in either wire format into a task"""
+        if serialized_task.startswith("["):
+            return ArticleTask.from_compact(serialized_task)
+        return ArticleTask.from_dict(json.loads(serialized_task))
+    
+    def get_queue_length(self, priority: Optional[str] = None) -> int:
+        """Get current queue length, in total or for one priority"""
+        if priority is not None:
+            return self.get_queue_lengths().get(priority, 0)
+        return sum(self.get_queue_lengths().values())
+    
+    def get_queue_lengths(self) -> Dict[str, int]:
+        """Get queue depth per priority"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in self._queue_keys():
+                pipe.llen(key)
+            return self._lengths_by_priority(pipe.execute())
+        except Exception as e:
+            logger.error(f"Failed to get queue length: {e}")
+            return {}
+    
+    def _lengths_by_priority(self, lengths: List[int]) -> Dict[str, int]:
+        """Fold list lengths into per-priority depths; the legacy list counts as default"""
+        depths = dict(zip(self.priorities, lengths))
+        depths[DEFAULT_PRIORITY] = depths.get(DEFAULT_PRIORITY, 0) + lengths[-1]
+        return depths
+    
     def clear_queue(self) -> bool:
         """Clear all tasks from queue (useful for testing)"""
         try:
-            self.client.delete(self.config.queue_name)
+            self.client.delete(*self._queue_keys())
             logger.info("Cleared Redis queue")
             return True
         except Exception as e:
             logger.error(f"Failed to clear queue: {e}")
             return False
+
+
+class AsyncRedisHandler(RedisHandler):
+    """asyncio counterpart of RedisHandler used by the async consumer"""
+    
+    def __init__(self, config: RedisConfig, client: Optional[aioredis.Redis] = None):
+        self.config = config
+        self._init_queue_state(client)
+    
+    def _create_client(self):
+        return aioredis.Redis(
+            host=self.config.host,
+            port=self.config.port,
+            db=self.config.db,
+            decode_responses=True
+        )
+    
+    async def connect(self) -> None:
+        """Test the connection"""
+        try:
+            await self.client.ping()
+            logger.info(f"Connected to Redis at {self.config.host}:{self.config.port}")
+        except redis.ConnectionError as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            raise
+    
+    async def close(self) -> None:
+        """Close pooled connections"""
+        await self.client.aclose()
+    
+    async def push_task(self, task: ArticleTask) -> bool:
+        """Push a task to the Redis queue"""
+        try:
+            await self.client.lpush(self._queue_key(task.priority), self._serialize(task))
+            logger.info(f"Pushed task {task.id} to queue")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to push task {task.id}: {e}")
+            return False
+    
+    async def pop_task(self, timeout: int = 5) -> Optional[ArticleTask]:
+        """Pop a task from Redis queue without blocking the event loop"""
+        try:
+            keys = self._pop_order()
+            if self.config.reliable:
+                result = await self._pop_reliable(keys, timeout)
+            elif timeout <= 0:
+                with REDIS_SECONDS.labels("pop").time():
+                    popped = await self.client.lmpop(len(keys), *keys, direction="RIGHT")
+                result = self._first_message(popped)
+            else:
+                result = await self.client.brpop(keys, timeout=timeout)
+            if not result:
+                return None
+            
+            queue_key, serialized_task = result
+            task = self._decode_popped(queue_key, serialized_task)
+            if task is None:
+                if self.config.reliable:
+                    await self.client.lrem(queue_key, 1, serialized_task)
+                return None
+            logger.info(f"Popped task {task.id} from {queue_key}")
+            return task
+        except Exception as e:
+            logger.error(f"Failed to pop task: {e}")
+            return None
+    
+    async def _pop_reliable(self, keys: List[str], timeout: int) -> Optional[List[str]]:
+        """Atomically park the next message in a processing list until acked"""
+        deadline = time.monotonic() + timeout
+        delay = RELIABLE_POLL_MIN
+        while True:
+            result = await self._reliable_pop(
+                keys=self._reliable_pop_keys(keys), args=self._reliable_pop_args()
+            )
+            remaining = deadline - time.monotonic()
+            if result or remaining <= 0:
+                return result
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, RELIABLE_POLL_MAX)
+    
+    async def pop_tasks(self, count: int, timeout: int = 5) -> List[ArticleTask]:
+        """Pop up to `count` tasks in one round trip without blocking the event loop"""
+        if count <= 1:
+            task = await self.pop_task(timeout)
+            return [task] if task else []
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for keys, batch in self._batch_pop_orders(count):
+                if self.config.reliable:
+                    # Queuing a script on an asyncio pipeline has to be awaited
+                    await self._reliable_pop(
+                        keys=self._reliable_pop_keys(keys),
+                        args=self._reliable_pop_args(batch),
+                        client=pipe,
+                    )
+                else:
+                    pipe.lmpop(len(keys), *keys, direction="RIGHT", count=batch)
+            with REDIS_SECONDS.labels("pop").time():
+                replies = await pipe.execute()
+            tasks, undecodable = self._decode_batch(replies)
+            if undecodable:
+                await self._drop_undecodable(undecodable)
+        except Exception as e:
+            logger.error(f"Failed to pop tasks: {e}")
+            return []
+        if tasks:
+            logger.info(f"Popped {len(tasks)} tasks")
+            return tasks
+        if timeout > 0:
+            task = await self.pop_task(timeout)
+            return [task] if task else []
+        return []
+    
+    async def _drop_undecodable(self, messages: List[List[str]]) -> None:
+        if not self.config.reliable:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for processing_key, serialized_task in messages:
+            pipe.lrem(processing_key, 1, serialized_task)
+        await pipe.execute()
+    
+    async def ack_task(self, task: ArticleTask) -> bool:
+        """Acknowledge a finished task so it is not redelivered"""
+        if not self.config.reliable or task.receipt is None:
+            return True
+        try:
+            processing_key, serialized_task = task.receipt
+            pipe = self.client.pipeline(transaction=False)
+            pipe.lrem(processing_key, 1, serialized_task)
+            pipe.set(self.lease_key, self.consumer_id, ex=self.config.visibility_timeout)
+            with REDIS_SECONDS.labels("ack").time():
+                await pipe.execute()
+            task.receipt = None
+            logger.debug(f"Acknowledged task {task.id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to acknowledge task {task.id}: {e}")
+            return False
+    
+    async def return_tasks(self, tasks: List[ArticleTask]) -> int:
+        """Put popped but unstarted tasks back at the consuming end of their queues"""
+        if not tasks or self.config.reliable:
+            return 0
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, serialized_tasks in self._group_by_queue(tasks).items():
+                # Reversed so the first task is the next one popped
+                pipe.rpush(key, *reversed(serialized_tasks))
+            await pipe.execute()
+            logger.info(f"Returned {len(tasks)} unstarted tasks to queue")
+            return len(tasks)
+        except Exception as e:
+            logger.error(f"Failed to return {len(tasks)} tasks to queue: {e}")
+            return 0
+    
+    async def requeue_expired(self) -> int:
+        """Re-queue in-flight tasks of consumers whose visibility timeout expired"""
+        requeued = 0
+        try:
+            async for processing_key in self.client.scan_iter(match=self._processing_pattern()):
+                requeued += await self.requeue_if_expired(processing_key)
+        except Exception as e:
+            logger.error(f"Failed to re-queue expired tasks: {e}")
+        return requeued
+    
+    async def requeue_if_expired(self, processing_key: str) -> int:
+        """Move one processing list back to its queue if its consumer's lease expired"""
+        source_key, consumer_id = processing_key.rsplit(":processing:", 1)
+        if consumer_id == self.consumer_id:
+            return 0
+        count = await self._move_back(
+            keys=[processing_key, source_key, self._lease_key(consumer_id)]
+        )
+        if count:
+            logger.warning(f"Re-queued {count} tasks from expired consumer {consumer_id}")
+        return count
+    
+    async def release_in_flight(self) -> int:
+        """Hand back our unacknowledged tasks, e.g. on shutdown"""
+        if not self.config.reliable:
+            return 0
+        try:
+            await self.client.delete(self.lease_key)
+            count = 0
+            for source_key in self._queue_keys():
+                count += await self._move_back(
+                    keys=[self._processing_key(source_key), source_key, self.lease_key]
+                )
+            if count:
+                logger.info(f"Returned {count} unacknowledged tasks to queue")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to release in-flight tasks: {e}")
+            return 0
+    
+    async def schedule_retry(
+        self, task: ArticleTask, delay: float, count_attempt: bool = True
+    ) -> bool:
+        """Park a task in its retry set for `delay` seconds, acking this delivery.
+        Tasks deferred without being fetched keep their attempt count."""
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            self._retry_commands(pipe, task, delay, count_attempt)
+            with REDIS_SECONDS.labels("retry").time():
+                await pipe.execute()
+            task.receipt = None
+            action = "Retrying" if count_attempt else "Deferring"
+            logger.info(f"{action} task {task.id} in {delay:.0f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to schedule retry of task {task.id}: {e}")
+            return False
+    
+    async def dead_letter(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        """Keep a task that ran out of attempts on the dead-letter list for inspection"""
+        try:
+            await self.client.lpush(self.dead_letter_key, self._dead_letter_entry(task, failure))
+            logger.warning(f"Dead-lettered task {task.id} after {task.attempts + 1} attempts")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to dead-letter task {task.id}: {e}")
+            return False
+    
+    async def promote_due_retries(self) -> int:
+        """Move retries whose delay has passed back onto their queues"""
+        try:
+            moved = await self._promote_retries(
+                keys=self._retry_queue_pairs(), args=[time.time(), PROMOTE_BATCH_SIZE]
+            )
+            if moved:
+                logger.info(f"Moved {moved} due retries back to queue")
+            return moved
+        except Exception as e:
+            logger.error(f"Failed to promote due retries: {e}")
+            return 0
+    
+    async def get_retry_lengths(self) -> Dict[str, int]:
+        """Tasks waiting for a retry and tasks on the dead-letter list"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            self._retry_length_commands(pipe)
+            return self._retry_lengths(await pipe.execute())
+        except Exception as e:
+            logger.error(f"Failed to get retry queue length: {e}")
+            return {}
+    
+    async def get_queue_length(self, priority: Optional[str] = None) -> int:
+        """Get current queue length, in total or for one priority"""
+        lengths = await self.get_queue_lengths()
+        if priority is not None:
+            return lengths.get(priority, 0)
+        return sum(lengths.values())
+    
+    async def get_queue_lengths(self) -> Dict[str, int]:
+        """Get queue depth per priority"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in self._queue_keys():
+                pipe.llen(key)
+            return self._lengths_by_priority(await pipe.execute())
+        except Exception as e:
+            logger.error(f"Failed to get queue length: {e}")
+            return {}
@@ -0,0 +1,107 @@
+import multiprocessing as mp
+import time
+from dataclasses import replace
+from functools import partial
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+from config.settings import ScrapingConfig
+from core.archive import IndexEntry, load_index, read_records
+from core.db_handler import DBHandler
+from core.scraper import Scraper
+from models.article import FetchValidators, ScrapedContent
+from utils.logger import logger
+
+# Archived records one worker extracts per task, all from the same segment
+CHUNK_SIZE = 200
+
+# Set in every worker process by _init_worker
+_scraper: Optional[Scraper] = None
+
+
+def _init_worker(config: ScrapingConfig) -> None:
+    global _scraper
+    _scraper = Scraper(config)
+
+
+def _extract_chunk(
+    directory: str, entries: List[IndexEntry]
+) -> Tuple[Dict[str, ScrapedContent], int]:
+    """Extract archived pages with the current extractors, returns the pages by URL
+    and how many records could not be read or yielded nothing"""
+    pages = {}
+    for entry, record in read_records(directory, entries):
+        try:
+            page = _scraper._parse(record.body, record.url)
+        except Exception as e:
+            logger.warning(f"Re-extraction of {record.url} failed: {e}")
+            continue
+        if page is not None:
+            # Dated and hashed like the fetch that archived it
+            page.scraped_at = record.fetched_at
+            page.validators = FetchValidators(content_hash=entry.digest)
+            pages[record.url] = page
+    return pages, len(entries) - len(pages)
+
+
+def _chunks(entries: Iterable[IndexEntry], size: int) -> List[List[IndexEntry]]:
+    """Entries in runs of at most `size` records of one segment, in file order"""
+    chunks = []
+    ordered = sorted(entries, key=attrgetter("segment", "offset"))
+    for _, group in groupby(ordered, key=attrgetter("segment")):
+        records = list(group)
+        chunks.extend(records[start:start + size] for start in range(0, len(records), size))
+    return chunks
+
+
+def reextract(
+    directory: str,
+    config: ScrapingConfig,
+    db_handler: DBHandler,
+    workers: int,
+    batch_size: int
+) -> Dict[str, int]:
+    """Run the latest archived page of every URL through extraction again, on `workers`
+    processes, and bulk-update the articles whose title or content changed.
+    No page is fetched."""
+    entries = load_index(directory)
+    chunks = _chunks(entries.values(), CHUNK_SIZE)
+    stats = {"archived": len(entries), "extracted": 0, "failed": 0, "updated": 0}
+    logger.info(
+        f"Re-extracting {len(entries)} archived pages from {directory} on {workers} workers"
+    )
+
+    # Workers only parse, and must not archive what they read again
+    config = replace(config, archive_dir="")
+    extract = partial(_extract_chunk, directory)
+    started = time.monotonic()
+    pool = None
+    if workers > 1:
+        # spawn, not fork: the caller already holds a connected MongoClient
+        pool = mp.get_context("spawn").Pool(workers, _init_worker, (config,))
+    try:
+        if pool is None:
+            _init_worker(config)
+            results = map(extract, chunks)
+        else:
+            results = pool.imap_unordered(extract, chunks)
+
+        pending: Dict[str, ScrapedContent] = {}
+        for pages, failed in results:
+            stats["extracted"] += len(pages)
+            stats["failed"] += failed
+            pending.update(pages)
+            if len(pending) >= batch_size:
+                stats["updated"] += db_handler.update_extracted(pending)
+                pending = {}
+        stats["updated"] += db_handler.update_extracted(pending)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Re-extraction done in {elapsed:.1f}s: {stats['extracted']} pages extracted, "
+        f"{stats['failed']} failed, {stats['updated']} articles updated"
+    )
+    return stats
@@ -0,0 +1,51 @@
+import random
+from typing import Optional
+from config.settings import RetryConfig
+from models.article import ArticleTask, FetchFailure
+
+# Failure kinds
+PERMANENT = "permanent"  # 4xx, bad URL, unsupported content: retrying cannot help
+TRANSIENT = "transient"  # 5xx, 408/429, broken bodies, storage errors
+UNREACHABLE = "unreachable"  # timeouts, refused or reset connections: count against the host
+PARSE = "parse"  # fetched, but no title or content could be extracted
+
+# Client errors that say "later" rather than "never"
+RETRYABLE_STATUSES = (408, 425, 429)
+
+
+def classify_status(status: int) -> str:
+    """Failure kind of an HTTP error status"""
+    if status in RETRYABLE_STATUSES or status >= 500:
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryPolicy:
+    """Decides whether and when a failed task is delivered again.
+
+    Delays grow exponentially from `base_delay` up to `max_delay`, with "equal
+    jitter" (half fixed, half random) so tasks that failed together, e.g. on one
+    host outage, do not all come back at the same moment. A server's Retry-After
+    is honoured when it asks for longer.
+    """
+
+    def __init__(self, config: RetryConfig, rng: Optional[random.Random] = None):
+        self.config = config
+        self.rng = rng or random.Random()
+
+    def delay(self, task: ArticleTask, failure: FetchFailure) -> Optional[float]:
+        """Seconds until the next attempt, or None if the task should not be retried"""
+        if failure.kind == PERMANENT:
+            return None
+        attempts = task.attempts + 1
+        if attempts >= self.config.max_attempts:
+            return None
+        delay = self.backoff(attempts)
+        if failure.retry_after:
+            delay = max(delay, failure.retry_after)
+        return delay
+
+    def backoff(self, attempts: int) -> float:
+        """Jittered exponential delay after `attempts` failed deliveries"""
+        ceiling = min(self.config.max_delay, self.config.base_delay * 2 ** (attempts - 1))
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
@@ -1,132 +1,365 @@
+import hashlib
 import requests
 import time
-from bs4 import BeautifulSoup
-from typing import Optional
+from typing import Mapping, NamedTuple, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
 from config.settings import ScrapingConfig
-from models.article import ScrapedContent
+from core.archive import get_archive
+from core.extractors import (
+    NO_CONTENT,
+    NO_TITLE,
+    BeautifulSoupExtractor,
+    Extractor,
+    IncrementalParse,
+    get_extractor,
+)
+from core.rate_limiter import HostRateLimiter, parse_retry_after
+from core.retry import PARSE, PERMANENT, TRANSIENT, UNREACHABLE, classify_status
+from models.article import FetchFailure, FetchValidators, ScrapedContent
 from utils.logger import logger
+from utils.metrics import FETCH_ABORTED_TOTAL, FETCH_SECONDS, PARSE_SECONDS
+from utils.urls import get_host
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Bodies are read and parsed in blocks of this size
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Request errors that will fail the same way every time
+PERMANENT_REQUEST_ERRORS = (
+    requests.exceptions.URLRequired,
+    requests.exceptions.MissingSchema,
+    requests.exceptions.InvalidSchema,
+    requests.exceptions.InvalidURL,
+    requests.exceptions.TooManyRedirects,
+)
+
+# Request errors that mean the host did not answer at all (ConnectTimeout is both)
+UNREACHABLE_REQUEST_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+class UnsupportedContentError(Exception):
+    """The response is not a page we can extract from; retrying will not help"""
+
+class FetchedPage(NamedTuple):
+    status: int
+    headers: Mapping[str, str]
+    body: Optional[bytes]  # None for a 304
+    parse: Optional[IncrementalParse] = None
+
+class BodyReader:
+    """Collects a response body, at most `max_bytes` of it.
+    
+    Full blocks go to an incremental parse when the extractor offers one, and
+    reading stops as soon as it is settled. Blocks are cut here rather than by
+    the network, so the stopping point, and the content hash of what was read,
+    is the same on every fetch of an unchanged page.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        max_bytes: int,
+        extractor: Optional[Extractor] = None,
+        block_size: int = STREAM_BLOCK_SIZE
+    ):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.extractor = extractor
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.parse: Optional[IncrementalParse] = None
+        self._fed = 0
+    
+    @property
+    def feeding(self) -> bool:
+        """Whether added chunks may still go to an incremental parse"""
+        return self.extractor is not None
+    
+    def add(self, chunk: bytes) -> bool:
+        """Append a chunk, returns True once the rest of the body is not needed"""
+        self.buffer += chunk
+        if self.max_bytes and len(self.buffer) > self.max_bytes:
+            del self.buffer[self.max_bytes:]
+            logger.warning(f"Body of {self.url} exceeds {self.max_bytes} bytes, keeping the start")
+            FETCH_ABORTED_TOTAL.labels("size_cap").inc()
+            self._feed(final=True)
+            return True
+        if self._feed():
+            logger.debug(f"Stopped reading {self.url} after {len(self.buffer)} bytes")
+            FETCH_ABORTED_TOTAL.labels("early_stop").inc()
+            return True
+        return False
+    
+    def finish(self) -> bytes:
+        """The body read so far, once the response is exhausted or abandoned"""
+        if self.parse is not None:
+            self._feed(final=True)
+        return bytes(self.buffer)
+    
+    def _feed(self, final: bool = False) -> bool:
+        """Pass whole blocks, and if final the remainder, to the incremental parse"""
+        while self.extractor is not None:
+            block = bytes(self.buffer[self._fed:self._fed + self.block_size])
+            if not block or (len(block) < self.block_size and not final):
+                return False
+            try:
+                if self.parse is None:
+                    # Bodies that end within the first block are simply parsed whole
+                    self.parse = None if final else self.extractor.incremental(block)
+                    if self.parse is None:
+                        self.extractor = None
+                        return False
+                settled = self.parse.feed(block)
+            except Exception as e:
+                logger.debug(f"Incremental parse of {self.url} failed, reading it whole: {e}")
+                self.extractor = None
+                self.parse = None
+                return False
+            self._fed += len(block)
+            if settled:
+                del self.buffer[self._fed:]
+                return True
+        return False
 
 class Scraper:
     def __init__(self, config: ScrapingConfig):
         self.config = config
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.rate_limiter = HostRateLimiter(config.host_rate, config.host_burst)
+        self.extractor = get_extractor(config.parser, config.max_content_length)
+        self.fallback_extractor = BeautifulSoupExtractor(config.max_content_length)
+        self.archive = get_archive(config)
     
-    def scrape(self, url: str) -> Optional[ScrapedContent]:
-        """Scrape title and content from a URL"""
-        for attempt in range(self.config.max_retries):
-            try:
-                logger.info(f"Scraping {url} (attempt {attempt + 1})")
-                
-                response = self._fetch_with_timeout(url)
-                if not response:
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                title = self._extract_title(soup, url)
-                content = self._extract_content(soup)
-                
-                if title and content:
-                    scraped_content = ScrapedContent(
-                        title=title,
-                        content=content,
-                        scraped_at=datetime.utcnow()
-                    )
-                    logger.info(f"Successfully scraped {url}")
-                    return scraped_content
-                else:
-                    logger.warning(f"Could not extract title or content from {url}")
-                
-            except Exception as e:
-                logger.error(f"Scraping attempt {attempt + 1} failed for {url}: {e}")
-                
-                if attempt < self.config.max_retries - 1:
-                    time.sleep(self.config.delay_between_requests * (attempt + 1))
-        
-        logger.error(f"All scraping attempts failed for {url}")
-        return None
+    def close(self) -> None:
+        """Close the HTTP session and the current archive segment"""
+        self.session.close()
+        if self.archive is not None:
+            self.archive.close()
     
-    def _fetch_with_timeout(self, url: str) -> Optional[requests.Response]:
-        """Fetch URL with timeout and error handling"""
+    def scrape(
+        self, url: str, validators: Optional[FetchValidators] = None
+    ) -> ScrapedContent:
+        """Scrape title and content from a URL, in a single attempt.
+        With validators from a previous fetch, an unchanged page is not parsed again.
+        Failures come back classified (see ScrapedContent.failure); retrying them is
+        left to the consumer's retry queue, so no worker ever sleeps on a backoff."""
         try:
-            response = self.session.get(
-                url, 
-                timeout=self.config.timeout,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch {url}: {e}")
-            return None
-    
-    def _extract_title(self, soup: BeautifulSoup, url: str) -> Optional[str]:
-        """Extract title using multiple strategies"""
-        # Strategy 1: <title> tag
-        title_tag = soup.find('title')
-        if title_tag and title_tag.string:
-            title = title_tag.string.strip()
-            if title:
-                return title
+            logger.info(f"Scraping {url}")
+            self._wait_for_host(url)
+            with FETCH_SECONDS.time():
+                page = self._fetch_with_timeout(url, validators)
+        except Exception as e:
+            return self._failed(url, self._classify_failure(e))
         
-        # Strategy 2: h1 tag
-        h1_tag = soup.find('h1')
-        if h1_tag and h1_tag.get_text():
-            title = h1_tag.get_text().strip()
-            if title:
-                return title
+        fresh = self._response_validators(page.headers, page.body, validators)
+        if self._is_unchanged(url, page.body, fresh, validators):
+            return ScrapedContent.unchanged(fresh)
+        self._archive_page(url, page, fresh)
         
-        # Strategy 3: og:title meta tag
-        og_title = soup.find('meta', property='og:title')
-        if og_title and og_title.get('content'):
-            title = og_title['content'].strip()
-            if title:
-                return title
-        
-        logger.warning(f"Could not extract title from {url}")
-        return "No Title Found"
-    
-    def _extract_content(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract main content using multiple strategies"""
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Strategy 1: Look for common article containers
-        content_selectors = [
-            'article',
-            '[class*="content"]',
-            '[class*="article"]',
-            '[class*="post"]',
-            'main',
-            '.entry-content',
-            '#content'
-        ]
+        try:
+            scraped_content = self._parse(page.body, url, page.parse)
+        except Exception as e:
+            return self._failed(url, FetchFailure(PARSE, f"Extraction failed: {e}"))
+        if not scraped_content:
+            return self._failed(url, FetchFailure(PARSE, "Could not extract title or content"))
         
-        for selector in content_selectors:
-            elements = soup.select(selector)
-            if elements:
-                content = elements[0].get_text(strip=True)
-                if len(content) > 100:  # Minimum content length
-                    return content[:2000]  # Limit content length
+        scraped_content.validators = fresh
+        logger.info(f"Successfully scraped {url}")
+        return scraped_content
+    
+    def _archive_page(self, url: str, page: FetchedPage, validators: FetchValidators) -> None:
+        """Keep the raw response for offline re-extraction, if archiving is on"""
+        if self.archive is not None:
+            self.archive.write(url, page.status, page.headers, page.body, validators.content_hash)
+    
+    def _failed(self, url: str, failure: FetchFailure) -> ScrapedContent:
+        logger.error(f"Scraping {url} failed ({failure.kind}): {failure.error}")
+        return ScrapedContent.failed(failure)
+    
+    def _classify_failure(self, error: Exception) -> FetchFailure:
+        """Failure kind of an exception raised while fetching"""
+        if isinstance(error, UnsupportedContentError):
+            return FetchFailure(PERMANENT, str(error))
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return self._status_failure(
+                error.response.status_code, error.response.headers, str(error)
+            )
+        if isinstance(error, PERMANENT_REQUEST_ERRORS):
+            return FetchFailure(PERMANENT, str(error))
+        if isinstance(error, UNREACHABLE_REQUEST_ERRORS):
+            return FetchFailure(UNREACHABLE, str(error))
+        # Broken chunked bodies, decoding errors, ...
+        return FetchFailure(TRANSIENT, str(error))
+    
+    def _status_failure(
+        self, status: int, headers: Mapping[str, str], error: str
+    ) -> FetchFailure:
+        """Failure for an HTTP error status, with the server's Retry-After if it sent one"""
+        return FetchFailure(
+            classify_status(status), error, parse_retry_after(headers.get('Retry-After'))
+        )
+    
+    def _parse(
+        self, html: bytes, url: str, incremental: Optional[IncrementalParse] = None
+    ) -> Optional[ScrapedContent]:
+        """Parse a fetched page into title and content, finishing an incremental parse if given"""
+        try:
+            with PARSE_SECONDS.labels(self.extractor.name).time():
+                if incremental is not None:
+                    title, content = incremental.extract(url)
+                else:
+                    title, content = self.extractor.extract(html, url)
+        except Exception as e:
+            if self.extractor.name == self.fallback_extractor.name:
+                raise
+            logger.warning(
+                f"{self.extractor.name} extraction failed for {url}, "
+                f"falling back to {self.fallback_extractor.name}: {e}"
+            )
+            with PARSE_SECONDS.labels(self.fallback_extractor.name).time():
+                title, content = self.fallback_extractor.extract(html, url)
         
-        # Strategy 2: Get all paragraph text
-        paragraphs = soup.find_all('p')
-        if paragraphs:
-            content = ' '.join([p.get_text(strip=True) for p in paragraphs])
-            if len(content) > 100:
-                return content[:2000]
+        # Placeholders on both counts mean nothing was extracted at all
+        if title != NO_TITLE or content != NO_CONTENT:
+            return ScrapedContent(
+                title=title,
+                content=content,
+                scraped_at=datetime.utcnow()
+            )
         
-        # Strategy 3: Get body text as fallback
-        body = soup.find('body')
-        if body:
-            content = body.get_text(strip=True)
-            if len(content) > 100:
-                return content[:2000]
+        logger.warning(f"Could not extract title or content from {url}")
+        return None
+    
+    def _fetch_with_timeout(
+        self, url: str, validators: Optional[FetchValidators] = None
+    ) -> FetchedPage:
+        """Fetch URL with timeout, streaming at most max_body_bytes; errors are raised"""
+        with self.session.get(
+            url, 
+            headers=self._conditional_headers(validators),
+            timeout=self.config.timeout,
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            if response.status_code == 429:
+                self._back_off_host(url, response.headers.get('Retry-After'))
+            response.raise_for_status()
+            if response.status_code == 304:
+                return FetchedPage(response.status_code, response.headers, None)
+            
+            self._check_content_type(response.headers)
+            reader = self._body_reader(url)
+            for chunk in response.iter_content(STREAM_BLOCK_SIZE):
+                if reader.add(chunk):
+                    break
+            return FetchedPage(
+                response.status_code, response.headers, reader.finish(), reader.parse
+            )
+    
+    def _check_content_type(self, headers: Mapping[str, str]) -> None:
+        """Refuse bodies we do not extract from; a missing Content-Type is allowed"""
+        content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        accepted = self.config.content_types
+        if content_type and accepted and content_type not in accepted:
+            FETCH_ABORTED_TOTAL.labels("content_type").inc()
+            raise UnsupportedContentError(f"Content-Type {content_type} is not accepted")
+    
+    def _body_reader(self, url: str) -> BodyReader:
+        # Archived pages are read whole, so that later extractors see all of them
+        early_stop = self.config.early_stop and self.archive is None
+        extractor = self.extractor if early_stop else None
+        return BodyReader(url, self.config.max_body_bytes, extractor)
+    
+    def _conditional_headers(self, validators: Optional[FetchValidators]) -> dict:
+        """If-None-Match / If-Modified-Since headers for a refetch"""
+        headers = {}
+        if validators and self.config.conditional_fetch:
+            if validators.etag:
+                headers['If-None-Match'] = validators.etag
+            if validators.last_modified:
+                headers['If-Modified-Since'] = validators.last_modified
+        return headers
+    
+    def _response_validators(
+        self,
+        headers: Mapping[str, str],
+        body: Optional[bytes],
+        previous: Optional[FetchValidators]
+    ) -> FetchValidators:
+        """Validators for a response; a 304 (no body) keeps what it does not replace"""
+        if body is None:
+            previous = previous or FetchValidators()
+            return FetchValidators(
+                etag=headers.get('ETag') or previous.etag,
+                last_modified=headers.get('Last-Modified') or previous.last_modified,
+                content_hash=previous.content_hash
+            )
+        return FetchValidators(
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            content_hash=hashlib.blake2b(body, digest_size=16).hexdigest()
+        )
+    
+    def _is_unchanged(
+        self,
+        url: str,
+        body: Optional[bytes],
+        fresh: FetchValidators,
+        previous: Optional[FetchValidators]
+    ) -> bool:
+        """A 304, or a full response whose body hashes the same as last time"""
+        if body is None:
+            logger.info(f"Not modified: {url}")
+            return True
+        if previous and previous.content_hash and previous.content_hash == fresh.content_hash:
+            logger.info(f"Content unchanged: {url}")
+            return True
+        return False
+    
+    def _wait_for_host(self, url: str) -> None:
+        """Block until the per-host rate limit allows another request"""
+        host = get_host(url)
+        if self.config.respect_robots and not self.rate_limiter.knows_crawl_delay(host):
+            self.rate_limiter.set_crawl_delay(host, self._fetch_crawl_delay(url))
         
-        logger.warning("Could not extract meaningful content")
-        return "No content found"
+        delay = self.rate_limiter.reserve(host)
+        if delay > 0:
+            logger.debug(f"Rate limiting {host}: waiting {delay:.2f}s")
+            time.sleep(delay)
+    
+    def _back_off_host(self, url: str, retry_after: Optional[str]) -> None:
+        """Pause a host that answered 429, honouring Retry-After when given"""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.config.delay_between_requests * self.config.max_retries
+        self.rate_limiter.penalize(get_host(url), delay)
+    
+    def _fetch_crawl_delay(self, url: str) -> Optional[float]:
+        """Read Crawl-delay for our user agent from the host's robots.txt"""
+        robots_url = self._robots_url(url)
+        try:
+            response = self.session.get(robots_url, timeout=self.config.timeout)
+            if response.status_code != 200:
+                return None
+            return self._parse_crawl_delay(response.text)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Could not fetch {robots_url}: {e}")
+            return None
+    
+    def _robots_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}/robots.txt"
+    
+    def _parse_crawl_delay(self, robots_txt: str) -> Optional[float]:
+        parser = RobotFileParser()
+        parser.parse(robots_txt.splitlines())
+        delay = parser.crawl_delay(DEFAULT_HEADERS['User-Agent'])
+        return float(delay) if delay is not None else None
@@ -0,0 +1,459 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple, Union
+from config.settings import RedisConfig
+from core.redis_handler import (
+    RELIABLE_POLL_MAX,
+    RELIABLE_POLL_MIN,
+    AsyncRedisHandler,
+    RedisHandler,
+)
+from models.article import ArticleTask, FetchFailure
+from utils.logger import logger
+from utils.urls import get_host
+
+# Points per shard on the hash ring; more points spread hosts more evenly
+RING_REPLICAS = 100
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring of shard numbers.
+
+    Changing the number of shards moves only the hosts whose ring segment
+    changed owner, about 1/shards of them, instead of nearly all of them as
+    `hash(host) % shards` would.
+    """
+
+    def __init__(self, shards: int, replicas: int = RING_REPLICAS):
+        points = sorted(
+            (_hash(f"shard-{shard}-{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[index]
+
+
+def split_shards(shards: int, workers: int, index: int) -> List[int]:
+    """Shards owned by worker `index` of a pool, so each shard has one owner"""
+    if workers >= shards:
+        return [index % shards]
+    return list(range(index % workers, shards, workers))
+
+
+def _parse_node(node: str, default_port: int) -> Tuple[str, int]:
+    host, _, port = node.rpartition(":")
+    if not host:
+        return port, default_port
+    return host, int(port)
+
+
+class ShardedRedisHandler:
+    """RedisHandler over `shards` queues spread across one or more Redis nodes.
+
+    Tasks are routed by the host of their URL on a consistent hash ring, so all
+    tasks of a host share one shard and keep their order there. Each shard is
+    an ordinary RedisHandler queue (priorities, reliable mode, retries) named
+    `<queue>:shard<n>`; shard n lives on node n modulo the node count. Consumers
+    pop from their owned shards first and, with `steal`, from the others once
+    those are empty. Dedup, validator and circuit state stay on the first node.
+    """
+
+    handler_class = RedisHandler
+
+    def __init__(self, config: RedisConfig):
+        self.config = config
+        self.ring = HashRing(config.shards)
+        self.shards = self._create_shards()
+        self.client = self.shards[0].client
+        # One consumer id and one lease per node for all shards, so a pop or ack on
+        # any shard of a node keeps every task we hold there from being reaped
+        self.consumer_id = self.shards[0].consumer_id
+        for shard in self.shards:
+            shard.consumer_id = self.consumer_id
+            shard.lease_prefix = config.queue_name
+        self._next_renewal = 0.0
+        self._by_name = {shard.config.queue_name: shard for shard in self.shards}
+        self._name_length = len(self.shards[0].config.queue_name)
+        owned = [i for i in config.owned_shards if 0 <= i < config.shards]
+        self._owned = owned or list(range(config.shards))
+        self._others = [i for i in range(config.shards) if i not in self._owned]
+        self._cursor = 0
+        logger.info(
+            f"Sharded queue: {config.shards} shards on {len(self._nodes())} nodes, "
+            f"owning {len(self._owned)}"
+        )
+
+    def _nodes(self) -> List[Tuple[str, int]]:
+        nodes = self.config.shard_nodes or [f"{self.config.host}:{self.config.port}"]
+        return [_parse_node(node, self.config.port) for node in nodes]
+
+    def _create_shards(self) -> List[RedisHandler]:
+        """One handler per shard; shards on the same node share its client"""
+        nodes = self._nodes()
+        width = len(str(max(self.config.shards - 1, 0)))
+        clients: Dict[int, object] = {}
+        shards = []
+        for index in range(self.config.shards):
+            node = index % len(nodes)
+            host, port = nodes[node]
+            shard_config = replace(
+                self.config,
+                host=host,
+                port=port,
+                queue_name=f"{self.config.queue_name}:shard{index:0{width}d}",
+                shards=1,
+            )
+            shard = self.handler_class(shard_config, clients.get(node))
+            clients.setdefault(node, shard.client)
+            shards.append(shard)
+        return shards
+
+    def _node_shards(self) -> List[List[RedisHandler]]:
+        """Shards grouped by the client they share"""
+        grouped: Dict[int, List[RedisHandler]] = {}
+        for shard in self.shards:
+            grouped.setdefault(id(shard.client), []).append(shard)
+        return list(grouped.values())
+
+    def _node_batches(self, tasks: List[ArticleTask]):
+        """Tasks grouped by node, then by shard: (node client, [(shard, tasks)])"""
+        grouped: Dict[int, Tuple[object, List[Tuple[RedisHandler, List[ArticleTask]]]]] = {}
+        for index, shard_tasks in self._group_by_shard(tasks).items():
+            shard = self.shards[index]
+            node = grouped.setdefault(id(shard.client), (shard.client, []))
+            node[1].append((shard, shard_tasks))
+        return list(grouped.values())
+
+    @staticmethod
+    def _push_commands(pipe, batches: List[Tuple[RedisHandler, List[ArticleTask]]]) -> int:
+        count = 0
+        for shard, shard_tasks in batches:
+            for key, serialized_tasks in shard._group_by_queue(shard_tasks).items():
+                pipe.lpush(key, *serialized_tasks)
+            count += len(shard_tasks)
+        return count
+
+    def shard_for(self, url: str) -> int:
+        return self.ring.shard_for(get_host(url))
+
+    def _route(self, task: ArticleTask) -> RedisHandler:
+        """Shard a popped task came from (by its receipt), else the shard of its host"""
+        if task.receipt is not None:
+            shard = self._by_name.get(task.receipt[0][:self._name_length])
+            if shard is not None:
+                return shard
+        return self.shards[self.shard_for(task.url)]
+
+    def _group_by_shard(self, tasks: List[ArticleTask]) -> Dict[int, List[ArticleTask]]:
+        grouped: Dict[int, List[ArticleTask]] = {}
+        for task in tasks:
+            grouped.setdefault(self.shard_for(task.url), []).append(task)
+        return grouped
+
+    def _lease_renewal_due(self) -> bool:
+        """Whether to renew our lease on every node, a third of a visibility timeout
+        after the last renewal"""
+        if not self.config.reliable:
+            return False
+        now = time.monotonic()
+        if now < self._next_renewal:
+            return False
+        self._next_renewal = now + self.config.visibility_timeout / 3
+        return True
+
+    def _renew_leases(self) -> None:
+        """Keep our lease alive on every node, not only on the one just popped from
+        or acked on: tasks stolen from another node can wait in the dispatch window
+        while we keep popping from our own shards"""
+        if not self._lease_renewal_due():
+            return
+        for shards in self._node_shards():
+            shard = shards[0]
+            try:
+                shard.client.set(
+                    shard.lease_key, self.consumer_id, ex=self.config.visibility_timeout
+                )
+            except Exception as e:
+                logger.warning(f"Failed to renew consumer lease: {e}")
+
+    def _pop_order(self) -> List[RedisHandler]:
+        """Owned shards, starting from a rotating one, then the rest if stealing"""
+        self._cursor = (self._cursor + 1) % len(self._owned)
+        order = self._owned[self._cursor:] + self._owned[:self._cursor]
+        if self.config.steal:
+            order += self._others
+        return [self.shards[i] for i in order]
+
+    def push_task(self, task: ArticleTask) -> bool:
+        """Push a task to the queue of its host's shard"""
+        return self.shards[self.shard_for(task.url)].push_task(task)
+
+    def push_tasks(self, tasks: List[ArticleTask]) -> int:
+        """Push a batch of tasks with one round trip per node, returns the number pushed"""
+        pushed = 0
+        for client, batches in self._node_batches(tasks):
+            pipe = client.pipeline(transaction=False)
+            count = self._push_commands(pipe, batches)
+            try:
+                pipe.execute()
+                pushed += count
+            except Exception as e:
+                logger.error(f"Failed to push batch of {count} tasks: {e}")
+        return pushed
+
+    def pop_task(self, timeout: int = 5) -> Optional[ArticleTask]:
+        tasks = self.pop_tasks(1, timeout)
+        return tasks[0] if tasks else None
+
+    def pop_tasks(self, count: int, timeout: int = 5) -> List[ArticleTask]:
+        """Pop up to `count` tasks, visiting shards until enough were found.
+        Blocking cannot span nodes, so an empty queue is polled until `timeout`."""
+        deadline = time.monotonic() + max(timeout, 0)
+        delay = RELIABLE_POLL_MIN
+        while True:
+            tasks = []
+            for shard in self._pop_order():
+                tasks += shard.pop_tasks(count - len(tasks), timeout=0)
+                if len(tasks) >= count:
+                    break
+            self._renew_leases()
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                return tasks
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, RELIABLE_POLL_MAX)
+
+    def ack_task(self, task: ArticleTask) -> bool:
+        acked = self._route(task).ack_task(task)
+        self._renew_leases()
+        return acked
+
+    def return_tasks(self, tasks: List[ArticleTask]) -> int:
+        returned = 0
+        for shard, shard_tasks in self._group_by_shard(tasks).items():
+            returned += self.shards[shard].return_tasks(shard_tasks)
+        return returned
+
+    def requeue_expired(self) -> int:
+        """Re-queue in-flight tasks of expired consumers, scanning each node once"""
+        requeued = 0
+        pattern = f"{self.config.queue_name}:shard*:processing:*"
+        for shards in self._node_shards():
+            try:
+                for processing_key in shards[0].client.scan_iter(match=pattern):
+                    shard = self._by_name.get(processing_key[:self._name_length])
+                    if shard is not None:
+                        requeued += shard.requeue_if_expired(processing_key)
+            except Exception as e:
+                logger.error(f"Failed to re-queue expired tasks: {e}")
+        return requeued
+
+    def release_in_flight(self) -> int:
+        return sum(shard.release_in_flight() for shard in self.shards)
+
+    def schedule_retry(
+        self, task: ArticleTask, delay: float, count_attempt: bool = True
+    ) -> bool:
+        return self._route(task).schedule_retry(task, delay, count_attempt)
+
+    def dead_letter(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        return self._route(task).dead_letter(task, failure)
+
+    def promote_due_retries(self) -> int:
+        return sum(shard.promote_due_retries() for shard in self.shards)
+
+    def get_retry_lengths(self) -> Dict[str, int]:
+        return self._sum_lengths([shard.get_retry_lengths() for shard in self.shards])
+
+    def get_queue_length(self, priority: Optional[str] = None) -> int:
+        """Get current queue length across all shards, in total or for one priority"""
+        lengths = self.get_queue_lengths()
+        if priority is not None:
+            return lengths.get(priority, 0)
+        return sum(lengths.values())
+
+    def get_queue_lengths(self) -> Dict[str, int]:
+        """Queue depth per priority summed over the shards, one round trip per node"""
+        totals = []
+        for shards in self._node_shards():
+            try:
+                pipe = shards[0].client.pipeline(transaction=False)
+                for shard in shards:
+                    for key in shard._queue_keys():
+                        pipe.llen(key)
+                totals += self._node_lengths(shards, pipe.execute())
+            except Exception as e:
+                logger.error(f"Failed to get queue length: {e}")
+                return {}
+        return self._sum_lengths(totals)
+
+    @staticmethod
+    def _node_lengths(shards: List[RedisHandler], lengths: List[int]) -> List[Dict[str, int]]:
+        """Split one node's LLEN replies into per-shard depths by priority"""
+        per_shard = []
+        for shard in shards:
+            keys = len(shard._queue_keys())
+            per_shard.append(shard._lengths_by_priority(lengths[:keys]))
+            lengths = lengths[keys:]
+        return per_shard
+
+    @staticmethod
+    def _sum_lengths(lengths: List[Dict[str, int]]) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for shard_lengths in lengths:
+            for key, value in shard_lengths.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def clear_queue(self) -> bool:
+        return all([shard.clear_queue() for shard in self.shards])
+
+
+class AsyncShardedRedisHandler(ShardedRedisHandler):
+    """asyncio counterpart of ShardedRedisHandler for the async consumer"""
+
+    handler_class = AsyncRedisHandler
+
+    async def connect(self) -> None:
+        """Test the connection to every node"""
+        for shards in self._node_shards():
+            await shards[0].connect()
+
+    async def close(self) -> None:
+        for shards in self._node_shards():
+            await shards[0].close()
+
+    async def push_task(self, task: ArticleTask) -> bool:
+        return await self.shards[self.shard_for(task.url)].push_task(task)
+
+    async def push_tasks(self, tasks: List[ArticleTask]) -> int:
+        pushed = 0
+        for client, batches in self._node_batches(tasks):
+            pipe = client.pipeline(transaction=False)
+            count = self._push_commands(pipe, batches)
+            try:
+                await pipe.execute()
+                pushed += count
+            except Exception as e:
+                logger.error(f"Failed to push batch of {count} tasks: {e}")
+        return pushed
+
+    async def pop_task(self, timeout: int = 5) -> Optional[ArticleTask]:
+        tasks = await self.pop_tasks(1, timeout)
+        return tasks[0] if tasks else None
+
+    async def pop_tasks(self, count: int, timeout: int = 5) -> List[ArticleTask]:
+        deadline = time.monotonic() + max(timeout, 0)
+        delay = RELIABLE_POLL_MIN
+        while True:
+            tasks = []
+            for shard in self._pop_order():
+                tasks += await shard.pop_tasks(count - len(tasks), timeout=0)
+                if len(tasks) >= count:
+                    break
+            await self._renew_leases()
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                return tasks
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, RELIABLE_POLL_MAX)
+
+    async def ack_task(self, task: ArticleTask) -> bool:
+        acked = await self._route(task).ack_task(task)
+        await self._renew_leases()
+        return acked
+
+    async def _renew_leases(self) -> None:
+        if not self._lease_renewal_due():
+            return
+        for shards in self._node_shards():
+            shard = shards[0]
+            try:
+                await shard.client.set(
+                    shard.lease_key, self.consumer_id, ex=self.config.visibility_timeout
+                )
+            except Exception as e:
+                logger.warning(f"Failed to renew consumer lease: {e}")
+
+    async def return_tasks(self, tasks: List[ArticleTask]) -> int:
+        returned = 0
+        for shard, shard_tasks in self._group_by_shard(tasks).items():
+            returned += await self.shards[shard].return_tasks(shard_tasks)
+        return returned
+
+    async def requeue_expired(self) -> int:
+        requeued = 0
+        pattern = f"{self.config.queue_name}:shard*:processing:*"
+        for shards in self._node_shards():
+            try:
+                async for processing_key in shards[0].client.scan_iter(match=pattern):
+                    shard = self._by_name.get(processing_key[:self._name_length])
+                    if shard is not None:
+                        requeued += await shard.requeue_if_expired(processing_key)
+            except Exception as e:
+                logger.error(f"Failed to re-queue expired tasks: {e}")
+        return requeued
+
+    async def release_in_flight(self) -> int:
+        return sum([await shard.release_in_flight() for shard in self.shards])
+
+    async def schedule_retry(
+        self, task: ArticleTask, delay: float, count_attempt: bool = True
+    ) -> bool:
+        return await self._route(task).schedule_retry(task, delay, count_attempt)
+
+    async def dead_letter(self, task: ArticleTask, failure: FetchFailure) -> bool:
+        return await self._route(task).dead_letter(task, failure)
+
+    async def promote_due_retries(self) -> int:
+        return sum([await shard.promote_due_retries() for shard in self.shards])
+
+    async def get_retry_lengths(self) -> Dict[str, int]:
+        return self._sum_lengths([await shard.get_retry_lengths() for shard in self.shards])
+
+    async def get_queue_length(self, priority: Optional[str] = None) -> int:
+        lengths = await self.get_queue_lengths()
+        if priority is not None:
+            return lengths.get(priority, 0)
+        return sum(lengths.values())
+
+    async def get_queue_lengths(self) -> Dict[str, int]:
+        totals = []
+        for shards in self._node_shards():
+            try:
+                pipe = shards[0].client.pipeline(transaction=False)
+                for shard in shards:
+                    for key in shard._queue_keys():
+                        pipe.llen(key)
+                totals += self._node_lengths(shards, await pipe.execute())
+            except Exception as e:
+                logger.error(f"Failed to get queue length: {e}")
+                return {}
+        return self._sum_lengths(totals)
+
+
+def get_redis_handler(config: RedisConfig) -> Union[RedisHandler, ShardedRedisHandler]:
+    """Queue handler for the configuration: sharded when REDIS_QUEUE_SHARDS > 1"""
+    if config.shards > 1:
+        return ShardedRedisHandler(config)
+    return RedisHandler(config)
+
+
+def get_async_redis_handler(
+    config: RedisConfig,
+) -> Union[AsyncRedisHandler, AsyncShardedRedisHandler]:
+    if config.shards > 1:
+        return AsyncShardedRedisHandler(config)
+    return AsyncRedisHandler(config)
@@ -0,0 +1,286 @@
+import multiprocessing as mp
+import signal
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+from config.settings import Settings
+from core.autoscaler import AutoscalePolicy, ScalingSample
+from utils.logger import logger
+
+# Restart backoff for workers that keep crashing right after start
+MIN_RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+HEALTHY_UPTIME = 60.0
+STATS_INTERVAL = 30.0
+
+
+def _run_worker(settings: Settings, processed, failed, busy_seconds, use_async: bool) -> None:
+    """Worker process entry point: run one consumer loop and report results"""
+
+    def on_result(success: bool, seconds: float) -> None:
+        counter = processed if success else failed
+        with counter.get_lock():
+            counter.value += 1
+        with busy_seconds.get_lock():
+            busy_seconds.value += seconds
+
+    if use_async:
+        from core.async_consumer import AsyncConsumer
+
+        AsyncConsumer(settings, on_result=on_result).start_consuming()
+    else:
+        from core.consumer import Consumer
+
+        Consumer(settings, on_result=on_result).start_consuming()
+
+
+@dataclass
+class WorkerSlot:
+    """A supervised worker and the counters that survive its restarts"""
+    index: int
+    processed: object
+    failed: object
+    busy_seconds: object
+    process: Optional[mp.Process] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    restart_delay: float = MIN_RESTART_DELAY
+    restart_at: float = 0.0
+    # Inactive slots were scaled down: their process is drained and not restarted
+    active: bool = True
+    stop_deadline: float = 0.0
+
+
+class Supervisor:
+    """Runs a pool of consumer processes so parsing uses every core.
+
+    With `autoscale`, the pool is resized between AUTOSCALE_MIN_WORKERS and
+    AUTOSCALE_MAX_WORKERS from the queue depth, drain rate and per-task latency.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        workers: int = None,
+        use_async: bool = False,
+        autoscale: bool = False,
+    ):
+        self.settings = settings
+        self.use_async = use_async
+        self.autoscale = autoscale
+        self.running = False
+        # spawn keeps workers free of inherited sockets and works on Windows
+        self.ctx = mp.get_context("spawn")
+        if autoscale:
+            slots_per_worker = settings.consumer.concurrency if use_async else 1
+            self.policy = AutoscalePolicy(settings.autoscale, slots_per_worker)
+            self.workers = self.policy.clamp(workers or settings.autoscale.min_workers)
+        else:
+            self.workers = workers or settings.consumer.workers
+        self.slots: List[WorkerSlot] = [self._new_slot(i) for i in range(self.workers)]
+
+        signal.signal(signal.SIGINT, self._signal_handler)
+        signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def run(self) -> None:
+        """Start the workers and keep them alive until a shutdown signal"""
+        self.running = True
+        logger.info(f"Supervisor starting {self.workers} consumer workers")
+
+        for slot in self.slots:
+            self._start_worker(slot)
+
+        if self.autoscale:
+            from core.sharded_queue import get_redis_handler
+
+            self.redis_handler = get_redis_handler(self.settings.redis)
+            self._last_totals = self._totals()
+
+        last_stats = last_scale = time.monotonic()
+        while self.running:
+            time.sleep(1)
+            for slot in self.slots:
+                self._check_worker(slot)
+
+            elapsed = time.monotonic() - last_scale
+            if self.autoscale and elapsed >= self.settings.autoscale.interval:
+                self._autoscale(elapsed)
+                last_scale = time.monotonic()
+
+            if time.monotonic() - last_stats >= STATS_INTERVAL:
+                logger.info(f"Supervisor stats: {self.get_stats()}")
+                last_stats = time.monotonic()
+
+        self._drain()
+        logger.info(f"Supervisor stopped. Final stats: {self.get_stats()}")
+
+    def _new_slot(self, index: int) -> WorkerSlot:
+        return WorkerSlot(
+            index=index,
+            processed=self.ctx.Value("i", 0),
+            failed=self.ctx.Value("i", 0),
+            busy_seconds=self.ctx.Value("d", 0.0),
+        )
+
+    def _start_worker(self, slot: WorkerSlot) -> None:
+        """Spawn the process for a slot"""
+        settings = self.settings
+        if settings.consumer.metrics_port:
+            # One metrics endpoint per worker on consecutive ports
+            consumer = replace(
+                settings.consumer, metrics_port=settings.consumer.metrics_port + slot.index
+            )
+            settings = replace(settings, consumer=consumer)
+        if settings.redis.shards > 1 and not settings.redis.owned_shards and not self.autoscale:
+            from core.sharded_queue import split_shards
+
+            # Give each shard one owning worker, so a host's tasks stay in one process
+            owned = split_shards(settings.redis.shards, self.workers, slot.index)
+            settings = replace(settings, redis=replace(settings.redis, owned_shards=owned))
+        slot.process = self.ctx.Process(
+            target=_run_worker,
+            args=(settings, slot.processed, slot.failed, slot.busy_seconds, self.use_async),
+            name=f"consumer-{slot.index}",
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.info(f"Started worker {slot.index} (pid {slot.process.pid})")
+
+    def _check_worker(self, slot: WorkerSlot) -> None:
+        """Restart a worker that exited, backing off if it keeps crashing"""
+        if not slot.active:
+            self._check_stopping(slot)
+            return
+
+        if slot.process is None:
+            if time.monotonic() >= slot.restart_at:
+                slot.restarts += 1
+                self._start_worker(slot)
+            return
+
+        if slot.process.is_alive():
+            return
+
+        exitcode = slot.process.exitcode
+        uptime = time.monotonic() - slot.started_at
+        slot.process = None
+        logger.warning(
+            f"Worker {slot.index} exited with code {exitcode} after {uptime:.0f}s, restarting"
+        )
+
+        if uptime >= HEALTHY_UPTIME:
+            slot.restart_delay = MIN_RESTART_DELAY
+        slot.restart_at = time.monotonic() + slot.restart_delay
+        slot.restart_delay = min(slot.restart_delay * 2, MAX_RESTART_DELAY)
+
+    def _check_stopping(self, slot: WorkerSlot) -> None:
+        """Reap a scaled-down worker, killing it if it outlives the drain timeout"""
+        if slot.process is None:
+            return
+        if slot.process.is_alive():
+            if time.monotonic() >= slot.stop_deadline:
+                logger.warning(f"Worker {slot.index} did not stop in time, killing")
+                slot.process.kill()
+            return
+        slot.process.join()
+        slot.process = None
+        logger.info(f"Worker {slot.index} stopped")
+
+    def _autoscale(self, interval: float) -> None:
+        """Resize the pool to what the queue needs for the next interval"""
+        # Due retries would otherwise wait for a worker that may not be running
+        self.redis_handler.promote_due_retries()
+        queue_lengths = self.redis_handler.get_queue_lengths()
+        if not queue_lengths:
+            return
+
+        completed, busy_seconds = self._totals()
+        sample = ScalingSample(
+            queue_length=sum(queue_lengths.values()),
+            completed=completed - self._last_totals[0],
+            busy_seconds=busy_seconds - self._last_totals[1],
+            interval=interval,
+        )
+        self._last_totals = (completed, busy_seconds)
+
+        active = [slot for slot in self.slots if slot.active]
+        desired = self.policy.desired(len(active), sample)
+        if desired == len(active):
+            return
+        logger.info(
+            f"Scaling consumers {len(active)} -> {desired} (queue {sample.queue_length}, "
+            f"{sample.completed} tasks done in {interval:.0f}s)"
+        )
+        if desired > len(active):
+            for _ in range(desired - len(active)):
+                self._add_worker()
+        else:
+            # Newest workers go first, so the low slot numbers stay stable
+            for slot in active[desired:]:
+                self._stop_worker(slot)
+
+    def _add_worker(self) -> None:
+        """Start a worker in a free slot, reusing scaled-down slots and their ports"""
+        slot = next((s for s in self.slots if not s.active and s.process is None), None)
+        if slot is None:
+            slot = self._new_slot(len(self.slots))
+            self.slots.append(slot)
+        slot.active = True
+        slot.restart_delay = MIN_RESTART_DELAY
+        self._start_worker(slot)
+
+    def _stop_worker(self, slot: WorkerSlot) -> None:
+        """Ask a worker to finish its current task and hand back its prefetched ones"""
+        slot.active = False
+        if slot.process is not None and slot.process.is_alive():
+            slot.process.terminate()  # SIGTERM, handled by Consumer._signal_handler
+            slot.stop_deadline = time.monotonic() + self.settings.consumer.drain_timeout
+            logger.info(f"Stopping worker {slot.index} (pid {slot.process.pid})")
+
+    def _totals(self) -> Tuple[int, float]:
+        """Tasks finished and seconds spent on them, across every worker so far"""
+        completed = sum(slot.processed.value + slot.failed.value for slot in self.slots)
+        return completed, sum(slot.busy_seconds.value for slot in self.slots)
+
+    def _drain(self) -> None:
+        """Ask every worker to finish its current task, then force stragglers"""
+        alive = [s.process for s in self.slots if s.process and s.process.is_alive()]
+        logger.info(f"Draining {len(alive)} workers...")
+
+        for process in alive:
+            process.terminate()  # SIGTERM, handled by Consumer._signal_handler
+
+        deadline = time.monotonic() + self.settings.consumer.drain_timeout
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker {process.name} did not stop in time, killing")
+                process.kill()
+                process.join()
+
+    def _signal_handler(self, signum, frame):
+        """Handle shutdown signals gracefully"""
+        logger.info(f"Supervisor received signal {signum}, shutting down...")
+        self.running = False
+
+    def get_stats(self) -> dict:
+        """Aggregate processed/failed counts across workers"""
+        workers = [
+            {
+                "worker": slot.index,
+                "pid": slot.process.pid if slot.process else None,
+                "active": slot.active,
+                "alive": bool(slot.process and slot.process.is_alive()),
+                "processed": slot.processed.value,
+                "failed": slot.failed.value,
+                "restarts": slot.restarts,
+            }
+            for slot in self.slots
+        ]
+        return {
+            "processed": sum(w["processed"] for w in workers),
+            "failed": sum(w["failed"] for w in workers),
+            "restarts": sum(w["restarts"] for w in workers),
+            "active_workers": sum(w["active"] for w in workers),
+            "workers": workers,
+        }
@@ -0,0 +1,76 @@
+import json
+from typing import Optional
+from config.settings import ScrapingConfig
+from models.article import FetchValidators
+from utils.logger import logger
+from utils.urls import url_digest
+
+
+class ValidatorCache:
+    """Remembers ETag, Last-Modified and body hash per URL in Redis for conditional refetches"""
+
+    def __init__(self, client, config: ScrapingConfig, prefix: str):
+        self.client = client
+        self.config = config
+        self.prefix = f"{prefix}:validators"
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.conditional_fetch
+
+    def get(self, url: str) -> Optional[FetchValidators]:
+        """Validators of the last stored fetch of a URL, if any"""
+        if not self.enabled:
+            return None
+        try:
+            return self._decode(url, self.client.get(self._key(url)))
+        except Exception as e:
+            logger.warning(f"Failed to read validators for {url}: {e}")
+            return None
+
+    def put(self, url: str, validators: FetchValidators) -> None:
+        """Store validators once the fetched article has been saved"""
+        if not self.enabled:
+            return
+        try:
+            self.client.set(self._key(url), self._encode(validators), ex=self.config.validator_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store validators for {url}: {e}")
+
+    def _key(self, url: str) -> str:
+        return f"{self.prefix}:{url_digest(url).hex()}"
+
+    def _encode(self, validators: FetchValidators) -> str:
+        return json.dumps(validators.to_dict())
+
+    def _decode(self, url: str, raw: Optional[str]) -> Optional[FetchValidators]:
+        if not raw:
+            return None
+        try:
+            return FetchValidators.from_dict(json.loads(raw))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Ignoring malformed validators for {url}: {e}")
+            return None
+
+
+class AsyncValidatorCache(ValidatorCache):
+    """asyncio counterpart of ValidatorCache for the async consumer"""
+
+    async def get(self, url: str) -> Optional[FetchValidators]:
+        if not self.enabled:
+            return None
+        try:
+            return self._decode(url, await self.client.get(self._key(url)))
+        except Exception as e:
+            logger.warning(f"Failed to read validators for {url}: {e}")
+            return None
+
+    async def put(self, url: str, validators: FetchValidators) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.client.set(
+                self._key(url), self._encode(validators), ex=self.config.validator_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store validators for {url}: {e}")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the pipeline
+"""
+
+import argparse
+import logging
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List
+from config.settings import Settings
+from utils.logger import logger, logs_to_stderr
+
+
+def run_test(settings: Settings) -> bool:
+    """Test Redis and MongoDB connections"""
+    from core.sharded_queue import get_redis_handler
+    from core.db_handler import DBHandler
+
+    try:
+        get_redis_handler(settings.redis)
+        DBHandler(settings.mongo)
+        logger.info("✅ All connections OK")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Connection test failed: {e}")
+        return False
+
+
+def run_publisher(settings: Settings, file_path: str) -> bool:
+    """Publish articles from a file"""
+    from core.publisher import Publisher
+
+    publisher = Publisher(settings)
+    published = publisher.publish_from_file(file_path)
+    logger.info(f"Queue status: {publisher.get_queue_status()}")
+    return published > 0
+
+
+def run_consumer(settings: Settings) -> bool:
+    """Run the consumer until interrupted"""
+    from core.consumer import Consumer
+
+    Consumer(settings).start_consuming()
+    return True
+
+
+def run_async_consumer(settings: Settings) -> bool:
+    """Run the asyncio consumer until interrupted"""
+    from core.async_consumer import AsyncConsumer
+
+    AsyncConsumer(settings).start_consuming()
+    return True
+
+
+def run_supervisor(settings: Settings, use_async: bool, autoscale: bool = False) -> bool:
+    """Run a supervised pool of consumer processes until interrupted"""
+    from core.supervisor import Supervisor
+
+    Supervisor(settings, use_async=use_async, autoscale=autoscale).run()
+    return True
+
+
+def run_train_dictionary(settings: Settings, output: str, samples: int) -> bool:
+    """Train a compression dictionary for article bodies on recent stored articles"""
+    from core.content_storage import train_dictionary
+    from core.db_handler import DBHandler
+
+    articles = DBHandler(settings.mongo).get_recent_articles(samples)
+    contents = [article.content for article in articles if article.status == "completed"]
+    if not contents:
+        logger.error("❌ No completed articles to train a dictionary on")
+        return False
+
+    dictionary = train_dictionary(contents)
+    with open(output, "wb") as file:
+        file.write(dictionary)
+    logger.info(
+        f"Wrote a {len(dictionary)} byte dictionary trained on {len(contents)} articles "
+        f"to {output}; point MONGO_CONTENT_DICTIONARY at it"
+    )
+    return True
+
+
+def run_reextract(settings: Settings, archive: str) -> bool:
+    """Extract archived pages again and update their stored articles, without fetching"""
+    from core.db_handler import DBHandler
+    from core.reextract import reextract
+
+    stats = reextract(
+        archive,
+        settings.scraping,
+        DBHandler(settings.mongo),
+        settings.consumer.workers,
+        settings.mongo.bulk_size,
+    )
+    logger.info(f"Re-extraction: {stats}")
+    return stats["archived"] > 0
+
+
+def run_export(settings: Settings, args: argparse.Namespace) -> bool:
+    """Stream stored articles to a JSON lines file, gzipped for a .gz path"""
+    from core.db_handler import DBHandler
+    from core.export import export_articles
+
+    # Connection logs too, when stdout carries the articles
+    with logs_to_stderr() if args.output == "-" else nullcontext():
+        try:
+            export_articles(
+                DBHandler(settings.mongo),
+                args.output,
+                compress=args.gzip or None,
+                page_size=args.page_size,
+                since=args.since,
+                until=args.until,
+                sources=args.source,
+                categories=args.category,
+                statuses=args.status,
+                fields=args.fields,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Export failed: {e}")
+            return False
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Publisher-Consumer web scraping pipeline")
+    parser.add_argument(
+        "--mode",
+        required=True,
+        choices=[
+            "test", "publisher", "consumer", "async-consumer", "supervisor", "autoscale",
+            "train-dictionary", "reextract", "export", "both",
+        ],
+        help="Operation to run",
+    )
+    parser.add_argument("--file", help="JSON file with articles to publish")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Tasks in flight for async-consumer (overrides CONSUMER_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Processes for supervisor and reextract (overrides CONSUMER_WORKERS)",
+    )
+    parser.add_argument(
+        "--async-workers",
+        action="store_true",
+        help="Run the asyncio consumer in each supervisor or autoscale worker",
+    )
+    parser.add_argument(
+        "--output",
+        help="File written by train-dictionary, or by export (- for stdout)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=1000,
+        help="Recent articles train-dictionary learns from",
+    )
+    parser.add_argument(
+        "--archive",
+        help="Response archive reextract reads (defaults to SCRAPER_ARCHIVE_DIR)",
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Export articles created at or after (UTC unless it has an offset)",
+    )
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        help="Export articles created before (UTC unless it has an offset)",
+    )
+    parser.add_argument("--source", type=_csv, help="Comma-separated sources to export")
+    parser.add_argument("--category", type=_csv, help="Comma-separated categories to export")
+    parser.add_argument("--status", type=_csv, help="Comma-separated statuses to export")
+    parser.add_argument(
+        "--fields", type=_csv, help="Comma-separated fields to export (default all)"
+    )
+    parser.add_argument("--gzip", action="store_true", help="Gzip the export (implied by .gz)")
+    parser.add_argument(
+        "--page-size", type=int, default=1000, help="Articles export fetches per query"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    if args.mode in ("publisher", "both") and not args.file:
+        parser.error(f"--file is required for --mode {args.mode}")
+    if args.mode in ("train-dictionary", "export") and not args.output:
+        parser.error(f"--output is required for --mode {args.mode}")
+
+    settings = Settings.load_from_env()
+    archive = args.archive or settings.scraping.archive_dir
+    if args.mode == "reextract" and not archive:
+        parser.error("--archive or SCRAPER_ARCHIVE_DIR is required for --mode reextract")
+    if args.concurrency:
+        settings.consumer.concurrency = args.concurrency
+    if args.workers:
+        settings.consumer.workers = args.workers
+
+    if args.mode == "test":
+        success = run_test(settings)
+    elif args.mode == "publisher":
+        success = run_publisher(settings, args.file)
+    elif args.mode == "consumer":
+        success = run_consumer(settings)
+    elif args.mode == "async-consumer":
+        success = run_async_consumer(settings)
+    elif args.mode == "supervisor":
+        success = run_supervisor(settings, args.async_workers)
+    elif args.mode == "autoscale":
+        success = run_supervisor(settings, args.async_workers, autoscale=True)
+    elif args.mode == "train-dictionary":
+        success = run_train_dictionary(settings, args.output, args.samples)
+    elif args.mode == "reextract":
+        success = run_reextract(settings, archive)
+    elif args.mode == "export":
+        success = run_export(settings, args)
+    else:
+        success = run_publisher(settings, args.file) and run_consumer(settings)
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,70 +1,343 @@
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import hashlib
 import json
 
-@dataclass
-class ArticleTask:
+# Compact wire format:
+# [WIRE_VERSION, id, url, source, category, priority, enqueued_at, attempts]
+# Trailing fields are left out while they hold their defaults
+WIRE_VERSION = 1
+# Known priorities travel as small integers; any other value is sent verbatim
+PRIORITY_CODES = {"high": 0, "medium": 1, "low": 2}
+PRIORITY_NAMES = {code: name for name, code in PRIORITY_CODES.items()}
+# Priority of tasks that name none, or one the queues do not know
+DEFAULT_PRIORITY = "medium"
+# Stored fields a recrawl has to change before the document is written again
+FINGERPRINT_FIELDS = ("id", "source", "category", "priority", "title", "content")
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+class _Model:
+    """Base for the slotted models: field-wise repr and equality.
+    `__slots__` keeps per-instance memory down when many are held at once."""
+    __slots__ = ()
+    # Fields shown by repr and compared by ==, in declaration order
+    _fields: Tuple[str, ...] = ()
+    
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+    
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+    
+    __hash__ = None
+
+class ArticleTask(_Model):
     """Represents a task to be processed"""
-    id: str
-    url: str
-    source: str
-    category: str
-    priority: str = "medium"
+    __slots__ = (
+        "id", "url", "source", "category", "priority", "enqueued_at", "attempts", "receipt"
+    )
+    _fields = ("id", "url", "source", "category", "priority", "enqueued_at", "attempts")
+    
+    def __init__(
+        self,
+        id: str,
+        url: str,
+        source: str,
+        category: str,
+        priority: str = DEFAULT_PRIORITY,
+        enqueued_at: Optional[float] = None,
+        attempts: int = 0,
+        receipt: Optional[Tuple[str, str]] = None
+    ):
+        self.id = id
+        self.url = url
+        self.source = source
+        self.category = category
+        self.priority = priority
+        # Unix time of the first enqueue, kept when the task is re-queued
+        self.enqueued_at = enqueued_at
+        # Failed deliveries so far, carried through the retry queue
+        self.attempts = attempts
+        # (processing list, raw message), set while in flight on a reliable queue
+        self.receipt = receipt
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
-        return asdict(self)
+        return {
+            "id": self.id,
+            "url": self.url,
+            "source": self.source,
+            "category": self.category,
+            "priority": self.priority,
+            "enqueued_at": self.enqueued_at,
+            "attempts": self.attempts
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ArticleTask':
+        """Create from dictionary, ignoring unknown keys"""
+        # Positional arguments: this runs once per dequeued message
+        return cls(
+            data["id"],
+            data["url"],
+            data["source"],
+            data["category"],
+            data.get("priority", DEFAULT_PRIORITY),
+            data.get("enqueued_at"),
+            data.get("attempts", 0)
+        )
+    
+    def to_compact(self) -> str:
+        """Encode as a versioned positional array, without field names"""
+        values: List[Any] = [
+            WIRE_VERSION,
+            self.id,
+            self.url,
+            self.source,
+            self.category,
+            PRIORITY_CODES.get(self.priority, self.priority),
+        ]
+        if self.enqueued_at is not None or self.attempts:
+            values.append(self.enqueued_at)
+        if self.attempts:
+            values.append(self.attempts)
+        return json.dumps(values, separators=(",", ":"))
+    
+    @classmethod
+    def from_compact(cls, message: str) -> 'ArticleTask':
+        """Decode a message written by to_compact"""
+        values = json.loads(message)
+        if values[0] != WIRE_VERSION:
+            raise ValueError(f"Unsupported task wire version: {values[0]}")
+        priority = values[5]
+        return cls(
+            values[1],
+            values[2],
+            values[3],
+            values[4],
+            PRIORITY_NAMES.get(priority, priority),
+            values[6] if len(values) > 6 else None,
+            values[7] if len(values) > 7 else 0
+        )
+
+class FetchValidators(_Model):
+    """HTTP cache validators and body hash of the last successful fetch of a URL"""
+    __slots__ = ("etag", "last_modified", "content_hash")
+    _fields = __slots__
+    
+    def __init__(
+        self,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FetchValidators':
         """Create from dictionary"""
-        return cls(**data)
+        return cls(
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            content_hash=data.get("content_hash")
+        )
+
+class FetchFailure(_Model):
+    """Why a scrape failed, classified for the retry scheduler"""
+    __slots__ = ("kind", "error", "retry_after")
+    _fields = __slots__
+    
+    def __init__(self, kind: str, error: str, retry_after: Optional[float] = None):
+        self.kind = kind  # permanent, transient, parse
+        self.error = error
+        # Seconds the server asked us to wait (Retry-After), if any
+        self.retry_after = retry_after
 
-@dataclass
-class ScrapedContent:
+class ScrapedContent(_Model):
     """Represents scraped content from a URL"""
-    title: str
-    content: str
-    scraped_at: datetime
+    __slots__ = ("title", "content", "scraped_at", "validators", "not_modified", "failure")
+    _fields = __slots__
+    
+    def __init__(
+        self,
+        title: str,
+        content: str,
+        scraped_at: datetime,
+        validators: Optional[FetchValidators] = None,
+        not_modified: bool = False,
+        failure: Optional[FetchFailure] = None
+    ):
+        self.title = title
+        self.content = content
+        self.scraped_at = scraped_at
+        self.validators = validators
+        # True when the page is unchanged since the last fetch; title and content are empty
+        self.not_modified = not_modified
+        # Set when the scrape failed; title and content are empty
+        self.failure = failure
+    
+    @classmethod
+    def unchanged(cls, validators: FetchValidators) -> 'ScrapedContent':
+        """Result for a page the server reported (or we hashed) as unchanged"""
+        return cls(
+            title="",
+            content="",
+            scraped_at=datetime.utcnow(),
+            validators=validators,
+            not_modified=True
+        )
+    
+    @classmethod
+    def failed(cls, failure: FetchFailure) -> 'ScrapedContent':
+        """Result for a scrape that failed, with the classified reason"""
+        return cls(
+            title="",
+            content="",
+            scraped_at=datetime.utcnow(),
+            failure=failure
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization"""
-        data = asdict(self)
-        data['scraped_at'] = self.scraped_at.isoformat()
-        return data
+        return {
+            "title": self.title,
+            "content": self.content,
+            "scraped_at": self.scraped_at.isoformat(),
+            "validators": self.validators.to_dict() if self.validators else None,
+            "not_modified": self.not_modified,
+            "failure": self.failure.kind if self.failure else None
+        }
 
-@dataclass
-class Article:
+class Article(_Model):
     """Complete article with task info and scraped content"""
-    id: str
-    url: str
-    source: str
-    category: str
-    priority: str
-    title: Optional[str] = None
-    content: Optional[str] = None
-    status: str = "pending"  # pending, completed, failed
-    error_message: Optional[str] = None
-    created_at: datetime = None
-    scraped_at: Optional[datetime] = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.utcnow()
+    __slots__ = (
+        "id", "url", "source", "category", "priority", "title", "content", "status",
+        "error_message", "created_at", "scraped_at", "etag", "last_modified", "content_hash",
+        "fingerprint", "last_seen_at"
+    )
+    _fields = __slots__
+    
+    def __init__(
+        self,
+        id: str,
+        url: str,
+        source: str,
+        category: str,
+        priority: str,
+        title: Optional[str] = None,
+        content: Optional[str] = None,
+        status: str = "pending",  # pending, completed, failed
+        error_message: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        scraped_at: Optional[datetime] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        last_seen_at: Optional[datetime] = None
+    ):
+        self.id = id
+        self.url = url
+        self.source = source
+        self.category = category
+        self.priority = priority
+        self.title = title
+        self.content = content
+        self.status = status
+        self.error_message = error_message
+        self.created_at = created_at if created_at is not None else datetime.utcnow()
+        self.scraped_at = scraped_at
+        self.etag = etag
+        self.last_modified = last_modified
+        # content_hash covers the raw body, fingerprint what was extracted from it
+        self.content_hash = content_hash
+        self.fingerprint = fingerprint
+        # Last scrape that found this content, also when nothing else was rewritten
+        self.last_seen_at = last_seen_at
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for MongoDB storage"""
-        data = asdict(self)
-        data['created_at'] = self.created_at.isoformat()
-        if self.scraped_at:
-            data['scraped_at'] = self.scraped_at.isoformat()
-        return data
+        return {
+            "id": self.id,
+            "url": self.url,
+            "source": self.source,
+            "category": self.category,
+            "priority": self.priority,
+            "title": self.title,
+            "content": self.content,
+            "status": self.status,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat(),
+            "scraped_at": self.scraped_at.isoformat() if self.scraped_at else None,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash,
+            "fingerprint": self.fingerprint,
+            "last_seen_at": self.last_seen_at.isoformat() if self.last_seen_at else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Article':
+        """Create from a stored document; `_id` and other unknown keys are ignored"""
+        return cls(
+            id=data["id"],
+            url=data["url"],
+            source=data["source"],
+            category=data["category"],
+            priority=data["priority"],
+            title=data.get("title"),
+            content=data.get("content"),
+            status=data.get("status", "pending"),
+            error_message=data.get("error_message"),
+            created_at=_parse_datetime(data.get("created_at")),
+            scraped_at=_parse_datetime(data.get("scraped_at")),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            content_hash=data.get("content_hash"),
+            fingerprint=data.get("fingerprint"),
+            last_seen_at=_parse_datetime(data.get("last_seen_at"))
+        )
+    
+    def content_fingerprint(self) -> str:
+        """Digest of the extracted text and the task fields stored with it"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name in FINGERPRINT_FIELDS:
+            digest.update(str(getattr(self, name) or "").encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+    
+    def fetch_validators(self) -> Optional[FetchValidators]:
+        """Validators to send on the next fetch of this URL, if it was scraped"""
+        if self.status != "completed":
+            return None
+        return FetchValidators(
+            etag=self.etag,
+            last_modified=self.last_modified,
+            content_hash=self.content_hash
+        )
     
     @classmethod
     def from_task_and_content(cls, task: ArticleTask, content: ScrapedContent) -> 'Article':
         """Create completed article from task and scraped content"""
-        return cls(
+        validators = content.validators or FetchValidators()
+        article = cls(
             id=task.id,
             url=task.url,
             source=task.source,
@@ -73,8 +346,14 @@ class Article:
             title=content.title,
             content=content.content,
             status="completed",
-            scraped_at=content.scraped_at
+            scraped_at=content.scraped_at,
+            etag=validators.etag,
+            last_modified=validators.last_modified,
+            content_hash=validators.content_hash,
+            last_seen_at=content.scraped_at
         )
+        article.fingerprint = article.content_fingerprint()
+        return article
     
     @classmethod
     def from_task_with_error(cls, task: ArticleTask, error_message: str) -> 'Article':
@@ -8,4 +8,7 @@ articlesDB.createCollection("articles")
 // Create an index on the url field for better performance
 articlesDB.articles.createIndex({ url: 1 }, { unique: true })
 
+// Compound index backing the per-status/source/category stats aggregation
+articlesDB.articles.createIndex({ status: 1, source: 1, category: 1 })
+
 print("MongoDB initialization completed for articles_db")
@@ -47,8 +47,10 @@ def run_simple_test():
             # Process one task
             task = consumer.redis_handler.pop_task(timeout=10)
             if task:
-                success = consumer._process_task(task)
-                if success:
+                # A buffered article is only counted once the flush writes it
+                consumer._record_result(task, consumer._process_task(task), 0.0)
+                consumer.flush_articles()
+                if consumer.processed_count:
                     logger.info("✅ Consumer test successful")
                     
                     # Show stats
@@ -0,0 +1,81 @@
+"""
+Builders shared by the tests: articles, DBHandlers on the in-memory MongoDB
+fake from benchmarks.fakes, and RedisHandlers on fakeredis.
+"""
+
+from dataclasses import replace
+from datetime import datetime
+from unittest import mock
+
+import fakeredis
+
+from benchmarks.fakes import FakeMongoClient
+from config.settings import MongoConfig, RedisConfig
+from core.db_handler import DBHandler
+from core.redis_handler import RedisHandler
+from models.article import Article, ArticleTask, ScrapedContent
+
+SCRAPED_AT = datetime(2024, 5, 1, 12, 0)
+
+# Smallest working setup: direct writes, no stats or article caching, plain bodies
+MONGO_CONFIG = MongoConfig(
+    uri="mongodb://fake",
+    database="db",
+    collection="articles",
+    bulk_size=1,
+    bulk_flush_interval=60.0,
+    flush_retries=3,
+    stats_cache_ttl=0.0,
+    unchanged_writes="off",
+    prefetch_fingerprints=True,
+    content_codec="plain",
+    content_level=3,
+    content_dictionary="",
+    article_cache_size=0,
+    article_cache_ttl=60.0,
+    article_cache_redis=False,
+)
+
+# One unsharded queue with the default priority weights
+REDIS_CONFIG = RedisConfig(
+    host="localhost",
+    port=6379,
+    db=0,
+    queue_name="queue",
+    reliable=False,
+    visibility_timeout=300,
+    reaper_interval=60,
+    priority_weights={"high": 6, "medium": 3, "low": 1},
+    wire_format="json",
+    shards=1,
+    shard_nodes=[],
+    owned_shards=[],
+    steal=True,
+)
+
+
+def make_article(
+    article_id: str = "a1",
+    content: str = "Body",
+    title: str = "Title",
+    scraped_at: datetime = SCRAPED_AT,
+) -> Article:
+    """Completed article of https://example.com/<article_id>"""
+    task = ArticleTask(article_id, f"https://example.com/{article_id}", "example", "news")
+    return Article.from_task_and_content(task, ScrapedContent(title, content, scraped_at))
+
+
+def make_db_handler(client=None, cache_client=None, **overrides) -> DBHandler:
+    """DBHandler on `client` (a new FakeMongoClient by default), configured as
+    MONGO_CONFIG with `overrides` applied"""
+    config = replace(MONGO_CONFIG, **overrides)
+    client = client or FakeMongoClient()
+    with mock.patch("core.db_handler.MongoClient", lambda *args, **kwargs: client):
+        return DBHandler(config, cache_client)
+
+
+def make_redis_handler(server: fakeredis.FakeServer, **overrides) -> RedisHandler:
+    """RedisHandler on `server`, configured as REDIS_CONFIG with `overrides` applied.
+    Handlers on the same server behave like consumers sharing one Redis."""
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return RedisHandler(replace(REDIS_CONFIG, **overrides), client)
@@ -0,0 +1,139 @@
+"""
+Raw response archive: fetched pages are kept as gzipped WARC records with an
+offset index by URL, and re-extraction rewrites stored articles from them
+without fetching anything.
+"""
+
+import gzip
+import hashlib
+from unittest import mock
+
+import pytest
+
+from config.settings import ScrapingConfig
+from core.archive import ArchiveWriter, load_index, read_records
+from core.reextract import reextract
+from core.scraper import FetchedPage, Scraper
+from models.article import Article, ArticleTask
+from tests.conftest import make_db_handler
+
+HEADERS = {"Content-Type": "text/html; charset=utf-8", "Content-Encoding": "gzip"}
+
+
+def make_page(title: str) -> bytes:
+    paragraph = f"{title} was reported today. " * 10
+    return (
+        f"<html><head><title>{title}</title></head><body><article><p>{paragraph}</p>"
+        f"</article></body></html>"
+    ).encode("utf-8")
+
+
+def digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def make_scraping_config(archive_dir: str = "", segment_bytes: int = 1 << 20) -> ScrapingConfig:
+    return ScrapingConfig(
+        timeout=5,
+        max_retries=3,
+        delay_between_requests=0.0,
+        host_rate=0.0,
+        host_burst=1,
+        respect_robots=False,
+        conditional_fetch=True,
+        validator_ttl=60,
+        parser="lxml",
+        max_content_length=2000,
+        max_body_bytes=0,
+        content_types=[],
+        early_stop=True,
+        archive_dir=archive_dir,
+        archive_segment_bytes=segment_bytes,
+    )
+
+
+def test_records_round_trip(tmp_path):
+    writer = ArchiveWriter(str(tmp_path), 1 << 20)
+    writer.write("https://example.com/a", 200, HEADERS, make_page("First"), "d1")
+    writer.write("https://example.com/b", 200, HEADERS, make_page("Other"), "d2")
+    writer.write("https://example.com/a", 200, HEADERS, make_page("Second"), "d3")
+    writer.close()
+
+    index = load_index(str(tmp_path))
+    assert sorted(index) == ["https://example.com/a", "https://example.com/b"]
+    records = {entry.url: record for entry, record in read_records(str(tmp_path), index.values())}
+    record = records["https://example.com/a"]
+    assert record.body == make_page("Second") and record.status == 200
+    # The body is stored decoded
+    assert record.headers == {"Content-Type": "text/html; charset=utf-8"}
+
+    # A segment is an ordinary multi-member .warc.gz
+    segment = tmp_path / index["https://example.com/b"].segment
+    with gzip.open(segment) as file:
+        assert file.read().count(b"WARC/1.1\r\n") == 3
+
+
+def test_segments_roll_over_and_torn_index_lines_are_skipped(tmp_path):
+    writer = ArchiveWriter(str(tmp_path), segment_bytes=1)
+    for i in range(3):
+        writer.write(f"https://example.com/{i}", 200, HEADERS, make_page(f"Page {i}"))
+    writer.close()
+    assert len(list(tmp_path.glob("*.warc.gz"))) == 3
+    with open(next(tmp_path.glob("*.idx")), "a") as index:
+        index.write('{"url": "https://example.com/cut')
+
+    entries = load_index(str(tmp_path)).values()
+    assert sorted(record.url for _, record in read_records(str(tmp_path), entries)) == [
+        f"https://example.com/{i}" for i in range(3)
+    ]
+
+
+def test_scraper_archives_whole_pages(tmp_path):
+    scraper = Scraper(make_scraping_config(str(tmp_path)))
+    body = make_page("Archived")
+    page = FetchedPage(200, HEADERS, body)
+    with mock.patch.object(scraper, "_fetch_with_timeout", return_value=page):
+        scraped = scraper.scrape("https://example.com/archived")
+    scraper.close()
+
+    assert not scraper._body_reader("https://example.com/").feeding
+    entry = load_index(str(tmp_path))["https://example.com/archived"]
+    assert entry.digest == scraped.validators.content_hash == digest(body)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reextract_rewrites_changed_articles(tmp_path, workers):
+    db = make_db_handler(
+        bulk_size=10, unchanged_writes="touch", content_codec="zlib"
+    )
+    bodies = {name: make_page(name.title()) for name in ("stale", "failed", "newer", "same")}
+    writer = ArchiveWriter(str(tmp_path), 1 << 20)
+    for name, body in bodies.items():
+        writer.write(f"https://example.com/{name}", 200, HEADERS, body, digest(body))
+    writer.close()
+
+    scraper = Scraper(make_scraping_config())
+    for name, body in bodies.items():
+        task = ArticleTask(name, f"https://example.com/{name}", "example", "news")
+        if name == "failed":
+            db.save_article(Article.from_task_with_error(task, "Could not extract"))
+            continue
+        scraped = scraper._parse(body, task.url)
+        if name == "stale":
+            scraped.content = "Text from an older extractor"
+        article = Article.from_task_and_content(task, scraped)
+        article.content_hash = "a later fetch" if name == "newer" else digest(body)
+        if name == "newer":
+            article.content = "Text of a page fetched after archiving stopped"
+        db.save_article(article)
+
+    stats = reextract(str(tmp_path), make_scraping_config(), db, workers, batch_size=2)
+    assert stats == {"archived": 4, "extracted": 4, "failed": 0, "updated": 2}
+
+    stale = db.get_article_by_url("https://example.com/stale")
+    assert stale.content == scraper._parse(bodies["stale"], stale.url).content
+    assert stale.fingerprint == stale.content_fingerprint()
+    failed = db.get_article_by_url("https://example.com/failed")
+    assert failed.status == "completed" and failed.content_hash == digest(bodies["failed"])
+    newer = db.get_article_by_url("https://example.com/newer")
+    assert newer.content == "Text of a page fetched after archiving stopped"
@@ -0,0 +1,101 @@
+"""
+Article cache: lookups by URL are answered from an in-process LRU (and
+optionally Redis) and only the misses are read from MongoDB, in one query.
+"""
+
+from unittest import mock
+
+import fakeredis
+
+from benchmarks.fakes import FakeMongoClient
+from core.db_handler import DBHandler
+from tests.conftest import make_article, make_db_handler
+
+
+def make_handler(size: int = 100, ttl: float = 60.0, redis_client=None, client=None):
+    handler = make_db_handler(
+        client,
+        redis_client,
+        article_cache_size=size,
+        article_cache_ttl=ttl,
+        article_cache_redis=redis_client is not None,
+    )
+    for i in range(5):
+        handler.save_article(make_article(str(i), title=f"Title {i}"))
+    return handler
+
+
+def count_finds(handler: DBHandler):
+    return mock.patch.object(handler.collection, "find", wraps=handler.collection.find)
+
+
+def test_hot_lookups_are_served_from_the_cache():
+    handler = make_handler()
+    with count_finds(handler) as find:
+        for _ in range(10):
+            article = handler.get_article_by_url("https://example.com/1")
+        assert article.title == "Title 1"
+        assert handler.get_article_by_url("https://example.com/missing") is None
+    # The first lookup and the missing URL; nonexistent articles are not cached
+    assert find.call_count == 2
+    assert handler.cache.stats() == {
+        "hits": 9, "redis_hits": 0, "misses": 2, "hit_rate": 0.8182, "entries": 1
+    }
+
+
+def test_batch_reads_only_the_misses_in_one_query():
+    handler = make_handler()
+    handler.get_articles_by_urls(["https://example.com/0", "https://example.com/1"])
+    urls = [f"https://example.com/{i}" for i in (0, 1, 2, 3, 3)]
+    with count_finds(handler) as find:
+        articles = handler.get_articles_by_urls(urls)
+    assert sorted(articles) == sorted(set(urls))
+    find.assert_called_once_with(
+        {"url": {"$in": ["https://example.com/2", "https://example.com/3"]}}
+    )
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted():
+    with mock.patch("core.article_cache.time.monotonic", return_value=1000.0) as clock:
+        handler = make_handler(size=2, ttl=30.0)
+        handler.get_articles_by_urls(["https://example.com/0", "https://example.com/1"])
+        handler.get_article_by_url("https://example.com/0")
+        handler.get_article_by_url("https://example.com/2")
+        assert list(handler.cache._entries) == ["https://example.com/0", "https://example.com/2"]
+
+        clock.return_value = 1031.0
+        with count_finds(handler) as find:
+            handler.get_article_by_url("https://example.com/0")
+        assert find.call_count == 1
+
+
+def test_writes_invalidate_cached_articles():
+    handler = make_handler()
+    assert handler.get_article_by_url("https://example.com/1").content == "Body"
+    handler.save_article(make_article("1", "Edited body"))
+    assert handler.get_article_by_url("https://example.com/1").content == "Edited body"
+
+
+def test_redis_tier_is_shared_between_handlers():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    mongo = FakeMongoClient()
+    first = make_handler(redis_client=redis_client, client=mongo)
+    second = make_handler(redis_client=redis_client, client=mongo)
+    first.get_article_by_url("https://example.com/1")
+
+    with count_finds(second) as find:
+        article = second.get_article_by_url("https://example.com/1")
+    assert article.title == "Title 1" and find.call_count == 0
+    assert second.cache.stats()["redis_hits"] == 1
+
+    # A write through either handler drops the shared copy
+    second.save_article(make_article("1", "Edited body"))
+    assert redis_client.keys("db:articles:article:*") == []
+
+
+def test_cache_is_off_by_default():
+    handler = make_handler(size=0)
+    with count_finds(handler) as find:
+        handler.get_article_by_url("https://example.com/1")
+        handler.get_article_by_url("https://example.com/1")
+    assert find.call_count == 2 and handler.cache.stats()["hit_rate"] == 0.0
@@ -0,0 +1,62 @@
+"""
+Autoscaling decisions: grow with the backlog, shrink only after a sustained lull,
+and always stay within the configured bounds.
+"""
+
+from config.settings import AutoscaleConfig
+from core.autoscaler import AutoscalePolicy, ScalingSample
+
+
+def make_policy(min_workers: int = 1, max_workers: int = 16, slots: int = 1) -> AutoscalePolicy:
+    config = AutoscaleConfig(
+        min_workers=min_workers,
+        max_workers=max_workers,
+        interval=10.0,
+        target_drain_seconds=60.0,
+        scale_down_ticks=3,
+    )
+    return AutoscalePolicy(config, slots)
+
+
+def sample(queue_length: int, completed: int = 0, latency: float = 1.0) -> ScalingSample:
+    return ScalingSample(queue_length, completed, completed * latency, 10.0)
+
+
+def test_grows_one_at_a_time_until_latency_is_known():
+    policy = make_policy()
+    assert policy.desired(1, sample(500)) == 2
+    assert policy.desired(2, sample(500)) == 3
+
+
+def test_sizes_pool_to_drain_backlog():
+    policy = make_policy()
+    policy.desired(2, sample(600, completed=20))
+    # 1s per task: 600 tasks in 60s need 10 workers, plus 2/s still arriving
+    assert policy.desired(2, sample(600, completed=20)) == 12
+
+
+def test_async_slots_raise_worker_capacity():
+    policy = make_policy(slots=10)
+    policy.desired(1, sample(600, completed=100))
+    # 10 tasks/s arriving plus 10/s for the backlog, 10 tasks/s per worker
+    assert policy.desired(1, sample(600, completed=100)) == 2
+
+
+def test_stays_within_bounds():
+    assert make_policy(max_workers=4).desired(2, sample(100_000, completed=10)) == 4
+    assert make_policy(min_workers=2).desired(2, sample(0)) == 2
+
+
+def test_shrinks_only_after_sustained_low_demand():
+    policy = make_policy(min_workers=0)
+    assert policy.desired(4, sample(0)) == 4
+    assert policy.desired(4, sample(0)) == 4
+    assert policy.desired(4, sample(0)) == 0
+
+
+def test_backlog_resets_the_scale_down_countdown():
+    policy = make_policy(min_workers=0)
+    policy.desired(4, sample(0))
+    policy.desired(4, sample(0))
+    policy.desired(4, sample(10, completed=10))
+    assert policy.desired(4, sample(0)) == 4
@@ -0,0 +1,71 @@
+"""
+Batched dequeue: one round trip pops up to N tasks, keeps the priority weighting
+of single pops, and on a reliable queue parks every popped task until it is acked.
+"""
+
+import fakeredis
+import pytest
+
+from models.article import ArticleTask
+from tests.conftest import make_redis_handler
+
+
+def make_handler(server, reliable: bool = False):
+    return make_redis_handler(server, reliable=reliable)
+
+
+def make_tasks(priority: str, count: int):
+    return [
+        ArticleTask(f"{priority}-{i}", f"https://example.com/{i}", "example", "news", priority)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def test_pops_a_batch_in_queue_order(server):
+    handler = make_handler(server)
+    handler.push_tasks(make_tasks("medium", 30))
+
+    tasks = handler.pop_tasks(20, timeout=0)
+    assert [task.id for task in tasks] == [f"medium-{i}" for i in range(20)]
+    assert handler.get_queue_length() == 10
+    assert len(handler.pop_tasks(20, timeout=0)) == 10
+    assert handler.pop_tasks(20, timeout=0) == []
+
+
+def test_batch_keeps_priority_weights(server):
+    handler = make_handler(server)
+    for priority in ("high", "medium", "low"):
+        handler.push_tasks(make_tasks(priority, 50))
+
+    tasks = handler.pop_tasks(10, timeout=0)
+    counts = {p: sum(t.priority == p for t in tasks) for p in ("high", "medium", "low")}
+    assert counts == {"high": 6, "medium": 3, "low": 1}
+
+
+@pytest.mark.parametrize("count", [1, 8])
+def test_reliable_batch_is_parked_until_acked(server, count):
+    handler = make_handler(server, reliable=True)
+    handler.push_tasks(make_tasks("medium", 10))
+
+    tasks = handler.pop_tasks(count, timeout=0)
+    assert len(tasks) == count and all(task.receipt for task in tasks)
+    handler.ack_task(tasks[0])
+
+    # Unacked tasks go back to the queue, e.g. when the consumer shuts down
+    assert handler.release_in_flight() == count - 1
+    assert handler.get_queue_length() == 10 - 1
+
+
+def test_undecodable_messages_are_dropped(server):
+    handler = make_handler(server, reliable=True)
+    handler.push_tasks(make_tasks("medium", 2))
+    handler.client.lpush("queue:medium", "not a task")
+
+    tasks = handler.pop_tasks(5, timeout=0)
+    assert len(tasks) == 2
+    assert handler.release_in_flight() == 2
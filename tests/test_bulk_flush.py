@@ -0,0 +1,171 @@
+"""
+Write-behind buffer: articles of a bulk write that was not acknowledged stay
+buffered for a bounded number of flushes, and their tasks are only acked and
+counted once the write goes through, or sent to the retry queue otherwise.
+"""
+
+from dataclasses import replace
+from unittest import mock
+
+import fakeredis
+import pytest
+from pymongo.errors import AutoReconnect
+
+from config.settings import Settings
+from core.consumer import Consumer
+from models.article import Article, ArticleTask, ScrapedContent
+from tests.conftest import (
+    MONGO_CONFIG, SCRAPED_AT, make_article, make_db_handler, make_redis_handler
+)
+
+URL = "https://example.com/a1"
+
+
+def break_writes(handler) -> mock.Mock:
+    """Fail every bulk write of `handler` as a dropped connection would"""
+    bulk_write = mock.Mock(side_effect=AutoReconnect("connection closed"))
+    handler.collection.bulk_write = bulk_write
+    return bulk_write
+
+
+def fix_writes(handler) -> None:
+    del handler.collection.bulk_write
+
+
+def test_unacknowledged_flush_keeps_articles_buffered():
+    handler = make_db_handler(bulk_size=10, bulk_flush_interval=60.0)
+    handler.buffer_article(make_article())
+    break_writes(handler)
+
+    assert handler.flush() == []
+    assert handler.is_buffered(URL)
+    # Backs off instead of retrying at once, even when the buffer fills up
+    for i in range(2, 12):
+        handler.buffer_article(make_article(f"a{i}"))
+    assert not handler.buffer_is_due()
+
+    fix_writes(handler)
+    assert handler.flush() == []
+    assert URL in handler.collection.documents and not handler.is_buffered(URL)
+
+
+def test_newer_article_of_a_url_supersedes_the_retained_one():
+    handler = make_db_handler(bulk_size=10)
+    handler.buffer_article(make_article())
+    break_writes(handler)
+    articles = handler._take_buffer()
+    handler.buffer_article(make_article(content="Edited body"))
+
+    handler._collect_write_errors(articles, AutoReconnect("connection closed"))
+    fix_writes(handler)
+    handler.flush()
+    assert handler.collection.documents[URL]["content"] == "Edited body"
+
+
+def test_articles_are_given_up_after_the_retries():
+    handler = make_db_handler(bulk_size=10, flush_retries=2)
+    handler.buffer_article(make_article())
+    bulk_write = break_writes(handler)
+
+    for _ in range(3):
+        assert handler.drain_unwritten() == []
+        handler.flush()
+    assert bulk_write.call_count == 3
+    assert not handler.is_buffered(URL)
+    [(article, error)] = handler.drain_unwritten()
+    assert article.url == URL and error == "connection closed"
+    assert handler.drain_unwritten() == []
+
+
+def test_include_buffered_drains_retained_articles():
+    handler = make_db_handler(bulk_size=10)
+    handler.buffer_article(make_article())
+    break_writes(handler)
+    handler.flush()
+
+    assert [article.url for article, _ in handler.drain_unwritten(include_buffered=True)] == [URL]
+    assert not handler.is_buffered(URL)
+
+
+@pytest.fixture
+def consumer(monkeypatch):
+    """Consumer buffering up to 10 articles, on fakeredis and the MongoDB fake"""
+    settings = Settings.load_from_env()
+    settings.mongo = replace(MONGO_CONFIG, bulk_size=10, flush_retries=1)
+    settings.dedup.backend = "exact"
+    settings.consumer.metrics_port = 0
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "core.consumer.get_redis_handler", lambda config: make_redis_handler(server)
+    )
+    monkeypatch.setattr(
+        "core.consumer.DBHandler",
+        lambda config, cache_client: make_db_handler(cache_client=cache_client, **vars(config)),
+    )
+    with mock.patch("signal.signal"):
+        consumer = Consumer(settings, on_result=mock.Mock())
+    yield consumer
+    consumer.scraper.close()
+
+
+def buffer_task(consumer: Consumer):
+    """Pop a task and buffer its article, the way _process_task saves a page"""
+    consumer.redis_handler.push_tasks([ArticleTask("a1", URL, "example", "news")])
+    task = consumer.redis_handler.pop_task(timeout=0)
+    article = Article.from_task_and_content(task, ScrapedContent("Title", "Body", SCRAPED_AT))
+    consumer._record_result(task, consumer._save_article(article, task), 0.5)
+    return task
+
+
+def test_task_is_counted_once_its_article_is_written(consumer):
+    task = buffer_task(consumer)
+    assert consumer.processed_count == 0
+
+    break_writes(consumer.db_handler)
+    consumer.flush_articles()
+    assert consumer.processed_count == consumer.failed_count == 0
+    # Not acked, so the recrawl window has not started
+    assert not consumer.dedup.is_fresh(task)
+
+    fix_writes(consumer.db_handler)
+    consumer.flush_articles()
+    assert consumer.processed_count == 1 and consumer.dedup.is_fresh(task)
+    consumer.on_result.assert_called_once_with(True, 0.5)
+    assert URL in consumer.db_handler.collection.documents
+    assert not consumer._pending_acks and not consumer._unsettled_seconds
+
+
+def test_task_of_a_given_up_article_is_retried(consumer):
+    buffer_task(consumer)
+    break_writes(consumer.db_handler)
+
+    consumer.flush_articles()
+    consumer.flush_articles()
+    assert consumer.failed_count == 1 and consumer.processed_count == 0
+    consumer.on_result.assert_called_once_with(False, 0.5)
+    assert consumer.redis_handler.get_retry_lengths()["retrying"] == 1
+    assert not consumer._pending_acks
+
+
+def test_final_flush_retries_tasks_of_retained_articles(consumer):
+    buffer_task(consumer)
+    break_writes(consumer.db_handler)
+
+    consumer.flush_articles(final=True)
+    assert consumer.failed_count == 1
+    assert consumer.redis_handler.get_retry_lengths()["retrying"] == 1
+    assert not consumer.db_handler.is_buffered(URL)
+
+
+def test_prefetched_tasks_go_back_when_the_final_flush_fails(consumer):
+    consumer.redis_handler.push_tasks([
+        ArticleTask(f"a{i}", f"https://example.com/{i}", "example", "news") for i in range(3)
+    ])
+    for task in consumer.redis_handler.pop_tasks(3, timeout=0):
+        consumer.dispatcher.add(task)
+    consumer.db_handler.flush = mock.Mock(side_effect=RuntimeError("connection refused"))
+    consumer._next_task = mock.Mock(side_effect=KeyboardInterrupt)
+
+    consumer.start_consuming()
+    consumer.db_handler.flush.assert_called_once()
+    assert consumer.redis_handler.get_queue_length() == 3
@@ -0,0 +1,101 @@
+"""
+Host circuit breaker: trips after consecutive unreachable fetches, defers while
+open and lets a single probe through once the open period is over.
+"""
+
+import fakeredis
+import pytest
+
+from config.settings import CircuitBreakerConfig
+from core import circuit_breaker
+from core.circuit_breaker import HostCircuitBreaker
+from core.retry import TRANSIENT, UNREACHABLE
+from models.article import FetchFailure
+
+HOST = "news.example.com"
+DOWN = FetchFailure(UNREACHABLE, "Connection refused")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "time", clock)
+    return clock
+
+
+def make_breaker(server) -> HostCircuitBreaker:
+    config = CircuitBreakerConfig(
+        failure_threshold=3, open_seconds=60.0, probe_timeout=30, failure_window=600
+    )
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return HostCircuitBreaker(client, config, "queue")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def test_opens_after_consecutive_unreachable_fetches(server, clock):
+    breaker = make_breaker(server)
+    for _ in range(2):
+        assert breaker.check(HOST) == 0
+        breaker.record(HOST, DOWN)
+    assert breaker.check(HOST) == 0
+    breaker.record(HOST, DOWN)
+
+    # Another consumer sees the open circuit through Redis
+    assert make_breaker(server).check(HOST) == pytest.approx(60.0)
+    clock.now += 20
+    assert breaker.check(HOST) == pytest.approx(40.0)
+
+
+def test_success_resets_the_failure_count(server, clock):
+    breaker = make_breaker(server)
+    for outcome in (DOWN, DOWN, None, DOWN, DOWN):
+        breaker.check(HOST)
+        breaker.record(HOST, outcome)
+    assert breaker.check(HOST) == 0
+
+
+def test_other_failures_do_not_count(server, clock):
+    breaker = make_breaker(server)
+    for _ in range(5):
+        breaker.check(HOST)
+        breaker.record(HOST, FetchFailure(TRANSIENT, "503 Service Unavailable"))
+    assert breaker.check(HOST) == 0
+
+
+def test_half_open_allows_a_single_probe(server, clock):
+    first, second = make_breaker(server), make_breaker(server)
+    for _ in range(3):
+        first.record(HOST, DOWN)
+
+    clock.now += 61
+    assert first.check(HOST) == 0
+    assert 0 < second.check(HOST) <= 30
+
+    # A failed probe opens the circuit again, a successful one closes it
+    first.record(HOST, DOWN)
+    assert first.check(HOST) == pytest.approx(60.0)
+    clock.now += 61
+    assert first.check(HOST) == 0
+    first.record(HOST, None)
+    assert make_breaker(server).check(HOST) == 0
+    assert not fakeredis.FakeRedis(server=server).keys("*")
+
+
+def test_disabled_breaker_never_defers(server, clock):
+    breaker = make_breaker(server)
+    breaker.config.failure_threshold = 0
+    for _ in range(5):
+        breaker.record(HOST, DOWN)
+    assert breaker.check(HOST) == 0
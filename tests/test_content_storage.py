@@ -0,0 +1,103 @@
+"""
+Compressed article bodies: whatever codec wrote a document, reads through the
+DBHandler return the original text.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.fakes import FakeMongoClient
+from core import content_storage
+from core.content_storage import (
+    ContentStorage, ZlibCodec, ZstdCodec, get_codec, train_dictionary
+)
+from tests.conftest import make_article, make_db_handler
+
+BODY = "Council approves the transit budget after a long debate. " * 40
+CODECS = ["plain", "zlib"] + (["zstd"] if content_storage.zstandard else [])
+
+
+def make_handler(codec: str, dictionary: str = "", client=None):
+    return make_db_handler(
+        client, bulk_size=10, content_codec=codec, content_dictionary=dictionary
+    )
+
+
+@pytest.fixture
+def dictionary_file(tmp_path):
+    path = tmp_path / "articles.dict"
+    samples = [make_article(str(i), f"Story {i}. {BODY}").content for i in range(50)]
+    path.write_bytes(train_dictionary(samples, 4096))
+    return str(path)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("use_dictionary", [False, True])
+def test_round_trip(codec, use_dictionary, dictionary_file):
+    handler = make_handler(codec, dictionary_file if use_dictionary else "")
+    article = make_article(content=BODY)
+    handler.save_article(article)
+    handler.buffer_article(make_article("a2", BODY))
+    handler.flush()
+
+    stored = handler.collection.documents[article.url]
+    if codec == "plain":
+        assert stored["content"] == BODY
+    else:
+        assert len(stored["content"]) < len(BODY) // 4
+    for url in (article.url, "https://example.com/a2"):
+        assert handler.get_article_by_url(url).content == BODY
+
+
+def test_switching_modes_keeps_old_documents_readable(dictionary_file):
+    client = FakeMongoClient()
+    make_handler("zlib", dictionary_file, client).save_article(make_article("a1", BODY))
+    make_handler("plain", client=client).save_article(make_article("a2", BODY))
+
+    handler = make_handler(CODECS[-1], dictionary_file, client)
+    assert handler.get_article_by_url("https://example.com/a1").content == BODY
+    assert handler.get_article_by_url("https://example.com/a2").content == BODY
+
+
+def test_body_from_another_dictionary_is_not_misread(tmp_path, dictionary_file):
+    client = FakeMongoClient()
+    make_handler("zlib", dictionary_file, client).save_article(make_article(content=BODY))
+
+    other = tmp_path / "other.dict"
+    other.write_bytes(b"an unrelated dictionary")
+    handler = make_handler("zlib", str(other), client)
+    assert handler.get_article_by_url("https://example.com/a1") is None
+
+
+def test_short_bodies_stay_text():
+    storage = ContentStorage(get_codec("zlib"))
+    doc = storage.encode(make_article(content="No content found").to_dict())
+    assert doc["content"] == "No content found"
+    assert "content_codec" not in doc
+
+
+def test_zstd_falls_back_to_zlib(monkeypatch):
+    monkeypatch.setattr(content_storage, "zstandard", None)
+    assert isinstance(get_codec("zstd"), ZlibCodec)
+
+
+@pytest.mark.skipif(content_storage.zstandard is None, reason="zstandard is not installed")
+def test_zstd_codec_is_safe_across_threads(dictionary_file):
+    with open(dictionary_file, "rb") as file:
+        codec = ZstdCodec(3, file.read())
+    used = {}
+
+    def round_trips(worker: int) -> bool:
+        bodies = [f"Story {worker}.{i}. {BODY}".encode("utf-8") for i in range(200)]
+        ok = all(codec.decompress(codec.compress(body)) == body for body in bodies)
+        used[threading.get_ident()] = (codec._local.compressor, codec._local.decompressor)
+        return ok
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(pool.map(round_trips, range(8)))
+    # Every thread compressed and decompressed with objects of its own
+    compressors = {id(pair[0]) for pair in used.values()}
+    decompressors = {id(pair[1]) for pair in used.values()}
+    assert len(compressors) == len(decompressors) == len(used)
@@ -0,0 +1,78 @@
+"""
+Database stats: one $group aggregation by (status, source, category) is folded
+into totals and per-source and per-category breakdowns, and cached.
+"""
+
+from unittest import mock
+
+from core.db_handler import STATS_INDEX_NAME, STATS_PIPELINE
+from tests.conftest import make_db_handler
+
+
+def row(status, source, category, count):
+    return {"_id": {"status": status, "source": source, "category": category}, "count": count}
+
+
+ROWS = [
+    row("completed", "bbc", "news", 5),
+    row("completed", "reuters", "news", 3),
+    row("failed", "bbc", "technology", 2),
+    row("pending", "reuters", "technology", 1),
+    # Written by something that predates the status field's values
+    row("archived", "bbc", "news", 4),
+    # A document without a source
+    {"_id": {"status": "completed", "category": "news"}, "count": 7},
+]
+
+
+def test_rows_are_folded_into_totals_and_breakdowns():
+    stats = make_db_handler()._summarize_stats(ROWS)
+    assert stats == {
+        # Unknown statuses count toward the total only
+        "total_articles": 22,
+        "completed": 15,
+        "failed": 2,
+        "pending": 1,
+        "by_source": {
+            "bbc": {"completed": 5, "failed": 2, "archived": 4},
+            "reuters": {"completed": 3, "pending": 1},
+            "None": {"completed": 7},
+        },
+        "by_category": {
+            "news": {"completed": 15, "archived": 4},
+            "technology": {"failed": 2, "pending": 1},
+        },
+    }
+
+
+def test_empty_collection():
+    stats = make_db_handler()._summarize_stats([])
+    assert stats == {
+        "total_articles": 0, "completed": 0, "failed": 0, "pending": 0,
+        "by_source": {}, "by_category": {},
+    }
+
+
+def test_stats_are_cached_for_the_ttl():
+    handler = make_db_handler(stats_cache_ttl=30.0)
+    aggregate = mock.Mock(return_value=ROWS)
+    handler.collection.aggregate = aggregate
+    with mock.patch("core.db_handler.time.monotonic", return_value=1000.0) as clock:
+        first = handler.get_stats()
+        clock.return_value = 1029.0
+        assert handler.get_stats() is first
+        clock.return_value = 1031.0
+        handler.get_stats()
+    assert aggregate.call_count == 2
+    aggregate.assert_called_with(STATS_PIPELINE, hint=STATS_INDEX_NAME)
+
+
+def test_no_ttl_always_aggregates_and_errors_give_empty_stats():
+    handler = make_db_handler(stats_cache_ttl=0.0)
+    handler.collection.aggregate = mock.Mock(return_value=ROWS)
+    handler.get_stats()
+    handler.get_stats()
+    assert handler.collection.aggregate.call_count == 2
+
+    handler.collection.aggregate = mock.Mock(side_effect=RuntimeError("down"))
+    assert handler.get_stats() == {}
@@ -0,0 +1,120 @@
+"""
+URL deduplication: the publisher claims URLs before pushing them, and claims
+it releases after a failed push can be taken again; consumers skip URLs scraped
+within their priority's recrawl window. Both backends behave the same.
+"""
+
+from unittest import mock
+
+import fakeredis
+import pytest
+
+from config.settings import DedupConfig
+from core.dedup import DedupIndex
+from models.article import ArticleTask
+
+BACKENDS = ["exact", "bloom"]
+
+
+def make_index(backend: str) -> DedupIndex:
+    config = DedupConfig(
+        backend=backend,
+        queued_ttl=3600,
+        recrawl_ttls={"high": 900, "medium": 3600, "low": 86400},
+        bloom_capacity=10_000,
+        bloom_error_rate=0.001,
+    )
+    return DedupIndex(fakeredis.FakeRedis(decode_responses=True), config, "queue")
+
+
+def make_tasks(count: int, priority: str = "medium"):
+    return [
+        ArticleTask(f"a{i}", f"https://example.com/story/{i}", "example", "news", priority)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_queued_urls_are_claimed_once_in_any_spelling(backend):
+    index = make_index(backend)
+    tasks = make_tasks(3)
+    assert index.claim(tasks[:2]) == tasks[:2]
+    respelled = ArticleTask("b1", "HTTPS://Example.com/story/1/?utm_source=feed", "x", "news")
+    assert index.claim([respelled, tasks[2]]) == [tasks[2]]
+
+
+def test_finished_urls_can_be_queued_again():
+    index = make_index("exact")
+    task, = make_tasks(1)
+    index.claim([task])
+    index.task_done(task, scraped=True)
+    assert index.claim([task]) == [task]
+
+
+def test_bloom_claims_age_out_after_the_queued_ttl():
+    index = make_index("bloom")
+    task, = make_tasks(1)
+    with mock.patch("core.dedup.time.time", return_value=3600 * 1000) as clock:
+        index.claim([task])
+        clock.return_value += 3600
+        assert index.claim([task]) == []
+        clock.return_value += 2 * 3600
+        assert index.claim([task]) == [task]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_only_scraped_urls_start_a_recrawl_window(backend):
+    index = make_index(backend)
+    scraped, skipped = make_tasks(2)
+    assert not index.is_fresh(scraped)
+    index.task_done(scraped, scraped=True)
+    index.task_done(skipped, scraped=False)
+    assert index.is_fresh(scraped) and not index.is_fresh(skipped)
+
+
+def test_exact_recrawl_window_follows_the_priority():
+    index = make_index("exact")
+    high, = make_tasks(1, "high")
+    unknown = ArticleTask("u1", "https://example.com/other", "example", "news", "urgent")
+    for task in (high, unknown):
+        index.task_done(task, scraped=True)
+    assert index.client.ttl(index._key("fresh", high.url)) == 900
+    # Unknown priorities get the default priority's window
+    assert index.client.ttl(index._key("fresh", unknown.url)) == 3600
+
+
+def test_bloom_recrawl_window_follows_the_priority():
+    index = make_index("bloom")
+    high, low = make_tasks(2, "high")
+    low.priority = "low"
+    with mock.patch("core.dedup.time.time", return_value=86400 * 1000) as clock:
+        index.task_done(high, scraped=True)
+        index.task_done(low, scraped=True)
+        # Fresh for one to two windows: high pages come due well before low ones
+        clock.return_value += 900
+        assert index.is_fresh(high) and index.is_fresh(low)
+        clock.return_value += 900
+        assert not index.is_fresh(high) and index.is_fresh(low)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_released_claims_can_be_claimed_again(backend):
+    index = make_index(backend)
+    tasks = make_tasks(4)
+    assert index.claim(tasks) == tasks
+
+    # The push failed for the first two, the others are still queued
+    index.release(tasks[:2])
+    assert index.claim(tasks) == tasks[:2]
+    # Claimed again, so queued again
+    assert index.claim(tasks) == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_a_released_url_is_claimed_once_per_batch(backend):
+    index = make_index(backend)
+    task, = make_tasks(1)
+    index.claim([task])
+    index.release([task])
+    duplicate = ArticleTask("dup", task.url, "example", "news")
+    assert index.claim([task, duplicate]) == [task]
@@ -0,0 +1,95 @@
+"""
+Article export: keyset pages over (created_at, _id) return every matching
+article exactly once, in order, with only the requested fields.
+"""
+
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.db_handler import DBHandler
+from core.export import export_articles
+from models.article import Article, ArticleTask, ScrapedContent
+from tests.conftest import make_db_handler
+from utils.logger import logger
+
+START = datetime(2024, 5, 1, 12, 0)
+BODY = "The council approved the budget after a long debate. " * 5
+
+
+@pytest.fixture
+def handler() -> DBHandler:
+    handler = make_db_handler(bulk_size=100, content_codec="zlib")
+    for i in range(30):
+        source = ("bbc", "reuters", "nytimes")[i % 3]
+        task = ArticleTask(f"a{i:02d}", f"https://news.example/{i:02d}/{source}", source, "news")
+        article = Article.from_task_and_content(task, ScrapedContent(f"Title {i}", BODY, START))
+        if i % 5 == 4:
+            article = Article.from_task_with_error(task, "Timed out")
+        # Three articles per second, so pages end in the middle of equal timestamps
+        article.created_at = START + timedelta(seconds=i // 3)
+        handler.buffer_article(article)
+    handler.flush()
+    return handler
+
+
+@pytest.mark.parametrize("page_size", [1, 4, 7, 30, 1000])
+def test_pages_return_every_article_once_in_order(handler, page_size):
+    docs = list(handler.iter_articles(page_size=page_size))
+    assert [doc["id"] for doc in docs] == [f"a{i:02d}" for i in range(30)]
+    assert all(doc["content"] in (BODY, None) for doc in docs)
+    assert "_id" not in docs[0] and "content_codec" not in docs[0]
+
+
+def test_filters(handler):
+    docs = handler.iter_articles(
+        since=START + timedelta(seconds=2),
+        until=START + timedelta(seconds=8),
+        sources=["bbc", "reuters"],
+        statuses=["completed"],
+        page_size=2,
+    )
+    expected = [6, 7, 10, 12, 13, 15, 16, 18, 21, 22]
+    assert [doc["id"] for doc in docs] == [f"a{i:02d}" for i in expected]
+
+
+@pytest.mark.parametrize("tz", [None, timezone.utc, timezone(timedelta(hours=2))])
+def test_bounds_are_compared_in_utc(handler, tz):
+    since, until = START + timedelta(seconds=2), START + timedelta(seconds=4)
+    if tz is not None:
+        # The same instants, as the stored naive UTC times
+        since = since.replace(tzinfo=timezone.utc).astimezone(tz)
+        until = until.replace(tzinfo=timezone.utc).astimezone(tz)
+    docs = handler.iter_articles(since=since, until=until, fields=["id"])
+    assert [doc["id"] for doc in docs] == [f"a{i:02d}" for i in range(6, 12)]
+
+
+def test_projection(handler):
+    docs = list(handler.iter_articles(fields=["url", "content"], statuses=["completed"]))
+    assert set(docs[0]) == {"url", "content"}
+    assert docs[0]["content"] == BODY
+
+
+def test_gzipped_jsonl(handler, tmp_path):
+    path = tmp_path / "articles.jsonl.gz"
+    assert export_articles(handler, str(path), page_size=8, fields=["id", "created_at"]) == 30
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        lines = [json.loads(line) for line in file]
+    assert lines[0] == {"id": "a00", "created_at": START.isoformat()}
+    assert len(lines) == 30
+
+
+def test_stdout_carries_only_json_lines(handler, capsys, monkeypatch):
+    # As when run from the command line, where the log handler writes to the same stdout
+    monkeypatch.setattr(logger.handlers[0], "stream", sys.stdout)
+
+    assert export_articles(handler, "-", fields=["id"]) == 30
+    out, err = capsys.readouterr()
+    assert [json.loads(line)["id"] for line in out.splitlines()] == [
+        f"a{i:02d}" for i in range(30)
+    ]
+    assert "Exported 30 articles to -" in err
+    assert logger.handlers[0].stream is sys.stdout
@@ -0,0 +1,68 @@
+"""
+Equivalence tests: the lxml extractor must match the BeautifulSoup one on every
+page in extraction_corpus/. Corpus pages are well-formed; on broken markup the
+two parsers repair the tree differently and results may legitimately diverge.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from core.extractors import (
+    BeautifulSoupExtractor,
+    LxmlExtractor,
+    MAX_CONTENT_LENGTH,
+    NO_CONTENT,
+    NO_TITLE,
+)
+
+CORPUS_DIR = Path(__file__).parent / "extraction_corpus"
+CORPUS = sorted(CORPUS_DIR.glob("*.html"))
+
+
+def extract_both(path: Path, max_length: int = MAX_CONTENT_LENGTH):
+    html = path.read_bytes()
+    url = f"https://example.com/{path.stem}"
+    return (
+        BeautifulSoupExtractor(max_length).extract(html, url),
+        LxmlExtractor(max_length).extract(html, url),
+    )
+
+
+def test_corpus_is_not_empty():
+    assert CORPUS
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda path: path.stem)
+def test_lxml_matches_beautifulsoup(path):
+    expected, actual = extract_both(path)
+    assert actual == expected
+
+
+def test_content_is_truncated():
+    expected, actual = extract_both(CORPUS_DIR / "long_article_truncated.html")
+    assert len(expected[1]) == MAX_CONTENT_LENGTH
+    assert actual == expected
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda path: path.stem)
+def test_full_text_mode_matches(path):
+    expected, actual = extract_both(path, max_length=0)
+    assert actual == expected
+
+
+def test_full_text_mode_keeps_whole_article():
+    expected, _ = extract_both(CORPUS_DIR / "long_article_truncated.html", max_length=0)
+    assert len(expected[1]) > MAX_CONTENT_LENGTH
+
+
+def test_placeholders_when_nothing_found():
+    expected, actual = extract_both(CORPUS_DIR / "no_title_no_content.html")
+    assert expected == (NO_TITLE, NO_CONTENT)
+    assert actual == expected
+
+
+def test_declared_encoding_is_honoured():
+    _, (title, content) = extract_both(CORPUS_DIR / "latin1_declared.html")
+    assert title == "Café crème"
+    assert content.startswith("Grüße aus München.")
@@ -0,0 +1,84 @@
+"""
+Metrics: the registry renders counters and histograms in the Prometheus text
+exposition format, and the endpoint serves it.
+"""
+
+import urllib.request
+
+import pytest
+
+from utils.metrics import CONTENT_TYPE, Registry, start_metrics_server
+
+
+@pytest.fixture
+def registry() -> Registry:
+    registry = Registry()
+    tasks = registry.counter("tasks_total", "Finished tasks", ["source", "outcome"])
+    tasks.labels("bbc", "success").inc()
+    tasks.labels("bbc", "success").inc(2)
+    tasks.labels("reuters", "failure").inc(0.5)
+    registry.counter("restarts_total", "Restarts")
+
+    fetch = registry.histogram("fetch_seconds", "Fetch latency", buckets=(1.0, 0.1, 0.5))
+    for seconds in (0.05, 0.1, 0.3, 2.0):
+        fetch.observe(seconds)
+    return registry
+
+
+def test_counters(registry):
+    lines = registry.render().splitlines()
+    assert lines[:5] == [
+        "# HELP tasks_total Finished tasks",
+        "# TYPE tasks_total counter",
+        'tasks_total{source="bbc",outcome="success"} 3',
+        'tasks_total{source="reuters",outcome="failure"} 0.5',
+        "# HELP restarts_total Restarts",
+    ]
+    # Unlabelled metrics are exposed from the start, without braces
+    assert "restarts_total 0" in lines
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    text = registry.render()
+    histogram = text[text.index("# HELP fetch_seconds"):].splitlines()
+    assert histogram == [
+        "# HELP fetch_seconds Fetch latency",
+        "# TYPE fetch_seconds histogram",
+        # A value on a bound falls in that bucket
+        'fetch_seconds_bucket{le="0.1"} 2',
+        'fetch_seconds_bucket{le="0.5"} 3',
+        'fetch_seconds_bucket{le="1.0"} 3',
+        'fetch_seconds_bucket{le="+Inf"} 4',
+        "fetch_seconds_sum 2.45",
+        "fetch_seconds_count 4",
+    ]
+    assert text.endswith("\n")
+
+
+def test_labelled_histogram_and_escaping():
+    registry = Registry()
+    writes = registry.histogram("db_seconds", "Writes", ["operation"], buckets=(1.0,))
+    writes.labels('bulk "big"\\\nnext').observe(0.5)
+    assert registry.render().splitlines()[2:] == [
+        'db_seconds_bucket{operation="bulk \\"big\\"\\\\\\nnext",le="1.0"} 1',
+        'db_seconds_bucket{operation="bulk \\"big\\"\\\\\\nnext",le="+Inf"} 1',
+        'db_seconds_sum{operation="bulk \\"big\\"\\\\\\nnext"} 0.5',
+        'db_seconds_count{operation="bulk \\"big\\"\\\\\\nnext"} 1',
+    ]
+
+
+def test_wrong_label_count_is_refused(registry):
+    with pytest.raises(ValueError):
+        registry._metrics[0].labels("bbc")
+
+
+def test_endpoint_serves_the_registry(registry):
+    server = start_metrics_server(0, registry, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read().decode("utf-8") == registry.render()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,106 @@
+"""
+Priority scheduling: pops are shared between the priority queues by smooth
+weighted round-robin, and an empty reliable queue is polled with backoff.
+"""
+
+import time
+
+import fakeredis
+import pytest
+
+from core import redis_handler
+from core.redis_handler import RELIABLE_POLL_MAX, RELIABLE_POLL_MIN
+from models.article import ArticleTask
+from tests.conftest import make_redis_handler
+
+PRIORITIES = ("high", "medium", "low")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_tasks(priority: str, count: int):
+    return [
+        ArticleTask(f"{priority}-{i}", f"https://example.com/{i}", "example", "news", priority)
+        for i in range(count)
+    ]
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping only moves the clock"""
+
+    def __init__(self, on_sleep=None):
+        self.now = 0.0
+        self.sleeps = []
+        self.on_sleep = on_sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep:
+            self.on_sleep(len(self.sleeps))
+
+
+@pytest.mark.parametrize("reliable", [False, True])
+def test_pop_ratio_matches_the_weights(server, reliable):
+    handler = make_redis_handler(server, reliable=reliable)
+    for priority in PRIORITIES:
+        handler.push_tasks(make_tasks(priority, 100))
+
+    popped = [handler.pop_task(timeout=0).priority for _ in range(100)]
+    assert {p: popped.count(p) for p in PRIORITIES} == {"high": 60, "medium": 30, "low": 10}
+    # Smooth: every run of ten pops already has the 6:3:1 split
+    for start in range(0, 100, 10):
+        window = popped[start:start + 10]
+        assert [window.count(p) for p in PRIORITIES] == [6, 3, 1]
+
+
+def test_busy_priorities_share_the_pops_of_an_empty_one(server):
+    handler = make_redis_handler(server)
+    handler.push_tasks(make_tasks("medium", 20) + make_tasks("low", 20))
+
+    popped = [handler.pop_task(timeout=0).priority for _ in range(20)]
+    # high's turns go to the next list in priority order; low keeps its share
+    assert (popped.count("medium"), popped.count("low")) == (18, 2)
+
+
+def test_unknown_priorities_use_the_default_queue(server):
+    handler = make_redis_handler(server)
+    handler.push_tasks(make_tasks("urgent", 2))
+    assert handler.get_queue_lengths() == {"high": 0, "medium": 2, "low": 0}
+    assert handler.pop_task(timeout=0).priority == "urgent"
+
+
+def test_empty_reliable_queue_is_polled_with_backoff(server, monkeypatch):
+    handler = make_redis_handler(server, reliable=True)
+    clock = FakeClock()
+    monkeypatch.setattr(redis_handler, "time", clock)
+
+    assert handler.pop_task(timeout=5) is None
+    assert clock.sleeps[:3] == [RELIABLE_POLL_MIN, RELIABLE_POLL_MIN * 2, RELIABLE_POLL_MIN * 4]
+    assert max(clock.sleeps) == RELIABLE_POLL_MAX
+    assert sum(clock.sleeps) == pytest.approx(5)
+
+
+def test_task_pushed_while_polling_is_picked_up(server, monkeypatch):
+    handler = make_redis_handler(server, reliable=True)
+    producer = make_redis_handler(server)
+
+    def push_on_third_sleep(sleeps: int) -> None:
+        if sleeps == 3:
+            producer.push_tasks(make_tasks("low", 1))
+
+    clock = FakeClock(push_on_third_sleep)
+    monkeypatch.setattr(redis_handler, "time", clock)
+
+    task = handler.pop_task(timeout=5)
+    assert task.id == "low-0" and task.receipt is not None
+    assert len(clock.sleeps) == 3
@@ -0,0 +1,77 @@
+"""
+Reliable queue: a popped task waits in its consumer's processing list until it
+is acked, and goes back to the queue when the consumer's lease runs out or the
+consumer shuts down.
+"""
+
+import fakeredis
+import pytest
+
+from models.article import ArticleTask
+from tests.conftest import make_redis_handler
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_tasks(count: int):
+    return [
+        ArticleTask(f"a{i}", f"https://example.com/{i}", "example", "news")
+        for i in range(count)
+    ]
+
+
+def processing(handler) -> list:
+    return handler.client.lrange(handler._processing_key("queue:medium"), 0, -1)
+
+
+def test_ack_removes_the_message(server):
+    consumer = make_redis_handler(server, reliable=True)
+    consumer.push_tasks(make_tasks(2))
+
+    task = consumer.pop_task(timeout=0)
+    assert task.receipt[0] == consumer._processing_key("queue:medium")
+    assert len(processing(consumer)) == 1 and consumer.get_queue_length() == 1
+    assert consumer.client.get(consumer.lease_key) == consumer.consumer_id
+
+    assert consumer.ack_task(task) and task.receipt is None
+    assert processing(consumer) == []
+    assert consumer.client.ttl(consumer.lease_key) == 300
+
+
+def test_expired_lease_is_requeued_and_live_one_is_not(server):
+    crashed = make_redis_handler(server, reliable=True)
+    reaper = make_redis_handler(server, reliable=True)
+    crashed.push_tasks(make_tasks(3))
+    popped = [crashed.pop_task(timeout=0) for _ in range(2)]
+
+    assert reaper.requeue_expired() == 0
+    # A consumer never reaps its own tasks
+    crashed.client.delete(crashed.lease_key)
+    assert crashed.requeue_expired() == 0
+
+    assert reaper.requeue_expired() == 2
+    assert processing(crashed) == [] and reaper.get_queue_length() == 3
+    # Back at the consuming end, so they are delivered next, in their old order
+    assert [reaper.pop_task(timeout=0).id for _ in range(2)] == [task.id for task in popped]
+
+
+def test_shutdown_hands_tasks_back(server):
+    consumer = make_redis_handler(server, reliable=True)
+    consumer.push_tasks(make_tasks(3))
+    tasks = [consumer.pop_task(timeout=0) for _ in range(3)]
+    consumer.ack_task(tasks[0])
+
+    assert consumer.release_in_flight() == 2
+    assert consumer.get_queue_length() == 2
+    assert not consumer.client.exists(consumer.lease_key)
+
+
+def test_plain_queue_has_nothing_in_flight(server):
+    consumer = make_redis_handler(server)
+    consumer.push_tasks(make_tasks(1))
+    task = consumer.pop_task(timeout=0)
+    assert task.receipt is None and consumer.ack_task(task)
+    assert consumer.release_in_flight() == 0 and consumer.get_queue_length() == 0
@@ -0,0 +1,53 @@
+"""
+Retry scheduling: which failures are retried, and how long they wait.
+"""
+
+import random
+
+import pytest
+
+from config.settings import RetryConfig
+from core.retry import PARSE, PERMANENT, TRANSIENT, RetryPolicy, classify_status
+from models.article import ArticleTask, FetchFailure
+
+
+def make_policy(max_attempts: int = 5) -> RetryPolicy:
+    config = RetryConfig(
+        max_attempts=max_attempts, base_delay=10.0, max_delay=100.0, poll_interval=1.0
+    )
+    return RetryPolicy(config, random.Random(7))
+
+
+def make_task(attempts: int = 0) -> ArticleTask:
+    return ArticleTask("a1", "https://example.com/a1", "example", "news", attempts=attempts)
+
+
+@pytest.mark.parametrize("status,kind", [
+    (400, PERMANENT), (403, PERMANENT), (404, PERMANENT), (410, PERMANENT),
+    (408, TRANSIENT), (429, TRANSIENT), (500, TRANSIENT), (503, TRANSIENT),
+])
+def test_classify_status(status, kind):
+    assert classify_status(status) == kind
+
+
+def test_permanent_failures_are_not_retried():
+    assert make_policy().delay(make_task(), FetchFailure(PERMANENT, "404")) is None
+
+
+@pytest.mark.parametrize("kind", [TRANSIENT, PARSE])
+def test_retries_stop_at_max_attempts(kind):
+    policy = make_policy(max_attempts=3)
+    assert policy.delay(make_task(attempts=1), FetchFailure(kind, "x")) is not None
+    assert policy.delay(make_task(attempts=2), FetchFailure(kind, "x")) is None
+
+
+def test_backoff_doubles_with_jitter_up_to_max_delay():
+    policy = make_policy()
+    for attempts, ceiling in [(1, 10.0), (2, 20.0), (3, 40.0), (4, 80.0), (5, 100.0), (9, 100.0)]:
+        for _ in range(50):
+            assert ceiling / 2 <= policy.backoff(attempts) <= ceiling
+
+
+def test_retry_after_is_honoured():
+    failure = FetchFailure(TRANSIENT, "429", retry_after=600.0)
+    assert make_policy().delay(make_task(), failure) == 600.0
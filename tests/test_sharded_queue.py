@@ -0,0 +1,135 @@
+"""
+Sharded queue: hosts map to shards on a consistent hash ring, shards spread
+over nodes, consumers drain their own shards first and steal from the rest.
+"""
+
+import time
+from dataclasses import replace
+from unittest import mock
+
+import fakeredis
+import pytest
+
+from config.settings import RedisConfig
+from core.sharded_queue import HashRing, ShardedRedisHandler, split_shards
+from models.article import ArticleTask
+from tests.conftest import REDIS_CONFIG
+
+HOSTS = [f"site{i}.example.com" for i in range(40)]
+
+
+def make_config(**overrides) -> RedisConfig:
+    values = dict(shards=8, shard_nodes=["node-a:6379", "node-b:6380"])
+    values.update(overrides)
+    return replace(REDIS_CONFIG, **values)
+
+
+@pytest.fixture
+def nodes():
+    return {6379: fakeredis.FakeServer(), 6380: fakeredis.FakeServer()}
+
+
+def make_handler(nodes, **overrides) -> ShardedRedisHandler:
+    def connect(host, port, db, decode_responses):
+        return fakeredis.FakeRedis(server=nodes[port], decode_responses=True)
+
+    with mock.patch("core.redis_handler.redis.Redis", connect):
+        return ShardedRedisHandler(make_config(**overrides))
+
+
+def make_tasks(per_host: int = 3):
+    return [
+        ArticleTask(f"{host}-{i}", f"https://{host}/story/{i}", "example", "news")
+        for host in HOSTS
+        for i in range(per_host)
+    ]
+
+
+def test_ring_spreads_hosts_and_moves_few_on_resize():
+    hosts = [f"host{i}.example.com" for i in range(4000)]
+    ring, grown = HashRing(8), HashRing(9)
+    counts = [0] * 8
+    for host in hosts:
+        counts[ring.shard_for(host)] += 1
+    assert min(counts) > 4000 / 8 * 0.6
+
+    moved = sum(ring.shard_for(host) != grown.shard_for(host) for host in hosts)
+    assert moved < len(hosts) * 0.2
+
+
+def test_tasks_of_a_host_share_a_shard_across_nodes(nodes):
+    handler = make_handler(nodes)
+    assert handler.push_tasks(make_tasks()) == 120
+    assert handler.get_queue_length() == 120
+    assert handler.get_queue_lengths()["medium"] == 120
+    for server in nodes.values():
+        assert fakeredis.FakeRedis(server=server).keys("queue:shard*")
+
+    for shard in handler.shards:
+        urls = [task.url for task in shard.pop_tasks(100, timeout=0)]
+        hosts = {url.split("/")[2] for url in urls}
+        assert len(hosts) * 3 == len(urls)
+        # A host's tasks keep their publish order within the shard
+        for host in hosts:
+            assert [url for url in urls if host in url] == [
+                f"https://{host}/story/{i}" for i in range(3)
+            ]
+
+
+def test_owned_shards_are_drained_first(nodes):
+    owned = [0, 2, 4, 6]
+    handler = make_handler(nodes, owned_shards=owned)
+    handler.push_tasks(make_tasks())
+    owned_count = sum(handler.shard_for(f"https://{host}/") in owned for host in HOSTS) * 3
+
+    first = handler.pop_tasks(owned_count, timeout=0)
+    assert {handler.shard_for(task.url) for task in first} <= set(owned)
+    # With the owned shards empty, the rest is stolen
+    assert len(handler.pop_tasks(200, timeout=0)) == 120 - owned_count
+
+
+def test_no_stealing_leaves_other_shards_alone(nodes):
+    handler = make_handler(nodes, owned_shards=[0], steal=False)
+    handler.push_tasks(make_tasks())
+    popped = handler.pop_tasks(200, timeout=0)
+    assert all(handler.shard_for(task.url) == 0 for task in popped)
+    assert handler.get_queue_length() == 120 - len(popped)
+
+
+def test_reliable_tasks_are_acked_on_their_shard(nodes):
+    handler = make_handler(nodes, reliable=True)
+    handler.push_tasks(make_tasks())
+    tasks = handler.pop_tasks(10, timeout=0)
+    for task in tasks[:4]:
+        assert handler.ack_task(task)
+    assert handler.release_in_flight() == 6
+    assert handler.get_queue_length() == 116
+
+
+def test_stolen_tasks_outlive_the_visibility_timeout(nodes):
+    worker = make_handler(nodes, reliable=True, visibility_timeout=1, owned_shards=[0])
+    reaper = make_handler(nodes, reliable=True, visibility_timeout=1, owned_shards=[1])
+    tasks = make_tasks()
+    # Shard 1 lives on the other node
+    worker.push_tasks([task for task in tasks if worker.shard_for(task.url) == 1])
+    stolen = worker.pop_tasks(3, timeout=0)
+    assert len(stolen) == 3
+    worker.push_tasks([task for task in tasks if worker.shard_for(task.url) == 0])
+
+    # Only shard 0 is popped from and acked on while the stolen tasks wait
+    for _ in range(3):
+        time.sleep(0.4)
+        task, = worker.pop_tasks(1, timeout=0)
+        assert worker.shard_for(task.url) == 0 and worker.ack_task(task)
+        assert reaper.requeue_expired() == 0
+
+    # Once the worker stops renewing its leases, its tasks go back
+    time.sleep(1.1)
+    assert reaper.requeue_expired() == 3
+
+
+def test_split_shards_gives_each_shard_one_owner():
+    for workers in (1, 3, 8):
+        owners = [split_shards(8, workers, index) for index in range(workers)]
+        assert sorted(shard for owned in owners for shard in owned) == list(range(8))
+    assert split_shards(4, 6, 5) == [1]
@@ -0,0 +1,70 @@
+"""
+Streaming reads: the incremental lxml parse must extract exactly what a parse
+of the whole page does, and BodyReader must stop at the same point however the
+network splits the body.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from core.extractors import BeautifulSoupExtractor, IncrementalParse, LxmlExtractor
+from core.scraper import BodyReader
+
+CORPUS_DIR = Path(__file__).parent / "extraction_corpus"
+# The incremental parse is only used on pages that declare their charset
+UTF8_CORPUS = sorted(p for p in CORPUS_DIR.glob("*.html") if p.stem != "latin1_declared")
+
+LONG_PAGE = (
+    b'<html><head><meta charset="utf-8"><title>Long page</title></head><body>'
+    b'<article><p>' + b'word ' * 300 + b'</p></article>'
+    b'<div class="comments">' + b'<p>comment</p>' * 20000 + b'</div></body></html>'
+)
+
+
+def read(body: bytes, chunk_size: int, max_bytes: int = 0, block_size: int = 1024):
+    reader = BodyReader("https://example.com/", max_bytes, LxmlExtractor(), block_size)
+    for start in range(0, len(body), chunk_size):
+        if reader.add(body[start:start + chunk_size]):
+            break
+    return reader, reader.finish()
+
+
+@pytest.mark.parametrize("path", UTF8_CORPUS, ids=lambda path: path.stem)
+@pytest.mark.parametrize("block_size", [1, 64, 4096])
+def test_incremental_parse_matches_full_parse(path, block_size):
+    html = path.read_bytes()
+    parse = IncrementalParse(LxmlExtractor(), "utf-8")
+    for start in range(0, len(html), block_size):
+        if parse.feed(html[start:start + block_size]):
+            break
+    assert parse.extract(path.stem) == BeautifulSoupExtractor().extract(html, path.stem)
+
+
+def test_reader_stops_once_article_is_read():
+    reader, body = read(LONG_PAGE, 1000)
+    assert reader.parse is not None and reader.parse.settled
+    assert len(body) < len(LONG_PAGE) // 10
+    expected = BeautifulSoupExtractor().extract(LONG_PAGE, "long")
+    assert reader.parse.extract("long") == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 700, 5000, 100000])
+def test_stopping_point_ignores_network_chunking(chunk_size):
+    _, expected = read(LONG_PAGE, 1024)
+    _, body = read(LONG_PAGE, chunk_size)
+    assert body == expected
+
+
+def test_body_is_capped():
+    # The cap falls inside the article, before the parse could settle
+    reader, body = read(LONG_PAGE, 100, max_bytes=1200)
+    assert len(body) == 1200
+    assert not reader.parse.settled
+
+
+def test_page_without_declared_charset_is_read_whole():
+    page = LONG_PAGE.replace(b'<meta charset="utf-8">', b"")
+    reader, body = read(page, 1000)
+    assert reader.parse is None
+    assert body == page
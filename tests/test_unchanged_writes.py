@@ -0,0 +1,57 @@
+"""
+Content fingerprints: a recrawl that extracted the same article only touches
+last_seen_at (or is skipped) instead of rewriting the stored document.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import SCRAPED_AT, make_article, make_db_handler
+
+URL = "https://example.com/a1"
+NEXT_DAY = datetime(2024, 5, 2, 12, 0)
+
+
+def test_fingerprint_covers_extracted_text_only():
+    assert make_article().fingerprint == make_article(scraped_at=NEXT_DAY).fingerprint
+    assert make_article().fingerprint != make_article(content="Edited body").fingerprint
+
+
+@pytest.mark.parametrize("bulk_size", [1, 10])
+def test_unchanged_recrawl_only_touches_last_seen_at(bulk_size):
+    handler = make_db_handler(unchanged_writes="touch", bulk_size=bulk_size)
+    collection = handler.collection
+    for article in (make_article(), make_article(scraped_at=NEXT_DAY)):
+        if handler.bulk_enabled:
+            handler.buffer_article(article)
+            handler.flush()
+        else:
+            handler.save_article(article)
+
+    stored = collection.documents[URL]
+    assert stored["scraped_at"] == SCRAPED_AT.isoformat()
+    assert stored["last_seen_at"] == NEXT_DAY.isoformat()
+
+
+@pytest.mark.parametrize("unchanged_writes", ["touch", "skip", "off"])
+def test_changed_content_is_rewritten(unchanged_writes):
+    handler = make_db_handler(unchanged_writes=unchanged_writes)
+    collection = handler.collection
+    handler.save_article(make_article())
+    assert handler.save_article(make_article(content="Edited body", scraped_at=NEXT_DAY))
+    assert collection.documents[URL]["content"] == "Edited body"
+
+
+def test_skip_mode_leaves_document_alone():
+    handler = make_db_handler(unchanged_writes="skip", bulk_size=10)
+    collection = handler.collection
+    handler.save_article(make_article())
+    round_trips = collection.round_trips
+
+    handler.buffer_article(make_article(scraped_at=NEXT_DAY))
+    assert handler.flush() == []
+    # One fingerprint lookup, no write
+    assert collection.round_trips == round_trips + 1
+    stored = collection.documents[URL]
+    assert stored["last_seen_at"] == SCRAPED_AT.isoformat()
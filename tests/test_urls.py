@@ -0,0 +1,46 @@
+"""
+URL normalization: spellings of the same page share one canonical form, and
+so one dedup, validator and cache key.
+"""
+
+import pytest
+
+from utils.urls import get_host, normalize_url, url_digest
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Scheme and host are case-insensitive, the path is not
+    ("HTTPS://News.Example.COM/Story", "https://news.example.com/Story"),
+    ("  https://example.com/a  ", "https://example.com/a"),
+    # Fragments never reach the server
+    ("https://example.com/a#comments", "https://example.com/a"),
+    # Default ports are dropped, others kept
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:80/a", "http://example.com/a"),
+    ("http://example.com:443/a", "http://example.com:443/a"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("https://[2001:DB8::1]:443/a", "https://[2001:db8::1]/a"),
+    # One trailing slash form, and an empty path is the root
+    ("https://example.com/a/", "https://example.com/a"),
+    ("https://example.com/a//", "https://example.com/a"),
+    ("https://example.com", "https://example.com/"),
+    # Query parameters are sorted, blank values kept, tracking parameters dropped
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?q=&page=2", "https://example.com/a?page=2&q="),
+    ("https://example.com/a?utm_source=x&id=7&fbclid=y&GCLID=z", "https://example.com/a?id=7"),
+    ("https://example.com/a?utm_medium=x", "https://example.com/a"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_unparsable_urls_are_kept_as_given():
+    assert normalize_url(" http://example.com:99999/a ") == "http://example.com:99999/a"
+    assert get_host("http://[::1") == ""
+
+
+def test_digest_is_shared_by_equivalent_spellings():
+    digest = url_digest("https://example.com/a?x=1&y=2")
+    assert url_digest("HTTPS://EXAMPLE.com:443/a/?y=2&x=1&utm_campaign=z#top") == digest
+    assert url_digest("https://example.com/a?x=2&y=1") != digest
+    assert len(digest) == 16
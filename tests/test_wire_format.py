@@ -0,0 +1,87 @@
+"""
+Round trips of the queue message formats and the stored article document.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from models.article import Article, ArticleTask
+
+
+def make_task(**overrides) -> ArticleTask:
+    fields = dict(
+        id="article_1",
+        url="https://example.com/news/1",
+        source="example",
+        category="world",
+        priority="high",
+        enqueued_at=1700000000.25,
+    )
+    fields.update(overrides)
+    return ArticleTask(**fields)
+
+
+def test_compact_round_trip():
+    task = make_task()
+    message = task.to_compact()
+    assert json.loads(message)[0] == 1
+    assert ArticleTask.from_compact(message) == task
+
+
+def test_compact_is_smaller_than_json():
+    task = make_task()
+    assert len(task.to_compact()) < len(json.dumps(task.to_dict()))
+
+
+def test_compact_keeps_unknown_priority_and_missing_enqueue_time():
+    task = make_task(priority="urgent", enqueued_at=None)
+    assert ArticleTask.from_compact(task.to_compact()) == task
+
+
+def test_compact_keeps_attempts_without_enqueue_time():
+    task = make_task(enqueued_at=None, attempts=2)
+    assert ArticleTask.from_compact(task.to_compact()) == task
+
+
+def test_compact_rejects_unknown_version():
+    with pytest.raises(ValueError):
+        ArticleTask.from_compact('[99,"a","b","c","d",1]')
+
+
+def test_old_json_messages_still_decode():
+    # Messages queued before enqueued_at existed carry only the original fields
+    message = json.dumps({
+        "id": "article_1",
+        "url": "https://example.com/news/1",
+        "source": "example",
+        "category": "world",
+        "priority": "low",
+    })
+    task = ArticleTask.from_dict(json.loads(message))
+    assert task == make_task(priority="low", enqueued_at=None)
+
+
+def test_receipt_is_not_serialized_or_compared():
+    task = make_task()
+    task.receipt = ("queue:processing", "raw")
+    assert "receipt" not in task.to_dict()
+    assert task == make_task()
+
+
+def test_article_document_round_trip():
+    article = Article(
+        id="article_1",
+        url="https://example.com/news/1",
+        source="example",
+        category="world",
+        priority="high",
+        title="Title",
+        content="Body",
+        status="completed",
+        scraped_at=datetime(2024, 5, 1, 12, 0),
+        etag='"abc"',
+    )
+    document = dict(article.to_dict(), _id="ignored")
+    assert Article.from_dict(document) == article
@@ -1,7 +1,9 @@
 import logging
 import sys
 import os
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterator
 
 def setup_logger(name: str = "pipeline", level: str = None) -> logging.Logger:
     """Setup a simple logger"""
@@ -24,5 +26,22 @@ def setup_logger(name: str = "pipeline", level: str = None) -> logging.Logger:
     
     return logger
 
+@contextmanager
+def logs_to_stderr(name: str = "pipeline") -> Iterator[None]:
+    """Send the records the logger writes to stdout to stderr instead, while stdout
+    carries data such as an export"""
+    logger = logging.getLogger(name)
+    handlers = [
+        handler for handler in logger.handlers
+        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout
+    ]
+    for handler in handlers:
+        handler.setStream(sys.stderr)
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            handler.setStream(sys.stdout)
+
 # Global logger instance
 logger = setup_logger()
@@ -0,0 +1,303 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.logger import logger
+
+# Upper bounds in seconds, from a Redis round trip up to a slow page fetch
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Timer:
+    """Context manager that observes the elapsed time of its block"""
+
+    __slots__ = ("metric", "start", "elapsed")
+
+    def __init__(self, metric: "HistogramChild"):
+        self.metric = metric
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.start
+        self.metric.observe(self.elapsed)
+
+
+class CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; cumulated only when rendering
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class _Metric:
+    """A named metric family with optional labels"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child metric for one combination of label values"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def _render_child(self, key, child: CounterChild) -> List[str]:
+        labels = _format_labels(self.labelnames, key)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def _render_child(self, key, child: HistogramChild) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total, count = child.sum, child.count
+
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.labelnames, key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(
+    port: int, registry: Optional[Registry] = None, host: str = "0.0.0.0"
+) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread, returns None if the port is unavailable"""
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint on port {port}: {e}")
+        return None
+
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# Global registry and the pipeline's metrics
+REGISTRY = Registry()
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "pipeline_queue_wait_seconds",
+    "Time tasks spent in the Redis queue before being popped",
+    buckets=(0.1, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0, 14400.0, 86400.0),
+)
+REDIS_SECONDS = REGISTRY.histogram(
+    "pipeline_redis_seconds", "Latency of Redis queue operations", ["operation"]
+)
+FETCH_SECONDS = REGISTRY.histogram(
+    "pipeline_fetch_seconds", "Latency of one HTTP fetch attempt"
+)
+FETCH_ABORTED_TOTAL = REGISTRY.counter(
+    "pipeline_fetch_aborted_total",
+    "Bodies refused or not read to the end: content_type, size_cap, early_stop",
+    ["reason"],
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "pipeline_parse_seconds", "Time spent extracting title and content", ["parser"]
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "pipeline_db_write_seconds", "Latency of MongoDB writes", ["operation"]
+)
+ARTICLES_UNCHANGED_TOTAL = REGISTRY.counter(
+    "pipeline_articles_unchanged_total",
+    "Recrawled articles whose stored copy already had their fingerprint, by write",
+    ["action"],
+)
+TASK_SECONDS = REGISTRY.histogram(
+    "pipeline_task_seconds", "End-to-end processing time of one task"
+)
+TASKS_TOTAL = REGISTRY.counter(
+    "pipeline_tasks_total", "Finished tasks by source and outcome", ["source", "outcome"]
+)
+TASKS_UNCHANGED_TOTAL = REGISTRY.counter(
+    "pipeline_tasks_unchanged_total",
+    "Tasks finished without a write: recently scraped or not modified",
+    ["source", "reason"],
+)
+FETCH_RETRIES_TOTAL = REGISTRY.counter(
+    "pipeline_fetch_retries_total", "Scrape attempts after the first, by source", ["source"]
+)
+TASK_RETRIES_TOTAL = REGISTRY.counter(
+    "pipeline_task_retries_total",
+    "Failed deliveries put on the retry queue, by failure kind",
+    ["source", "kind"],
+)
+TASKS_DEAD_LETTERED_TOTAL = REGISTRY.counter(
+    "pipeline_tasks_dead_lettered_total",
+    "Tasks given up on after their last attempt, by failure kind",
+    ["source", "kind"],
+)
+TASKS_DEFERRED_TOTAL = REGISTRY.counter(
+    "pipeline_tasks_deferred_total",
+    "Tasks put back unfetched because their host's circuit was open",
+    ["source"],
+)
+ARTICLE_CACHE_LOOKUPS_TOTAL = REGISTRY.counter(
+    "pipeline_article_cache_lookups_total",
+    "Article lookups by URL, by what answered them: hit, redis_hit or miss",
+    ["result"],
+)
+CIRCUITS_OPENED_TOTAL = REGISTRY.counter(
+    "pipeline_circuits_opened_total",
+    "Hosts whose circuit this process opened, including failed half-open probes",
+)
@@ -0,0 +1,45 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def get_host(url: str) -> str:
+    """Lower-cased host of a URL, empty if it has none"""
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different spellings deduplicate"""
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url.strip()
+
+    netloc = f"[{host}]" if ":" in host else host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def url_digest(url: str) -> bytes:
+    """Stable 128-bit hash of the normalized URL, used to key per-URL state"""
+    return hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=16).digest()